@@ -230,15 +230,9 @@ def delete_integration(integration_id):
 # Helper functions
 
 def get_user_token(user, provider):
-	"""Get user's OAuth token for a provider"""
-	try:
-		token = frappe.get_doc("Integration Token", {
-			"user": user,
-			"provider": provider
-		})
-		return token
-	except frappe.DoesNotExistError:
-		return None
+	"""Get user's decrypted OAuth access token for a provider (refreshed if expired)"""
+	from lodgeick.services.token_manager import get_access_token
+	return get_access_token(user, provider)
 
 
 def get_workflow_template(flow_name, source_app, target_app):
@@ -263,8 +257,8 @@ def create_n8n_workflow(template_id, source_token, target_token, config):
 
 	Args:
 		template_id: n8n workflow template ID
-		source_token: Source app token
-		target_token: Target app token
+		source_token: Source app access token
+		target_token: Target app access token
 		config: User configuration
 
 	Returns:
@@ -313,9 +307,17 @@ def n8n_webhook_callback():
 		"message": "...",
 		"execution_time": 1.23
 	}
+
+	With the site config `n8n_webhook_async`, the callback is only validated
+	and queued in Redis; lodgeick.services.n8n_webhook_queue applies it in a
+	batch shortly after.
 	"""
 	data = frappe.local.form_dict
 
+	from lodgeick.services import n8n_webhook_queue
+	if n8n_webhook_queue.is_enabled():
+		return n8n_webhook_queue.enqueue_callback(data)
+
 	workflow_id = data.get("workflow_id")
 	status = data.get("status")
 	message = data.get("message")
@@ -325,7 +327,7 @@ def n8n_webhook_callback():
 	integrations = frappe.get_all(
 		"User Integration",
 		filters={"workflow_id": workflow_id},
-		fields=["name"]
+		fields=["name", "user"]
 	)
 
 	if not integrations:
@@ -342,6 +344,10 @@ def n8n_webhook_callback():
 		integration.mark_error(message)
 		log_status = "Error"
 
+	# Count the execution towards the dashboard stats
+	from lodgeick.services.execution_stats import record_execution
+	record_execution(integration_id, integrations[0].user, status == "success")
+
 	# Create log entry
 	from lodgeick.lodgeick.doctype.integration_log.integration_log import IntegrationLog
 	IntegrationLog.create_log(
@@ -360,7 +366,10 @@ def n8n_webhook_callback():
 @frappe.whitelist()
 def get_dashboard_stats():
 	"""
-	Get dashboard statistics with real data from n8n
+	Get dashboard statistics
+
+	Execution stats come from Integration Execution Stats (kept up to date
+	by n8n_webhook_callback and the execution stats ingester), not from n8n.
 
 	Returns:
 		dict: Dashboard statistics
@@ -380,69 +389,11 @@ def get_dashboard_stats():
 		'status': 'Active'
 	})
 
-	# Get sync stats from n8n executions
-	synced_today = 0
-	last_sync = None
-
-	try:
-		from lodgeick.services.n8n_client import get_n8n_client
-		from frappe.utils import get_datetime, now_datetime
-
-		n8n = get_n8n_client()
-
-		# Get all user's workflow IDs
-		user_integrations = frappe.get_all(
-			'User Integration',
-			filters={'user': user, 'workflow_id': ['!=', '']},
-			fields=['workflow_id']
-		)
-
-		workflow_ids = [i.workflow_id for i in user_integrations if i.workflow_id]
-
-		if workflow_ids:
-			# Get executions from n8n
-			all_executions = []
-			for workflow_id in workflow_ids:
-				try:
-					executions = n8n.list_executions(workflow_id)
-					all_executions.extend(executions)
-				except Exception as e:
-					# Truncate error to avoid CharacterLengthExceededError
-					error_msg = str(e)[:200] if len(str(e)) > 200 else str(e)
-					try:
-						frappe.log_error(f"Failed to get executions for workflow {workflow_id}: {error_msg}")
-					except:
-						pass  # Ignore if error logging fails
-					continue
-
-			# Filter executions for today
-			today_start = get_datetime().replace(hour=0, minute=0, second=0, microsecond=0)
-
-			for execution in all_executions:
-				try:
-					started_at = execution.get('startedAt')
-					if started_at:
-						exec_time = get_datetime(started_at)
-
-						# Check if today
-						if exec_time >= today_start:
-							synced_today += 1
-
-						# Track latest sync
-						if not last_sync or exec_time > get_datetime(last_sync):
-							last_sync = started_at
-				except Exception as e:
-					continue
-
-	except Exception as e:
-		# Truncate error to avoid CharacterLengthExceededError
-		error_msg = str(e)[:200] if len(str(e)) > 200 else str(e)
-		try:
-			frappe.log_error(f"Failed to get n8n execution stats: {error_msg}", "Dashboard Stats Error")
-		except:
-			pass  # Ignore if error logging fails
-		# Return stats with zeros if n8n fails
-		pass
+	# Executions today and the latest one, from the local stats store
+	from lodgeick.services.execution_stats import get_user_execution_summary
+	execution_summary = get_user_execution_summary(user)
+	synced_today = execution_summary["executions"]
+	last_sync = execution_summary["last_execution_at"]
 
 	return {
 		"success": True,
@@ -8,10 +8,14 @@ from frappe import _
 import json
 
 
+# Largest batch accepted by create_integrations_bulk / retry_bulk_integrations
+BULK_MAX_INTEGRATIONS = 500
+
+
 @frappe.whitelist()
 def create_integration(flow_name, source_app, target_app, config):
 	"""
-	Create a new integration and sync to n8n
+	Create a new integration and queue its n8n workflow creation
 
 	Args:
 		flow_name: Name of the integration flow
@@ -45,7 +49,7 @@ def create_integration(flow_name, source_app, target_app, config):
 			"success": True,
 			"integration_id": integration.name,
 			"workflow_id": integration.workflow_id,
-			"message": "Integration created and synced to n8n"
+			"message": "Integration created, n8n sync queued"
 		}
 
 	except Exception as e:
@@ -56,10 +60,154 @@ def create_integration(flow_name, source_app, target_app, config):
 		}
 
 
+@frappe.whitelist()
+def create_integrations_bulk(integrations):
+	"""
+	Create many integrations and provision their n8n workflows in parallel
+
+	All integrations are inserted in one transaction; an invalid spec is
+	reported and skipped without affecting the others. Workflows are then
+	created in n8n with bounded concurrency instead of through the sync
+	outbox. Items whose workflow could not be created can be passed to
+	retry_bulk_integrations.
+
+	Args:
+		integrations: JSON list of {flow_name, source_app, target_app, config, status (optional)}
+
+	Returns:
+		Per-item results in request order
+	"""
+	try:
+		if isinstance(integrations, str):
+			integrations = json.loads(integrations)
+
+		if not isinstance(integrations, list) or not integrations:
+			frappe.throw(_("integrations must be a non-empty list"))
+		if len(integrations) > BULK_MAX_INTEGRATIONS:
+			frappe.throw(_("At most {0} integrations can be created at once").format(BULK_MAX_INTEGRATIONS))
+
+		results = []
+		created = []
+
+		for index, spec in enumerate(integrations):
+			savepoint = f"bulk_integration_{index}"
+			frappe.db.savepoint(savepoint)
+			try:
+				config = spec.get("config") or {}
+				if isinstance(config, str):
+					config = json.loads(config)
+
+				integration = frappe.get_doc({
+					"doctype": "User Integration",
+					"user": frappe.session.user,
+					"flow_name": spec.get("flow_name"),
+					"source_app": spec.get("source_app"),
+					"target_app": spec.get("target_app"),
+					"config": json.dumps(config),
+					"status": spec.get("status") or "Active"
+				})
+				# Provisioned below; don't queue an outbox sync as well
+				integration.flags.in_n8n_sync = True
+				integration.insert(ignore_permissions=True)
+
+				created.append(integration)
+				results.append({"index": index, "integration_id": integration.name})
+
+			except Exception as e:
+				frappe.db.rollback(save_point=savepoint)
+				results.append({"index": index, "success": False, "error": str(e)})
+
+		frappe.db.commit()
+
+		workflow_results = _provision_workflows(created)
+		for result in results:
+			if "integration_id" in result:
+				result.update(workflow_results[result["integration_id"]])
+
+		return {
+			"success": True,
+			"created": len(created),
+			"provisioned": sum(1 for result in results if result.get("workflow_id")),
+			"results": results
+		}
+
+	except Exception as e:
+		frappe.log_error(f"Failed to create integrations in bulk: {str(e)}", "Integration API Error")
+		return {
+			"success": False,
+			"error": str(e)
+		}
+
+
+@frappe.whitelist()
+def retry_bulk_integrations(integration_ids):
+	"""
+	Provision n8n workflows for integrations that don't have one yet
+
+	Args:
+		integration_ids: JSON list of integration names (e.g. the failed items of create_integrations_bulk)
+
+	Returns:
+		Per-item results; integrations that already have a workflow are reported as such
+	"""
+	try:
+		if isinstance(integration_ids, str):
+			integration_ids = json.loads(integration_ids)
+
+		if len(integration_ids) > BULK_MAX_INTEGRATIONS:
+			frappe.throw(_("At most {0} integrations can be retried at once").format(BULK_MAX_INTEGRATIONS))
+
+		from lodgeick.tasks.n8n_sync_job import SYNC_FIELDS
+
+		filters = {"name": ["in", integration_ids]}
+		if not frappe.has_permission("User Integration", "write"):
+			filters["user"] = frappe.session.user
+
+		rows = frappe.get_all("User Integration", fields=SYNC_FIELDS, filters=filters)
+		found = {row.name: row for row in rows}
+		pending = [row for row in rows if not row.workflow_id]
+
+		workflow_results = _provision_workflows(pending)
+
+		results = []
+		for integration_id in integration_ids:
+			if integration_id in workflow_results:
+				results.append(dict(workflow_results[integration_id], integration_id=integration_id))
+			elif integration_id in found:
+				results.append({"integration_id": integration_id, "success": True, "workflow_id": found[integration_id].workflow_id})
+			else:
+				results.append({"integration_id": integration_id, "success": False, "error": "Integration not found"})
+
+		return {
+			"success": True,
+			"provisioned": sum(1 for result in workflow_results.values() if result["success"]),
+			"results": results
+		}
+
+	except Exception as e:
+		frappe.log_error(f"Failed to retry bulk integrations: {str(e)}", "Integration API Error")
+		return {
+			"success": False,
+			"error": str(e)
+		}
+
+
+def _provision_workflows(integrations):
+	"""Create n8n workflows for inserted integrations and commit the write-back"""
+	if not integrations:
+		return {}
+
+	from lodgeick.services.n8n_sync import get_n8n_sync_service
+
+	results = get_n8n_sync_service().sync_integrations_create_bulk(integrations)
+	frappe.db.commit()
+	return results
+
+
 @frappe.whitelist()
 def update_integration(integration_id, config=None, status=None):
 	"""
-	Update an integration and sync to n8n
+	Update an integration and queue the n8n sync
 
 	Args:
 		integration_id: Integration document name
@@ -91,7 +239,7 @@ def update_integration(integration_id, config=None, status=None):
 
 		return {
 			"success": True,
-			"message": "Integration updated and synced to n8n"
+			"message": "Integration updated, n8n sync queued"
 		}
 
 	except Exception as e:
@@ -105,7 +253,7 @@ def update_integration(integration_id, config=None, status=None):
 @frappe.whitelist()
 def delete_integration(integration_id):
 	"""
-	Delete an integration and remove from n8n
+	Delete an integration and queue removal of its n8n workflow
 
 	Args:
 		integration_id: Integration document name
@@ -125,7 +273,7 @@ def delete_integration(integration_id):
 
 		return {
 			"success": True,
-			"message": "Integration deleted and removed from n8n"
+			"message": "Integration deleted, n8n removal queued"
 		}
 
 	except Exception as e:
@@ -219,7 +367,9 @@ def get_integration_status(integration_id):
 				"status": integration.status,
 				"workflow_id": integration.workflow_id,
 				"last_run": integration.last_run,
-				"error_message": integration.error_message
+				"error_message": integration.error_message,
+				"sync_pending": frappe.db.count("n8n Sync Outbox", {"integration": integration.name, "status": "Pending"}),
+				"sync_failed": frappe.db.count("n8n Sync Outbox", {"integration": integration.name, "status": "Failed"})
 			},
 			"workflow_info": workflow_info
 		}
@@ -266,6 +416,52 @@ def get_execution_history(integration_id, limit=10):
 		}
 
 
+@frappe.whitelist()
+def get_recent_executions(limit=10):
+	"""
+	Get recent executions across all of the current user's integrations
+
+	Read from the locally ingested executions (one indexed query per
+	integration); n8n is not contacted.
+
+	Args:
+		limit: Maximum number of executions to return per integration
+
+	Returns:
+		Executions grouped by integration
+	"""
+	try:
+		from lodgeick.services.execution_stats import get_execution_history
+
+		integrations = frappe.get_all(
+			"User Integration",
+			filters={"user": frappe.session.user, "workflow_id": ["!=", ""]},
+			fields=["name", "flow_name", "workflow_id"]
+		)
+
+		limit = int(limit)
+		history = [
+			{
+				"integration_id": integration.name,
+				"flow_name": integration.flow_name,
+				"executions": get_execution_history(integration.name, limit)
+			}
+			for integration in integrations
+		]
+
+		return {
+			"success": True,
+			"integrations": history
+		}
+
+	except Exception as e:
+		frappe.log_error(f"Failed to get recent executions: {str(e)}", "Integration API Error")
+		return {
+			"success": False,
+			"error": str(e)
+		}
+
+
 @frappe.whitelist()
 def trigger_sync_job():
 	"""
@@ -295,6 +491,88 @@ def trigger_sync_job():
 		}
 
 
+@frappe.whitelist()
+def retry_failed_sync(integration_id=None):
+	"""
+	Requeue n8n sync operations that exhausted their retries
+
+	Args:
+		integration_id: Only retry this integration (optional; all integrations otherwise)
+
+	Returns:
+		Number of requeued operations
+	"""
+	if integration_id:
+		integration_user = frappe.db.get_value("User Integration", integration_id, "user")
+		if integration_user != frappe.session.user and not frappe.has_permission("User Integration", "write"):
+			frappe.throw(_("You don't have permission to retry this integration"))
+	elif not frappe.has_permission("n8n Sync Outbox", "write"):
+		frappe.throw(_("You don't have permission to retry sync operations"))
+
+	try:
+		from lodgeick.services.n8n_outbox import retry_failed_operations
+		requeued = retry_failed_operations(integration_id)
+		frappe.db.commit()
+
+		return {
+			"success": True,
+			"requeued": requeued
+		}
+
+	except Exception as e:
+		frappe.log_error(f"Failed to retry sync operations: {str(e)}", "Integration API Error")
+		return {
+			"success": False,
+			"error": str(e)
+		}
+
+
+@frappe.whitelist()
+def get_n8n_health():
+	"""
+	Get n8n client health for this worker process
+
+	Returns:
+		Circuit breaker state and retry policy
+	"""
+	if not frappe.has_permission("User Integration", "read"):
+		frappe.throw(_("You don't have permission to view n8n health"))
+
+	from lodgeick.services.n8n_client import get_n8n_client
+	client = get_n8n_client()
+	policy = client.retry_policy
+
+	return {
+		"success": True,
+		"enabled": client.is_enabled(),
+		"circuit_breaker": client.circuit_breaker.get_state(),
+		"retry_policy": {
+			"max_retries": policy.max_retries,
+			"backoff_base": policy.backoff_base,
+			"backoff_max": policy.backoff_max
+		}
+	}
+
+
+@frappe.whitelist()
+def get_n8n_cache_stats():
+	"""
+	Get n8n node metadata cache statistics
+
+	Returns:
+		Tier hit/miss counters and node definition loader counters
+	"""
+	if not frappe.has_permission("n8n Cache", "read"):
+		frappe.throw(_("You don't have permission to view n8n cache stats"))
+
+	from lodgeick.services.n8n_cache import get_cache_stats
+
+	return {
+		"success": True,
+		"stats": get_cache_stats()
+	}
+
+
 @frappe.whitelist()
 def list_user_integrations(status=None):
 	"""
@@ -105,17 +105,8 @@ def oauth_callback(code, state, provider):
 	provider_config = get_provider_config(provider)
 	tokens = exchange_code_for_tokens(provider_config, code, state_data.get("redirect_uri"))
 
-	# Store tokens in Integration Token doctype
-	token_doc = frappe.get_doc({
-		"doctype": "Integration Token",
-		"user": state_data.get("user"),
-		"provider": provider,
-		"access_token": tokens.get("access_token"),
-		"refresh_token": tokens.get("refresh_token"),
-		"expires_at": calculate_expiry(tokens.get("expires_in")),
-		"token_data": json.dumps(tokens)
-	})
-	token_doc.insert(ignore_permissions=True)
+	# Store tokens in Integration Token doctype (one per user and provider)
+	save_integration_token(state_data.get("user"), provider, tokens)
 
 	# Create or update User Integration Settings
 	try:
@@ -168,80 +159,18 @@ def get_provider_config(provider):
 	"""
 	Get OAuth configuration for a provider
 
+	Served from the compiled provider registry
+	(lodgeick.services.provider_registry), which is rebuilt when OAuth
+	Credentials Settings change.
+
 	Args:
 		provider: Provider name
 
 	Returns:
 		dict: Provider configuration
 	"""
-	# Try to get from OAuth Credentials Settings first
-	try:
-		settings = frappe.get_single("OAuth Credentials Settings")
-		provider_settings = None
-
-		for cred in settings.oauth_credentials:
-			if cred.provider == provider:
-				provider_settings = cred
-				break
-
-		if provider_settings and provider_settings.client_id and provider_settings.client_secret:
-			# Provider-specific configurations
-			provider_configs = {
-				"xero": {
-					"auth_url": "https://login.xero.com/identity/connect/authorize",
-					"token_url": "https://identity.xero.com/connect/token",
-					"scope": "accounting.transactions accounting.contacts offline_access"
-				},
-				"google": {
-					"auth_url": "https://accounts.google.com/o/oauth2/v2/auth",
-					"token_url": "https://oauth2.googleapis.com/token",
-					"scope": "https://www.googleapis.com/auth/gmail.readonly https://www.googleapis.com/auth/gmail.send https://www.googleapis.com/auth/spreadsheets https://www.googleapis.com/auth/drive.file"
-				},
-				"slack": {
-					"auth_url": "https://slack.com/oauth/v2/authorize",
-					"token_url": "https://slack.com/api/oauth.v2.access",
-					"scope": "channels:read channels:write chat:write"
-				},
-				"hubspot": {
-					"auth_url": "https://app.hubspot.com/oauth/authorize",
-					"token_url": "https://api.hubapi.com/oauth/v1/token",
-					"scope": "crm.objects.contacts.read crm.objects.contacts.write"
-				}
-			}
-
-			config = provider_configs.get(provider, {})
-			config["client_id"] = provider_settings.client_id
-			config["client_secret"] = provider_settings.client_secret
-			return config
-	except Exception as e:
-		frappe.log_error(f"Error getting provider config from settings: {str(e)}")
-
-	# Fallback to frappe.conf
-	configs = {
-		"xero": {
-			"client_id": frappe.conf.get("xero_client_id"),
-			"client_secret": frappe.conf.get("xero_client_secret"),
-			"auth_url": "https://login.xero.com/identity/connect/authorize",
-			"token_url": "https://identity.xero.com/connect/token",
-			"scope": "accounting.transactions accounting.contacts offline_access"
-		},
-		"google": {
-			"client_id": frappe.conf.get("google_client_id"),
-			"client_secret": frappe.conf.get("google_client_secret"),
-			"auth_url": "https://accounts.google.com/o/oauth2/v2/auth",
-			"token_url": "https://oauth2.googleapis.com/token",
-			"scope": "https://www.googleapis.com/auth/gmail.readonly https://www.googleapis.com/auth/gmail.send https://www.googleapis.com/auth/spreadsheets https://www.googleapis.com/auth/drive.file"
-		},
-		"slack": {
-			"client_id": frappe.conf.get("slack_client_id"),
-			"client_secret": frappe.conf.get("slack_client_secret"),
-			"auth_url": "https://slack.com/oauth/v2/authorize",
-			"token_url": "https://slack.com/api/oauth.v2.access",
-			"scope": "channels:read channels:write chat:write"
-		}
-	}
-
-	return configs.get(provider)
+	from lodgeick.services.provider_registry import get_provider
+	return get_provider(provider)
 
 
 @frappe.whitelist()
@@ -320,7 +249,7 @@ def exchange_code_for_tokens(config, code, redirect_uri):
 		"redirect_uri": redirect_uri
 	}
 
-	response = requests.post(config["token_url"], data=data)
+	response = _post_token_request(config, data)
 
 	if response.status_code != 200:
 		frappe.throw(_("Failed to exchange code for tokens: {0}").format(response.text))
@@ -328,6 +257,16 @@ def exchange_code_for_tokens(config, code, redirect_uri):
 	return response.json()
 
 
+def _post_token_request(config, data):
+	"""Call a provider's token endpoint through the pooled OAuth HTTP client"""
+	from lodgeick.services.oauth_http import OAuthProviderBusyError, post_token_request
+
+	try:
+		return post_token_request(config.get("provider"), config["token_url"], data)
+	except (requests.RequestException, OAuthProviderBusyError) as e:
+		frappe.throw(_("Could not reach the OAuth provider: {0}").format(str(e)))
+
+
 def calculate_expiry(expires_in):
 	"""Calculate token expiry datetime"""
 	if not expires_in:
@@ -336,6 +275,46 @@ def calculate_expiry(expires_in):
 	return datetime.now() + timedelta(seconds=int(expires_in))
 
 
+def save_integration_token(user, provider, tokens):
+	"""
+	Create or update the user's Integration Token for a provider
+
+	Reconnecting a provider updates the existing token, keeping its stored
+	n8n credential ID. Providers that omit the refresh token on
+	re-authorization keep the previous one.
+
+	Args:
+		user: Frappe user
+		provider: Provider name
+		tokens: Token response from the provider
+
+	Returns:
+		Integration Token document
+	"""
+	values = {
+		"access_token": tokens.get("access_token"),
+		"expires_at": calculate_expiry(tokens.get("expires_in")),
+		"token_data": json.dumps(tokens)
+	}
+	if tokens.get("refresh_token"):
+		values["refresh_token"] = tokens.get("refresh_token")
+
+	existing = frappe.db.get_value("Integration Token", {"user": user, "provider": provider}, "name")
+	if not existing:
+		try:
+			token_doc = frappe.get_doc(dict(values, doctype="Integration Token", user=user, provider=provider))
+			token_doc.insert(ignore_permissions=True)
+			return token_doc
+		except frappe.UniqueValidationError:
+			# A concurrent callback stored the token first; update that one
+			existing = frappe.db.get_value("Integration Token", {"user": user, "provider": provider}, "name")
+
+	token_doc = frappe.get_doc("Integration Token", existing)
+	token_doc.update(values)
+	token_doc.save(ignore_permissions=True)
+	return token_doc
+
+
 @frappe.whitelist()
 def save_user_oauth_setup(provider, tier='manual', client_id=None, client_secret=None, use_default=False):
 	"""
@@ -454,16 +433,55 @@ def refresh_token(provider, user=None):
 	if not user:
 		user = frappe.session.user
 
-	# Get existing token
-	token_doc = frappe.get_doc("Integration Token", {
-		"user": user,
-		"provider": provider
-	})
+	# Concurrent refreshes of the same token are collapsed into one
+	from lodgeick.services.token_manager import refresh_user_token
+	if not refresh_user_token(user, provider):
+		return {
+			"success": False,
+			"error": "Token is being refreshed by another request that did not succeed"
+		}
 
+	return {
+		"success": True,
+		"message": "Token refreshed successfully"
+	}
+
+
+@frappe.whitelist()
+def get_token_exchange_metrics():
+	"""
+	Get token endpoint request counts and latency per provider
+
+	Returns:
+		dict: Metrics per provider (System Manager only)
+	"""
+	frappe.only_for("System Manager")
+
+	from lodgeick.services.oauth_http import get_metrics
+
+	return {
+		"success": True,
+		"metrics": get_metrics()
+	}
+
+
+def refresh_token_doc(token_doc, provider_config=None):
+	"""
+	Exchange a token's refresh token for a new access token and save it
+
+	Does not commit; callers own the transaction.
+
+	Args:
+		token_doc: Integration Token document
+		provider_config: Provider config (loaded for token_doc.provider if omitted)
+
+	Returns:
+		dict: Token response from the provider
+	"""
 	if not token_doc.refresh_token:
 		frappe.throw(_("No refresh token available"))
 
-	provider_config = get_provider_config(provider)
+	provider_config = provider_config or get_provider_config(token_doc.provider)
 
 	# Request new access token
 	data = {
@@ -473,7 +491,7 @@ def refresh_token(provider, user=None):
 		"grant_type": "refresh_token"
 	}
 
-	response = requests.post(provider_config["token_url"], data=data)
+	response = _post_token_request(provider_config, data)
 
 	if response.status_code != 200:
 		frappe.throw(_("Failed to refresh token: {0}").format(response.text))
@@ -487,9 +505,5 @@ def refresh_token(provider, user=None):
 	token_doc.expires_at = calculate_expiry(tokens.get("expires_in"))
 	token_doc.token_data = json.dumps(tokens)
 	token_doc.save(ignore_permissions=True)
-	frappe.db.commit()
 
-	return {
-		"success": True,
-		"message": "Token refreshed successfully"
-	}
+	return tokens
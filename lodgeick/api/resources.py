@@ -7,11 +7,13 @@ Uses n8n's node parameter structure to get resource types
 import frappe
 from frappe import _
 from lodgeick.services.n8n_client import get_n8n_client
-from lodgeick.services.n8n_cache import (
-	get_cached_node_types,
-	set_cached_node_types,
-	get_cached_node_definition,
-	set_cached_node_definition
+from lodgeick.services.token_manager import get_connection_status
+from lodgeick.services.n8n_cache import get_cached_node_types, set_cached_node_types
+from lodgeick.services.n8n_catalog import (
+	compile_node_catalog,
+	load_node_catalog,
+	get_catalog_resources,
+	get_catalog_operations
 )
 
 
@@ -91,18 +93,15 @@ def get_app_templates(app_id):
 	"""
 	user = frappe.session.user
 
-	# Check if user has this app connected (has Integration Token)
-	token = frappe.db.get_value(
-		"Integration Token",
-		{
-			"user": user,
-			"provider": app_id
-		},
-		["name", "provider"],
-		as_dict=True
-	)
+	# Check if user has this app connected (read-only; expired tokens refresh in the background)
+	connection = get_connection_status(user, app_id)
+	if connection == "expired":
+		return {
+			"success": False,
+			"error": f"Your {app_id} connection has expired. Please reconnect it from the integrations page."
+		}
 
-	if not token:
+	if not connection:
 		return {
 			"success": False,
 			"error": f"App '{app_id}' is not connected. Please connect it from the integrations page."
@@ -140,18 +139,15 @@ def get_app_resources(app_id):
 	"""
 	user = frappe.session.user
 
-	# Check if user has this app connected (has Integration Token)
-	token = frappe.db.get_value(
-		"Integration Token",
-		{
-			"user": user,
-			"provider": app_id
-		},
-		["name", "provider"],
-		as_dict=True
-	)
+	# Check if user has this app connected (read-only; expired tokens refresh in the background)
+	connection = get_connection_status(user, app_id)
+	if connection == "expired":
+		return {
+			"success": False,
+			"error": f"Your {app_id} connection has expired. Please reconnect it from the integrations page."
+		}
 
-	if not token:
+	if not connection:
 		return {
 			"success": False,
 			"error": f"App '{app_id}' is not connected. Please connect it from the integrations page."
@@ -182,11 +178,10 @@ def get_app_resources(app_id):
 				"resources": resources
 			}
 
-		# Get node type definition from n8n
-		node_def = n8n.get_node_type(node_type)
+		# Get compiled node catalog (cached, single-flight fetch from n8n)
+		catalog = load_node_catalog(node_type)
 
-		# Extract resource options from node definition
-		resources = extract_resources_from_node(node_def, app_id)
+		resources = (catalog and get_catalog_resources(catalog)) or get_fallback_resources(app_id)
 
 		return {
 			"success": True,
@@ -218,18 +213,15 @@ def get_resource_fields(app_id, resource_id):
 	"""
 	user = frappe.session.user
 
-	# Check if user has this app connected (has Integration Token)
-	token = frappe.db.get_value(
-		"Integration Token",
-		{
-			"user": user,
-			"provider": app_id
-		},
-		["name", "provider"],
-		as_dict=True
-	)
+	# Check if user has this app connected (read-only; expired tokens refresh in the background)
+	connection = get_connection_status(user, app_id)
+	if connection == "expired":
+		return {
+			"success": False,
+			"error": f"Your {app_id} connection has expired. Please reconnect it from the integrations page."
+		}
 
-	if not token:
+	if not connection:
 		return {
 			"success": False,
 			"error": f"App '{app_id}' is not connected for this user"
@@ -329,25 +321,28 @@ def get_resource_type(app_id):
 	return types.get(app_id, "resource")
 
 
+# App ID -> n8n node type name (latest n8n node versions)
+APP_NODE_TYPES = {
+	"gmail": "n8n-nodes-base.gmail",
+	"google_sheets": "n8n-nodes-base.googleSheets",
+	"google_drive": "n8n-nodes-base.googleDrive",
+	"slack": "n8n-nodes-base.slack",
+	"salesforce": "n8n-nodes-base.salesforce",
+	"hubspot": "n8n-nodes-base.hubSpot",
+	"jira": "n8n-nodes-base.jira",
+	"xero": "n8n-nodes-base.xero",
+	"notion": "n8n-nodes-base.notion",
+	"mailchimp": "n8n-nodes-base.mailchimp",
+	"airtable": "n8n-nodes-base.airtable"
+}
+
+
 def get_node_type_for_app(app_id):
 	"""
 	Map app ID to n8n node type name
 	Uses latest n8n node versions
 	"""
-	node_types = {
-		"gmail": "n8n-nodes-base.gmail",
-		"google_sheets": "n8n-nodes-base.googleSheets",
-		"google_drive": "n8n-nodes-base.googleDrive",
-		"slack": "n8n-nodes-base.slack",
-		"salesforce": "n8n-nodes-base.salesforce",
-		"hubspot": "n8n-nodes-base.hubSpot",
-		"jira": "n8n-nodes-base.jira",
-		"xero": "n8n-nodes-base.xero",
-		"notion": "n8n-nodes-base.notion",
-		"mailchimp": "n8n-nodes-base.mailchimp",
-		"airtable": "n8n-nodes-base.airtable"
-	}
-	return node_types.get(app_id)
+	return APP_NODE_TYPES.get(app_id)
 
 
 def extract_resources_from_node(node_def, app_id):
@@ -362,31 +357,9 @@ def extract_resources_from_node(node_def, app_id):
 		list: Resource options with id, name, type
 	"""
 	try:
-		# n8n node definitions have a 'properties' array
-		properties = node_def.get("properties", [])
-
-		# Find the 'resource' parameter
-		resource_param = None
-		for prop in properties:
-			if prop.get("name") == "resource" or prop.get("displayName") == "Resource":
-				resource_param = prop
-				break
-
-		if not resource_param or "options" not in resource_param:
-			# No resource parameter found, use fallback
-			return get_fallback_resources(app_id)
-
-		# Extract resource options
-		resources = []
-		for option in resource_param.get("options", []):
-			resource = {
-				"id": option.get("value", option.get("name", "")),
-				"name": option.get("name", option.get("value", "")),
-				"type": "resource",
-				"description": option.get("description", "")
-			}
-			resources.append(resource)
+		resources = get_catalog_resources(compile_node_catalog(node_def))
 
+		# No resource parameter found, use fallback
 		return resources if resources else get_fallback_resources(app_id)
 
 	except Exception as e:
@@ -668,27 +641,20 @@ def get_resource_operations(app_id, resource_id):
 				"error": "App not supported"
 			}
 
-		# Try cache first
-		cached_def = get_cached_node_definition(node_type)
-		node_def = cached_def
-
-		if not cached_def:
-			# Fetch from n8n
-			n8n = get_n8n_client()
-
-			if not n8n.is_enabled():
-				return {
-					"success": True,
-					"operations": get_fallback_operations(app_id, resource_id)
-				}
-
-			node_def = n8n.get_node_type(node_type)
+		# Get compiled node catalog (cached, single-flight fetch from n8n)
+		catalog = load_node_catalog(node_type)
 
-			# Cache it
-			set_cached_node_definition(node_type, node_def)
+		if not catalog:
+			# n8n not available, use fallback
+			return {
+				"success": True,
+				"operations": get_fallback_operations(app_id, resource_id)
+			}
 
-		# Extract operations for this resource
-		operations = extract_operations_from_node(node_def, resource_id)
+		# Look up operations for this resource
+		operations = get_catalog_operations(catalog, resource_id)
+		if operations is None:
+			operations = get_fallback_operations("unknown", resource_id)
 
 		return {
 			"success": True,
@@ -717,38 +683,10 @@ def extract_operations_from_node(node_def, resource_id):
 		list: Operations with id, name, description
 	"""
 	try:
-		properties = node_def.get("properties", [])
-
-		# Find the 'operation' parameter
-		operation_param = None
-		for prop in properties:
-			if prop.get("name") == "operation":
-				# Check if this operation param is for the correct resource
-				display_options = prop.get("displayOptions", {})
-				show = display_options.get("show", {})
-
-				# If it has resource filter, check if it matches
-				if "resource" in show:
-					resource_values = show["resource"]
-					if resource_id not in resource_values:
-						continue
-
-				operation_param = prop
-				break
-
-		if not operation_param or "options" not in operation_param:
-			return get_fallback_operations("unknown", resource_id)
+		operations = get_catalog_operations(compile_node_catalog(node_def), resource_id)
 
-		# Extract operations
-		operations = []
-		for option in operation_param.get("options", []):
-			operation = {
-				"id": option.get("value", option.get("name", "")),
-				"name": option.get("name", option.get("value", "")),
-				"description": option.get("description", ""),
-				"action": option.get("action", "")
-			}
-			operations.append(operation)
+		if operations is None:
+			return get_fallback_operations("unknown", resource_id)
 
 		return operations
 
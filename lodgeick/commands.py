@@ -0,0 +1,28 @@
+"""
+Bench commands for Lodgeick
+"""
+
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("warm-n8n-cache")
+@click.option("--force", is_flag=True, default=False, help="Refresh entries that are still fresh")
+@pass_context
+def warm_n8n_cache(context, force=False):
+	"""Fetch n8n node types and app node catalogs into the cache"""
+	import frappe
+	from lodgeick.tasks.n8n_cache_warmer import warm_node_cache
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+
+	try:
+		summary = warm_node_cache(force=force)
+		click.echo(frappe.as_json(summary))
+	finally:
+		frappe.destroy()
+
+
+commands = [warm_n8n_cache]
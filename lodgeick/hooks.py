@@ -108,6 +108,11 @@ fixtures = [
 	{"dt": "App Catalog", "filters": [["name", "in", ["xero", "google_sheets", "hubspot", "slack"]]]}
 ]
 
+# Cache
+# -----
+# Site config credentials are compiled into the provider registry too
+clear_cache = "lodgeick.services.provider_registry.invalidate_registry"
+
 # Uninstallation
 # ------------
 
@@ -171,6 +176,28 @@ fixtures = [
 # Scheduled Tasks
 # ---------------
 
+scheduler_events = {
+	"all": [
+		"lodgeick.services.n8n_outbox.drain_outbox",
+		"lodgeick.services.n8n_webhook_queue.apply_queued_callbacks",
+		"lodgeick.services.oauth_rate_limiter.rollup_usage_logs"
+	],
+	"hourly": [
+		"lodgeick.tasks.n8n_cache_warmer.warm_node_cache",
+		"lodgeick.tasks.n8n_sync_job.sync_changed_integrations"
+	],
+	"daily": [
+		"lodgeick.tasks.n8n_sync_shards.start_sync_run",
+		"lodgeick.tasks.n8n_execution_ingester.purge_old_executions"
+	],
+	"cron": {
+		"*/5 * * * *": [
+			"lodgeick.tasks.n8n_execution_ingester.ingest_executions",
+			"lodgeick.services.token_manager.refresh_expiring_tokens"
+		]
+	}
+}
+
 # scheduler_events = {
 # 	"all": [
 # 		"lodgeick.tasks.all"
@@ -221,11 +248,13 @@ fixtures = [
 # ----------------
 # before_request = ["lodgeick.utils.before_request"]
 # after_request = ["lodgeick.utils.after_request"]
+after_request = ["lodgeick.services.integration_log_buffer.flush_and_commit"]
 
 # Job Events
 # ----------
 # before_job = ["lodgeick.utils.before_job"]
 # after_job = ["lodgeick.utils.after_job"]
+after_job = ["lodgeick.services.integration_log_buffer.flush_and_commit"]
 
 # User Data Protection
 # --------------------
@@ -0,0 +1 @@
+# Integration Execution DocType
@@ -0,0 +1,15 @@
+"""Integration Execution DocType"""
+
+import frappe
+from frappe.model.document import Document
+
+
+class IntegrationExecution(Document):
+	"""Local copy of one n8n execution, written by lodgeick.tasks.n8n_execution_ingester"""
+	pass
+
+
+def on_doctype_update():
+	"""Serve per-integration and per-user history, newest first, from indexes"""
+	frappe.db.add_index("Integration Execution", ["integration", "started_at"])
+	frappe.db.add_index("Integration Execution", ["user", "started_at"])
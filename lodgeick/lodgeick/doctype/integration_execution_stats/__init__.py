@@ -0,0 +1 @@
+# Integration Execution Stats DocType
@@ -0,0 +1,14 @@
+"""Integration Execution Stats DocType"""
+
+import frappe
+from frappe.model.document import Document
+
+
+class IntegrationExecutionStats(Document):
+	"""Daily execution counters of one integration, maintained by lodgeick.services.execution_stats"""
+	pass
+
+
+def on_doctype_update():
+	"""Serve per-user dashboard aggregates from the index"""
+	frappe.db.add_index("Integration Execution Stats", ["user", "date"])
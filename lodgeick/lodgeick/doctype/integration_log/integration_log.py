@@ -16,8 +16,20 @@ class IntegrationLog(Document):
 			frappe.throw("Status is required")
 
 	@staticmethod
-	def create_log(integration_id, status, message, execution_time=None):
-		"""Helper method to create a log entry"""
+	def create_log(integration_id, status, message, execution_time=None, sync=False):
+		"""
+		Helper method to create a log entry
+
+		Entries are buffered and written with one multi-row insert when the
+		transaction commits (see lodgeick.services.integration_log_buffer).
+		With sync=True, or the integration_log_sync flag, the entry is
+		inserted and committed immediately and the document is returned.
+		"""
+		from lodgeick.services.integration_log_buffer import buffer_log, is_sync
+
+		if not sync and not is_sync():
+			return buffer_log(integration_id, status, message, execution_time)
+
 		log = frappe.get_doc({
 			"doctype": "Integration Log",
 			"integration": integration_id,
@@ -28,3 +40,8 @@ class IntegrationLog(Document):
 		log.insert()
 		frappe.db.commit()
 		return log
+
+
+def on_doctype_update():
+	"""Serve an integration's log, newest first, from one index"""
+	frappe.db.add_index("Integration Log", ["integration", "timestamp"])
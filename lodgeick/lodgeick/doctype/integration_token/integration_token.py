@@ -2,6 +2,7 @@
 # For license information, please see license.txt
 
 import frappe
+from functools import partial
 from frappe.model.document import Document
 
 
@@ -15,6 +16,16 @@ class IntegrationToken(Document):
 		if not self.user:
 			frappe.throw("User is required")
 
+	def on_update(self):
+		"""Drop the cached access token in every process once the change is committed"""
+		from lodgeick.services.token_manager import invalidate
+		frappe.db.after_commit.add(partial(invalidate, self.user, self.provider))
+
+	def on_trash(self):
+		"""Drop the cached access token in every process once the change is committed"""
+		from lodgeick.services.token_manager import invalidate
+		frappe.db.after_commit.add(partial(invalidate, self.user, self.provider))
+
 	def is_expired(self):
 		"""Check if token is expired"""
 		import frappe.utils
@@ -28,3 +39,8 @@ class IntegrationToken(Document):
 		if self.token_data:
 			return json.loads(self.token_data)
 		return {}
+
+
+def on_doctype_update():
+	"""One token per user and provider; also the index for every token lookup"""
+	frappe.db.add_unique("Integration Token", ["user", "provider"], constraint_name="unique_user_provider")
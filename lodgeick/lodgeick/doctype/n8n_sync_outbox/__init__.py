@@ -0,0 +1 @@
+# n8n Sync Outbox DocType
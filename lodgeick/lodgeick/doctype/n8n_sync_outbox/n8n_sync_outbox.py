@@ -0,0 +1,9 @@
+"""n8n Sync Outbox DocType"""
+
+import frappe
+from frappe.model.document import Document
+
+
+class n8nSyncOutbox(Document):
+	"""Pending n8n sync operation written in the same transaction as the integration change"""
+	pass
@@ -0,0 +1,9 @@
+"""n8n Sync Run DocType"""
+
+import frappe
+from frappe.model.document import Document
+
+
+class n8nSyncRun(Document):
+	"""Aggregated report of one sharded n8n reconciliation run"""
+	pass
@@ -6,4 +6,12 @@ from frappe.model.document import Document
 
 
 class OAuthCredentialsSettings(Document):
-	pass
+	def on_update(self):
+		"""Make every process reload the provider registry once the change is committed"""
+		from lodgeick.services.provider_registry import invalidate_registry
+		frappe.db.after_commit.add(invalidate_registry)
+
+	def on_trash(self):
+		"""Make every process reload the provider registry once the change is committed"""
+		from lodgeick.services.provider_registry import invalidate_registry
+		frappe.db.after_commit.add(invalidate_registry)
@@ -1,12 +1,17 @@
 """
 OAuth Usage Log DocType
 Tracks API usage for rate limiting on shared OAuth apps
+
+Limits are enforced from Redis by lodgeick.services.oauth_rate_limiter;
+these documents are a periodic rollup of its counters for reporting.
 """
 
 import frappe
 from frappe.model.document import Document
-from datetime import datetime, timedelta
+from datetime import datetime
+from redis.exceptions import RedisError
 from lodgeick.config.oauth_tiers import get_rate_limit
+from lodgeick.services import oauth_rate_limiter
 
 
 class OAuthUsageLog(Document):
@@ -36,26 +41,37 @@ class OAuthUsageLog(Document):
 
 	def update_status(self):
 		"""Update status based on current usage"""
-		if self.daily_limit and self.requests_today >= self.daily_limit:
-			self.status = "Limit Reached"
-		elif self.minute_limit and self.requests_this_minute >= self.minute_limit:
-			self.status = "Limit Reached"
-		elif self.daily_limit and self.requests_today >= (self.daily_limit * 0.8):
-			self.status = "Warning"
-		else:
-			self.status = "Active"
+		self.status = get_usage_status(
+			self.requests_today or 0, self.requests_this_minute or 0, self.daily_limit, self.minute_limit
+		)
+
+
+def get_usage_status(requests_today, requests_this_minute, daily_limit, minute_limit):
+	"""Get the usage status (Active, Warning, Limit Reached) for request counts"""
+	if daily_limit and requests_today >= daily_limit:
+		return "Limit Reached"
+	elif minute_limit and requests_this_minute >= minute_limit:
+		return "Limit Reached"
+	elif daily_limit and requests_today >= (daily_limit * 0.8):
+		return "Warning"
+	return "Active"
 
 
 @frappe.whitelist()
-def check_rate_limit(user: str, provider: str, tier: str, api_name: str = None) -> dict:
+def check_rate_limit(user: str, provider: str, tier: str, api_name: str = None, record: bool = False) -> dict:
 	"""
 	Check if user has exceeded rate limits
 
+	Counters live in Redis (lodgeick.services.oauth_rate_limiter). With
+	record=True the check and the recording of the request are a single
+	atomic operation, and the request is only counted if it is allowed.
+
 	Args:
 		user: User email
 		provider: OAuth provider (google, slack, etc.)
 		tier: OAuth tier (default, ai, manual)
 		api_name: Optional specific API name
+		record: Also count this request if it is allowed
 
 	Returns:
 		{
@@ -84,57 +100,33 @@ def check_rate_limit(user: str, provider: str, tier: str, api_name: str = None)
 			"message": "No limits configured"
 		}
 
-	# Find or create usage log
-	usage_key = f"{user}-{provider}-{tier}"
-	if api_name:
-		usage_key += f"-{api_name}"
-
-	usage_log = frappe.db.get_value(
-		"OAuth Usage Log",
-		{
-			"user": user,
-			"provider": provider,
-			"tier": tier,
-			"api_name": api_name or ""
-		},
-		["name", "requests_today", "requests_this_minute", "daily_limit", "minute_limit", "status"],
-		as_dict=True
-	)
-
-	if not usage_log:
-		# Create new usage log
-		daily_limit = rate_config.get("requests_per_day")
-		minute_limit = rate_config.get("requests_per_minute")
-
-		usage_log = frappe.get_doc({
-			"doctype": "OAuth Usage Log",
-			"user": user,
-			"provider": provider,
-			"tier": tier,
-			"api_name": api_name or "",
-			"requests_today": 0,
-			"requests_this_minute": 0,
-			"daily_limit": daily_limit,
-			"minute_limit": minute_limit,
-			"last_reset_daily": datetime.now(),
-			"last_reset_minute": datetime.now(),
-			"status": "Active"
-		})
-		usage_log.insert(ignore_permissions=True)
-		frappe.db.commit()
-
+	daily_limit = rate_config.get("requests_per_day")
+	minute_limit = rate_config.get("requests_per_minute")
+
+	try:
+		usage = oauth_rate_limiter.acquire(
+			user, provider, tier, api_name,
+			minute_limit=minute_limit,
+			day_limit=daily_limit,
+			cost=1 if frappe.utils.cint(record) else 0
+		)
+	except RedisError as e:
+		# Fail open: a Redis outage must not block every shared-app request
+		frappe.log_error(f"Rate limit check failed: {str(e)}", "OAuth Rate Limiter Error")
 		return {
 			"allowed": True,
-			"remaining_today": daily_limit,
-			"remaining_minute": minute_limit,
-			"message": "New usage tracker created"
+			"remaining_today": None,
+			"remaining_minute": None,
+			"message": "Rate limiter unavailable"
 		}
 
-	# Check limits
-	if usage_log.status == "Limit Reached":
-		remaining_daily = usage_log.daily_limit - usage_log.requests_today if usage_log.daily_limit else None
-		remaining_minute = usage_log.minute_limit - usage_log.requests_this_minute if usage_log.minute_limit else None
+	remaining_daily = daily_limit - usage["requests_today"] if daily_limit else None
+	remaining_minute = minute_limit - usage["requests_this_minute"] if minute_limit else None
+
+	status = get_usage_status(usage["requests_today"], usage["requests_this_minute"], daily_limit, minute_limit)
+	allowed = usage["allowed"] if frappe.utils.cint(record) else status != "Limit Reached"
 
+	if not allowed:
 		return {
 			"allowed": False,
 			"remaining_today": max(0, remaining_daily) if remaining_daily is not None else None,
@@ -142,9 +134,6 @@ def check_rate_limit(user: str, provider: str, tier: str, api_name: str = None)
 			"message": "Rate limit exceeded. Please upgrade to AI or Manual setup for unlimited access."
 		}
 
-	remaining_daily = usage_log.daily_limit - usage_log.requests_today if usage_log.daily_limit else None
-	remaining_minute = usage_log.minute_limit - usage_log.requests_this_minute if usage_log.minute_limit else None
-
 	return {
 		"allowed": True,
 		"remaining_today": remaining_daily,
@@ -158,6 +147,9 @@ def record_api_request(user: str, provider: str, tier: str, api_name: str = None
 	"""
 	Record an API request for rate limiting
 
+	Counts the request even if it is over the limit. Prefer
+	check_rate_limit(..., record=True), which checks and records at once.
+
 	Args:
 		user: User email
 		provider: OAuth provider
@@ -168,25 +160,10 @@ def record_api_request(user: str, provider: str, tier: str, api_name: str = None
 	if tier in ["ai", "manual"]:
 		return
 
-	# Find usage log
-	usage_log = frappe.db.get_value(
-		"OAuth Usage Log",
-		{
-			"user": user,
-			"provider": provider,
-			"tier": tier,
-			"api_name": api_name or ""
-		},
-		"name"
-	)
-
-	if usage_log:
-		doc = frappe.get_doc("OAuth Usage Log", usage_log)
-		doc.requests_today = (doc.requests_today or 0) + 1
-		doc.requests_this_minute = (doc.requests_this_minute or 0) + 1
-		doc.last_request_time = datetime.now()
-		doc.save(ignore_permissions=True)
-		frappe.db.commit()
+	try:
+		oauth_rate_limiter.record(user, provider, tier, api_name)
+	except RedisError as e:
+		frappe.log_error(f"Recording API request failed: {str(e)}", "OAuth Rate Limiter Error")
 
 
 @frappe.whitelist()
@@ -222,3 +199,8 @@ def get_usage_stats(user: str, provider: str = None) -> list:
 	)
 
 	return usage_logs
+
+
+def on_doctype_update():
+	"""Find the usage row of a (user, provider, tier, api) on every rate limit check"""
+	frappe.db.add_index("OAuth Usage Log", ["user", "provider", "tier", "api_name"])
@@ -17,56 +17,38 @@ class UserIntegration(Document):
 			frappe.throw("User is required")
 
 	def after_insert(self):
-		"""Create corresponding n8n workflow after integration is created"""
-		if frappe.conf.get("n8n_auto_sync", True):
-			try:
-				from lodgeick.services.n8n_sync import get_n8n_sync_service
-				sync_service = get_n8n_sync_service()
-				sync_service.sync_integration_create(self)
-			except Exception as e:
-				frappe.log_error(f"Failed to create n8n workflow: {str(e)}", "N8N Sync Hook Error")
-				# Don't prevent integration creation if n8n sync fails
-				pass
+		"""Queue creation of the corresponding n8n workflow"""
+		self._queue_n8n_sync("create")
 
 	def on_update(self):
-		"""Update corresponding n8n workflow when integration is updated"""
-		if frappe.conf.get("n8n_auto_sync", True):
-			# Check if this is a status change
-			if self.has_value_changed("status"):
-				self._sync_status_to_n8n()
-			# Check if configuration changed
-			elif self.has_value_changed("config") or self.has_value_changed("source_app") or self.has_value_changed("target_app"):
-				self._sync_update_to_n8n()
+		"""Queue an update of the corresponding n8n workflow"""
+		# Check if this is a status change
+		if self.has_value_changed("status"):
+			self._queue_n8n_sync("status")
+		# Check if configuration changed
+		elif self.has_value_changed("config") or self.has_value_changed("source_app") or self.has_value_changed("target_app"):
+			self._queue_n8n_sync("update")
 
 	def on_trash(self):
-		"""Delete corresponding n8n workflow when integration is deleted"""
-		if frappe.conf.get("n8n_auto_sync", True):
-			try:
-				from lodgeick.services.n8n_sync import get_n8n_sync_service
-				sync_service = get_n8n_sync_service()
-				sync_service.sync_integration_delete(self)
-			except Exception as e:
-				frappe.log_error(f"Failed to delete n8n workflow: {str(e)}", "N8N Sync Hook Error")
-				# Don't prevent integration deletion if n8n delete fails
-				pass
-
-	def _sync_update_to_n8n(self):
-		"""Sync integration update to n8n"""
-		try:
-			from lodgeick.services.n8n_sync import get_n8n_sync_service
-			sync_service = get_n8n_sync_service()
-			sync_service.sync_integration_update(self)
-		except Exception as e:
-			frappe.log_error(f"Failed to update n8n workflow: {str(e)}", "N8N Sync Hook Error")
+		"""Queue deletion of the corresponding n8n workflow"""
+		self._queue_n8n_sync("delete")
 
-	def _sync_status_to_n8n(self):
-		"""Sync status change to n8n (activate/deactivate workflow)"""
-		try:
-			from lodgeick.services.n8n_sync import get_n8n_sync_service
-			sync_service = get_n8n_sync_service()
-			sync_service.sync_integration_status(self, self.status)
-		except Exception as e:
-			frappe.log_error(f"Failed to sync status to n8n: {str(e)}", "N8N Sync Hook Error")
+		from lodgeick.services.execution_stats import delete_integration_stats
+		delete_integration_stats(self.name)
+
+	def _queue_n8n_sync(self, operation):
+		"""
+		Record the n8n operation in the sync outbox
+
+		The outbox row is part of this transaction and is applied by a
+		background job after commit, so saving never waits on n8n.
+		"""
+		# Saves made by the sync service itself must not queue another sync
+		if self.flags.in_n8n_sync or not frappe.conf.get("n8n_auto_sync", True):
+			return
+
+		from lodgeick.services.n8n_outbox import enqueue_integration_sync
+		enqueue_integration_sync(self, operation)
 
 	def get_config_json(self):
 		"""Get configuration as JSON"""
@@ -121,7 +103,7 @@ class UserIntegration(Document):
 
 	def get_execution_history(self, limit=10):
 		"""
-		Get execution history from n8n
+		Get execution history ingested from n8n
 
 		Args:
 			limit: Maximum number of executions to return
@@ -132,11 +114,10 @@ class UserIntegration(Document):
 		if not self.workflow_id:
 			return []
 
-		try:
-			from lodgeick.services.n8n_client import get_n8n_client
-			client = get_n8n_client()
-			executions = client.list_executions(self.workflow_id)
-			return executions[:limit]
-		except Exception as e:
-			frappe.log_error(f"Failed to get execution history: {str(e)}", "N8N Client Error")
-			return []
+		from lodgeick.services.execution_stats import get_execution_history
+		return get_execution_history(self.name, limit)
+
+
+def on_doctype_update():
+	"""Serve per-user integration lists filtered by status from one index"""
+	frappe.db.add_index("User Integration", ["user", "status"])
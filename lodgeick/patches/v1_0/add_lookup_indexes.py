@@ -0,0 +1,14 @@
+"""
+Add the composite and unique indexes of the hot lookup paths to existing sites
+
+New sites get them from each doctype's on_doctype_update.
+"""
+
+def execute():
+	from lodgeick.lodgeick.doctype.user_integration import user_integration
+	from lodgeick.lodgeick.doctype.integration_token import integration_token
+	from lodgeick.lodgeick.doctype.integration_log import integration_log
+	from lodgeick.lodgeick.doctype.oauth_usage_log import oauth_usage_log
+
+	for module in (user_integration, integration_token, integration_log, oauth_usage_log):
+		module.on_doctype_update()
@@ -0,0 +1,32 @@
+"""
+Keep only the newest Integration Token per (user, provider)
+
+Reconnecting a provider used to insert another token instead of updating
+the existing one. Runs before the model sync adds the unique
+(user, provider) constraint, which would fail on duplicates.
+"""
+
+import frappe
+
+
+def execute():
+	if not frappe.db.table_exists("Integration Token"):
+		return
+
+	duplicates = frappe.db.sql("""
+		SELECT user, provider
+		FROM `tabIntegration Token`
+		GROUP BY user, provider
+		HAVING COUNT(*) > 1
+	""", as_dict=True)
+
+	for row in duplicates:
+		names = frappe.get_all(
+			"Integration Token",
+			filters={"user": row.user, "provider": row.provider},
+			pluck="name",
+			order_by="modified desc"
+		)
+		# The newest token is the one in use; older ones were superseded
+		frappe.db.delete("Integration Token", {"name": ["in", names[1:]]})
+		frappe.db.delete("__Auth", {"doctype": "Integration Token", "name": ["in", names[1:]]})
@@ -0,0 +1,29 @@
+"""
+Record the workflow hash of integrations synced before hashes were stored
+
+Without a hash every existing workflow counts as drifted, so the first full
+sweep would PUT all of them to n8n. Their workflows were pushed by earlier
+syncs, so the current hash is stored without pushing anything.
+"""
+
+import frappe
+
+
+def execute():
+	from lodgeick.services.n8n_sync import get_n8n_sync_service
+	from lodgeick.tasks.n8n_sync_job import SYNC_FIELDS
+
+	sync_service = get_n8n_sync_service()
+
+	for integration in frappe.get_all(
+		"User Integration",
+		fields=SYNC_FIELDS,
+		filters={"workflow_id": ["is", "set"], "workflow_hash": ["is", "not set"]}
+	):
+		try:
+			_, workflow_hash = sync_service.build_workflow(integration)
+		except Exception:
+			# Left empty; the next sweep pushes this workflow
+			continue
+
+		sync_service.store_workflow_hash(integration, workflow_hash)
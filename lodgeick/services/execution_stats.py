@@ -0,0 +1,199 @@
+"""
+Integration Execution Stats
+Daily per-integration execution counters in the Integration Execution Stats
+doctype, so the dashboard reads one indexed aggregate instead of pulling
+execution lists from n8n on every load.
+
+Rows are written with upserts keyed on the document name
+(`{integration}-{date}`). Webhook callbacks increment today's counters as
+executions finish; after each execution ingest, recent days are overwritten
+with counts aggregated from the Integration Execution table
+(lodgeick.tasks.n8n_execution_stats), which corrects anything a callback
+missed or reported twice.
+"""
+
+import frappe
+from frappe.utils import getdate, now_datetime
+
+
+STATS_DOCTYPE = "Integration Execution Stats"
+
+_UPSERT_COLUMNS = (
+	"name", "creation", "modified", "owner", "modified_by", "docstatus", "idx",
+	"integration", "user", "date", "executions", "successes", "failures", "last_execution_at"
+)
+
+
+def get_stats_name(integration, date):
+	"""Get the document name of an integration's stats row for a day"""
+	return f"{integration}-{getdate(date)}"
+
+
+def record_execution(integration, user, success, executed_at=None):
+	"""
+	Count one finished execution towards today's stats
+
+	Args:
+		integration: User Integration name
+		user: Owner of the integration
+		success: Whether the execution succeeded
+		executed_at: Finish time (defaults to now)
+	"""
+	record_executions([(integration, user, success, executed_at or now_datetime())])
+
+
+def record_executions(executions):
+	"""
+	Count a batch of finished executions with one upsert per integration and day
+
+	Args:
+		executions: (integration, user, success, executed_at) tuples
+	"""
+	totals = {}
+	for integration, user, success, executed_at in executions:
+		row = totals.setdefault((integration, getdate(executed_at)), {
+			"integration": integration,
+			"user": user,
+			"date": getdate(executed_at),
+			"executions": 0,
+			"successes": 0,
+			"failures": 0,
+			"last_execution_at": executed_at
+		})
+		row["executions"] += 1
+		row["successes" if success else "failures"] += 1
+		row["last_execution_at"] = max(row["last_execution_at"], executed_at)
+
+	rows = list(totals.values())
+	for start in range(0, len(rows), 500):
+		_upsert(rows[start:start + 500], increment=True)
+
+
+def set_daily_stats(rows):
+	"""
+	Overwrite daily counters with authoritative totals
+
+	last_execution_at only ever moves forward, so a callback that arrived
+	after the totals were computed is kept.
+
+	Args:
+		rows: Dicts with integration, user, date, executions, successes,
+			failures and last_execution_at
+	"""
+	for start in range(0, len(rows), 500):
+		_upsert(rows[start:start + 500], increment=False)
+
+
+def _upsert(rows, increment):
+	"""Insert stats rows, adding to or replacing the counters of existing ones"""
+	if not rows:
+		return
+
+	now = now_datetime()
+
+	values = []
+	params = []
+	for row in rows:
+		values.append(f"({', '.join(['%s'] * len(_UPSERT_COLUMNS))})")
+		params.extend([
+			get_stats_name(row["integration"], row["date"]), now, now, "Administrator", "Administrator", 0, 0,
+			row["integration"], row["user"], getdate(row["date"]),
+			row["executions"], row["successes"], row["failures"], row["last_execution_at"]
+		])
+
+	if increment:
+		counters = """
+			executions = executions + VALUES(executions),
+			successes = successes + VALUES(successes),
+			failures = failures + VALUES(failures)
+		"""
+	else:
+		counters = """
+			executions = VALUES(executions),
+			successes = VALUES(successes),
+			failures = VALUES(failures)
+		"""
+
+	frappe.db.sql(f"""
+		INSERT INTO `tab{STATS_DOCTYPE}` ({', '.join(f'`{column}`' for column in _UPSERT_COLUMNS)})
+		VALUES {', '.join(values)}
+		ON DUPLICATE KEY UPDATE
+			{counters},
+			last_execution_at = GREATEST(
+				COALESCE(last_execution_at, VALUES(last_execution_at)),
+				COALESCE(VALUES(last_execution_at), last_execution_at)
+			),
+			modified = VALUES(modified)
+	""", params)
+
+
+def get_user_execution_summary(user, date=None):
+	"""
+	Get a user's executions on a day and their latest execution time
+
+	Both parts are answered from the (user, date) index.
+
+	Args:
+		user: Frappe user
+		date: Day to count (defaults to today)
+
+	Returns:
+		dict: {"executions": int, "last_execution_at": datetime or None}
+	"""
+	result = frappe.db.sql(f"""
+		SELECT
+			(SELECT COALESCE(SUM(executions), 0)
+				FROM `tab{STATS_DOCTYPE}`
+				WHERE user = %(user)s AND date = %(date)s) AS executions,
+			(SELECT MAX(last_execution_at)
+				FROM `tab{STATS_DOCTYPE}`
+				WHERE user = %(user)s
+					AND date = (SELECT MAX(date) FROM `tab{STATS_DOCTYPE}` WHERE user = %(user)s)) AS last_execution_at
+	""", {"user": user, "date": getdate(date)}, as_dict=True)[0]
+
+	return {
+		"executions": int(result.executions or 0),
+		"last_execution_at": result.last_execution_at
+	}
+
+
+def delete_integration_stats(integration):
+	"""Remove the stats and stored executions of a deleted integration"""
+	frappe.db.delete(STATS_DOCTYPE, {"integration": integration})
+	frappe.db.delete("Integration Execution", {"integration": integration})
+
+
+def get_execution_history(integration, limit=10):
+	"""
+	Get an integration's newest executions from the local execution table
+
+	Rows are returned in the shape of n8n's execution list, so callers that
+	used to read n8n directly keep working.
+
+	Args:
+		integration: User Integration name
+		limit: Maximum number of executions
+
+	Returns:
+		List of executions, newest first
+	"""
+	rows = frappe.get_all(
+		"Integration Execution",
+		fields=["execution_id", "workflow_id", "status", "mode", "started_at", "stopped_at"],
+		filters={"integration": integration},
+		order_by="started_at desc",
+		limit_page_length=limit
+	)
+
+	return [
+		{
+			"id": row.execution_id,
+			"workflowId": row.workflow_id,
+			"status": row.status,
+			"mode": row.mode,
+			"finished": row.status == "success",
+			"startedAt": row.started_at,
+			"stoppedAt": row.stopped_at
+		}
+		for row in rows
+	]
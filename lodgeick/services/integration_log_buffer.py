@@ -0,0 +1,119 @@
+"""
+Integration Log Buffer
+Collects Integration Log entries in memory for the current request or job
+and writes them with multi-row inserts, instead of one insert and one
+commit per log line.
+
+Buffered entries are written just before the transaction commits, or
+earlier once the buffer reaches FLUSH_SIZE entries or its oldest entry is
+FLUSH_INTERVAL seconds old (those rows then join the open transaction).
+Anything still buffered when a request or job ends is written and
+committed by the after_request / after_job hooks.
+
+Set `frappe.flags.integration_log_sync` (or the site config
+`integration_log_sync`) to write every entry immediately, e.g. in tests.
+"""
+
+import frappe
+import time
+from frappe.utils import now_datetime
+
+
+LOG_DOCTYPE = "Integration Log"
+
+FLUSH_SIZE = 500
+FLUSH_INTERVAL = 5
+
+_INSERT_FIELDS = (
+	"name", "creation", "modified", "owner", "modified_by",
+	"integration", "status", "message", "execution_time", "timestamp"
+)
+
+
+def is_sync():
+	"""Check if log entries should be written immediately"""
+	return bool(frappe.flags.integration_log_sync or frappe.conf.get("integration_log_sync"))
+
+
+def buffer_log(integration, status, message, execution_time=None, timestamp=None):
+	"""
+	Add a log entry to the buffer of the current request or job
+
+	Args:
+		integration: User Integration name
+		status: Log status (Success, Error, Warning, Started)
+		message: Log message
+		execution_time: Execution time in seconds (optional)
+		timestamp: Time of the event (defaults to now)
+
+	Returns:
+		str: Name the log entry will be inserted with
+	"""
+	if not integration:
+		frappe.throw("Integration is required")
+	if not status:
+		frappe.throw("Status is required")
+
+	buffer = _get_buffer()
+	if not buffer["entries"]:
+		buffer["started"] = time.monotonic()
+		# Callbacks are reset on commit and rollback, so register per batch
+		frappe.db.before_commit.add(flush_logs)
+
+	name = frappe.generate_hash(length=10)
+	now = now_datetime()
+	user = frappe.session.user if getattr(frappe.local, "session", None) else "Administrator"
+
+	buffer["entries"].append((
+		name, now, now, user, user,
+		integration, status, message, execution_time, timestamp or now
+	))
+
+	if len(buffer["entries"]) >= FLUSH_SIZE or time.monotonic() - buffer["started"] >= FLUSH_INTERVAL:
+		flush_logs()
+
+	return name
+
+
+def flush_logs():
+	"""
+	Insert all buffered entries with multi-row inserts
+
+	Does not commit; the entries become part of the open transaction.
+
+	Returns:
+		int: Number of entries written
+	"""
+	buffer = _get_buffer()
+	entries = buffer["entries"]
+	if not entries:
+		return 0
+
+	buffer["entries"] = []
+	for start in range(0, len(entries), FLUSH_SIZE):
+		frappe.db.bulk_insert(LOG_DOCTYPE, _INSERT_FIELDS, entries[start:start + FLUSH_SIZE])
+
+	return len(entries)
+
+
+def discard_logs():
+	"""Drop buffered entries, e.g. after rolling back the work they describe"""
+	_get_buffer()["entries"] = []
+
+
+def flush_and_commit(*args, **kwargs):
+	"""after_request / after_job hook: persist entries left in the buffer"""
+	if not getattr(frappe.local, "integration_log_buffer", None) or not frappe.db:
+		return
+
+	try:
+		if flush_logs():
+			frappe.db.commit()
+	except Exception:
+		frappe.log_error(frappe.get_traceback(), "Integration Log Flush Error")
+
+
+def _get_buffer():
+	if not hasattr(frappe.local, "integration_log_buffer") or frappe.local.integration_log_buffer is None:
+		frappe.local.integration_log_buffer = {"entries": [], "started": 0}
+	return frappe.local.integration_log_buffer
@@ -0,0 +1,202 @@
+"""
+Async N8N API Client for Lodgeick
+Fans out n8n calls concurrently with a bounded concurrency limit
+"""
+
+import asyncio
+import frappe
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterable, List, Optional
+from lodgeick.services.n8n_client import DEFAULT_PAGE_SIZE, N8NClient, get_n8n_client
+
+
+DEFAULT_CONCURRENCY = 8
+
+
+class AsyncN8NClient:
+	"""
+	asyncio sibling of N8NClient
+
+	Requests run on worker threads through the pooled session of the wrapped
+	N8NClient, so they share its keep-alive connections and timeouts. Nothing
+	here writes to the database; callers log failures from the main thread.
+	"""
+
+	def __init__(self, client: Optional[N8NClient] = None, concurrency: Optional[int] = None):
+		"""
+		Initialize async client
+
+		Args:
+			client: Sync client to wrap (defaults to get_n8n_client())
+			concurrency: Maximum in-flight requests for gather()
+		"""
+		self.client = client or get_n8n_client()
+		self.concurrency = int(concurrency or frappe.conf.get("n8n_max_concurrency") or DEFAULT_CONCURRENCY)
+
+	def is_enabled(self) -> bool:
+		"""Check if n8n integration is enabled"""
+		return self.client.is_enabled()
+
+	async def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, params: Optional[Dict] = None) -> Dict:
+		"""Make HTTP request to n8n API on a worker thread"""
+		return await asyncio.to_thread(self.client._send, method, endpoint, data, params)
+
+	async def _paginate(self, endpoint: str, limit: int = DEFAULT_PAGE_SIZE, filters: Optional[Dict] = None) -> AsyncIterator[Dict]:
+		"""Lazily yield items from a cursor-paginated n8n list endpoint"""
+		params = dict(filters or {})
+		params["limit"] = limit
+		cursor = None
+
+		while True:
+			params["cursor"] = cursor
+			response = await self._make_request("GET", endpoint, params=params)
+
+			for item in response.get("data", []):
+				yield item
+
+			cursor = response.get("nextCursor")
+			if not cursor:
+				break
+
+	async def gather(self, aws: Iterable[Awaitable], limit: Optional[int] = None, return_exceptions: bool = True) -> List[Any]:
+		"""
+		Await many calls with at most `limit` running at once
+
+		Args:
+			aws: Awaitables (e.g. [client.get_workflow(i) for i in ids])
+			limit: Concurrency limit (defaults to self.concurrency)
+			return_exceptions: Return exceptions in place of results instead of raising
+
+		Returns:
+			Results in the same order as `aws`
+		"""
+		semaphore = asyncio.Semaphore(limit or self.concurrency)
+
+		async def _bounded(aw):
+			async with semaphore:
+				return await aw
+
+		return await asyncio.gather(*[_bounded(aw) for aw in aws], return_exceptions=return_exceptions)
+
+	# ==================== Workflow Methods ====================
+
+	async def create_workflow(self, workflow_data: Dict) -> Dict:
+		"""Create a new workflow in n8n"""
+		return await self._make_request("POST", "/workflows", workflow_data)
+
+	async def get_workflow(self, workflow_id: str) -> Dict:
+		"""Get workflow details by ID"""
+		return await self._make_request("GET", f"/workflows/{workflow_id}")
+
+	async def update_workflow(self, workflow_id: str, workflow_data: Dict) -> Dict:
+		"""Update existing workflow"""
+		return await self._make_request("PUT", f"/workflows/{workflow_id}", workflow_data)
+
+	async def delete_workflow(self, workflow_id: str) -> Dict:
+		"""Delete workflow from n8n"""
+		return await self._make_request("DELETE", f"/workflows/{workflow_id}")
+
+	async def activate_workflow(self, workflow_id: str) -> Dict:
+		"""Activate a workflow"""
+		return await self.update_workflow(workflow_id, {"active": True})
+
+	async def deactivate_workflow(self, workflow_id: str) -> Dict:
+		"""Deactivate a workflow"""
+		return await self.update_workflow(workflow_id, {"active": False})
+
+	def iter_workflows(self, limit: int = DEFAULT_PAGE_SIZE, **filters) -> AsyncIterator[Dict]:
+		"""Iterate over all workflows, following pagination cursors"""
+		return self._paginate("/workflows", limit, filters)
+
+	async def list_workflows(self, **filters) -> List[Dict]:
+		"""List all workflows across all pages"""
+		return [workflow async for workflow in self.iter_workflows(**filters)]
+
+	# ==================== Credential Methods ====================
+
+	async def create_credential(self, credential_data: Dict) -> Dict:
+		"""Create a new credential in n8n"""
+		return await self._make_request("POST", "/credentials", credential_data)
+
+	async def get_credential(self, credential_id: str) -> Dict:
+		"""Get credential details by ID"""
+		return await self._make_request("GET", f"/credentials/{credential_id}")
+
+	async def update_credential(self, credential_id: str, credential_data: Dict) -> Dict:
+		"""Update existing credential"""
+		return await self._make_request("PUT", f"/credentials/{credential_id}", credential_data)
+
+	async def delete_credential(self, credential_id: str) -> Dict:
+		"""Delete credential from n8n"""
+		return await self._make_request("DELETE", f"/credentials/{credential_id}")
+
+	def iter_credentials(self, limit: int = DEFAULT_PAGE_SIZE, **filters) -> AsyncIterator[Dict]:
+		"""Iterate over all credentials, following pagination cursors"""
+		return self._paginate("/credentials", limit, filters)
+
+	async def list_credentials(self, **filters) -> List[Dict]:
+		"""List all credentials across all pages"""
+		return [credential async for credential in self.iter_credentials(**filters)]
+
+	# ==================== Execution Methods ====================
+
+	async def execute_workflow(self, workflow_id: str, data: Optional[Dict] = None) -> Dict:
+		"""Execute a workflow manually"""
+		return await self._make_request("POST", f"/workflows/{workflow_id}/execute", data or {})
+
+	async def get_execution(self, execution_id: str) -> Dict:
+		"""Get execution details"""
+		return await self._make_request("GET", f"/executions/{execution_id}")
+
+	def iter_executions(
+		self,
+		workflow_id: Optional[str] = None,
+		status: Optional[str] = None,
+		limit: int = DEFAULT_PAGE_SIZE,
+		**filters
+	) -> AsyncIterator[Dict]:
+		"""Iterate over executions, newest first, following pagination cursors"""
+		filters.update({
+			"workflowId": workflow_id,
+			"status": status
+		})
+		return self._paginate("/executions", limit, filters)
+
+	async def list_executions(self, workflow_id: Optional[str] = None, **filters) -> List[Dict]:
+		"""List workflow executions across all pages, optionally filtered by workflow ID"""
+		return [execution async for execution in self.iter_executions(workflow_id, **filters)]
+
+	# ==================== Node Resource Discovery ====================
+
+	async def get_node_types(self) -> List[Dict]:
+		"""Get available node types in n8n"""
+		return await self._make_request("GET", "/node-types")
+
+	async def get_node_type(self, node_name: str) -> Dict:
+		"""Get specific node type definition with all its properties"""
+		return await self._make_request("GET", f"/node-types/{node_name}")
+
+
+def get_async_n8n_client(concurrency: Optional[int] = None) -> AsyncN8NClient:
+	"""
+	Get an async client wrapping the request's N8NClient
+
+	Args:
+		concurrency: Optional override for the gather() concurrency limit
+
+	Returns:
+		AsyncN8NClient instance
+	"""
+	return AsyncN8NClient(get_n8n_client(), concurrency)
+
+
+def run_async(coro: Awaitable) -> Any:
+	"""
+	Run a coroutine to completion from synchronous Frappe code
+
+	Args:
+		coro: Coroutine to run
+
+	Returns:
+		Coroutine result
+	"""
+	return asyncio.run(coro)
@@ -2,38 +2,79 @@
 n8n Node Cache Service
 
 Caches n8n node types and definitions to reduce API calls.
-Cache expires after 24 hours.
+Entries live in a tiered cache (in-process LRU + Redis) and expire after
+24 hours, with a stale window during which the old value is served while
+a background job refreshes it. The n8n Cache doctype is only used as an
+optional cold store (site config `n8n_cache_cold_store`).
 """
 
 import frappe
+import threading
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import json
+from lodgeick.services.tiered_cache import TieredCache
 
 
 CACHE_DURATION_HOURS = 24
+STALE_DURATION_HOURS = 1
+MAX_LOCAL_ENTRIES = 256
+
+# Single-flight loading of node definitions
+LOAD_LOCK_SECONDS = 30
+LOAD_WAIT_SECONDS = 10
+LOAD_POLL_INTERVAL = 0.1
+LOADER_COUNTERS = ("hits", "misses", "coalesced")
+
+_inflight: Dict[str, threading.Event] = {}
+_inflight_lock = threading.Lock()
+
+node_cache = TieredCache(
+	"n8n_nodes",
+	maxsize=MAX_LOCAL_ENTRIES,
+	ttl=CACHE_DURATION_HOURS * 3600,
+	stale_ttl=STALE_DURATION_HOURS * 3600,
+	revalidate="lodgeick.services.n8n_cache.revalidate"
+)
+
+
+def _use_cold_store() -> bool:
+	"""Check if entries should also be persisted to the n8n Cache doctype"""
+	return bool(frappe.conf.get("n8n_cache_cold_store", False))
+
+
+def _get(cache_key: str):
+	"""Read from the tiered cache, falling back to the cold store"""
+	value = node_cache.get(cache_key)
+	if value is not None:
+		return value
+
+	if not _use_cold_store():
+		return None
+
+	value = _get_cold(cache_key)
+	if value is not None:
+		# Promote to the hot tiers so later reads skip the database
+		node_cache.set(cache_key, value)
+	return value
+
+
+def _set(cache_key: str, value):
+	"""Write to the tiered cache and, if enabled, the cold store"""
+	node_cache.set(cache_key, value)
+
+	if _use_cold_store():
+		_set_cold(cache_key, value)
 
 
 def get_cached_node_types() -> Optional[List[Dict]]:
 	"""
-	Get cached node types from database
+	Get cached node types
 	Returns None if cache is expired or doesn't exist
 	"""
 	try:
-		cache_doc = frappe.get_doc("n8n Cache", "node_types")
-
-		# Check if cache is expired
-		if cache_doc.expires_at and cache_doc.expires_at < datetime.now():
-			frappe.logger().info("n8n node types cache expired")
-			return None
-
-		# Parse and return cached data
-		if cache_doc.data:
-			return json.loads(cache_doc.data)
-
-		return None
-	except frappe.DoesNotExistError:
-		return None
+		return _get("node_types")
 	except Exception as e:
 		frappe.logger().error(f"Error reading n8n cache: {str(e)[:200]}")
 		return None
@@ -41,96 +82,216 @@ def get_cached_node_types() -> Optional[List[Dict]]:
 
 def set_cached_node_types(node_types: List[Dict]):
 	"""
-	Cache node types in database with 24hr expiry
+	Cache node types with 24hr expiry
 	"""
 	try:
-		expires_at = datetime.now() + timedelta(hours=CACHE_DURATION_HOURS)
-
-		try:
-			# Update existing cache
-			cache_doc = frappe.get_doc("n8n Cache", "node_types")
-			cache_doc.data = json.dumps(node_types)
-			cache_doc.expires_at = expires_at
-			cache_doc.save(ignore_permissions=True)
-		except frappe.DoesNotExistError:
-			# Create new cache entry
-			cache_doc = frappe.get_doc({
-				"doctype": "n8n Cache",
-				"name": "node_types",
-				"cache_key": "node_types",
-				"data": json.dumps(node_types),
-				"expires_at": expires_at
-			})
-			cache_doc.insert(ignore_permissions=True)
-
-		frappe.db.commit()
-		frappe.logger().info(f"Cached {len(node_types)} n8n node types until {expires_at}")
+		_set("node_types", node_types)
+		frappe.logger().info(f"Cached {len(node_types)} n8n node types for {CACHE_DURATION_HOURS}h")
 	except Exception as e:
 		frappe.logger().error(f"Error caching n8n node types: {str(e)[:200]}")
 
 
 def get_cached_node_definition(node_name: str) -> Optional[Dict]:
 	"""
-	Get cached node definition from database
+	Get cached node definition
 	Returns None if cache is expired or doesn't exist
 	"""
 	try:
-		cache_key = f"node_def_{node_name}"
-		cache_doc = frappe.get_doc("n8n Cache", cache_key)
+		return _get(f"node_def_{node_name}")
+	except Exception as e:
+		frappe.logger().error(f"Error reading n8n cache for {node_name}: {str(e)[:200]}")
+		return None
 
-		# Check if cache is expired
-		if cache_doc.expires_at and cache_doc.expires_at < datetime.now():
-			frappe.logger().info(f"n8n node definition cache expired for {node_name}")
-			return None
 
-		# Parse and return cached data
-		if cache_doc.data:
-			return json.loads(cache_doc.data)
+def set_cached_node_definition(node_name: str, node_def: Dict):
+	"""
+	Cache node definition with 24hr expiry
+	"""
+	try:
+		_set(f"node_def_{node_name}", node_def)
+		frappe.logger().info(f"Cached n8n node definition for {node_name} for {CACHE_DURATION_HOURS}h")
+	except Exception as e:
+		frappe.logger().error(f"Error caching n8n node definition for {node_name}: {str(e)[:200]}")
 
-		return None
-	except frappe.DoesNotExistError:
-		return None
+
+def set_cached_node_catalog(node_name: str, catalog: Dict):
+	"""
+	Cache a compiled node catalog with 24hr expiry
+	"""
+	try:
+		_set(f"node_catalog_{node_name}", catalog)
+		frappe.logger().info(f"Cached n8n node catalog for {node_name} for {CACHE_DURATION_HOURS}h")
 	except Exception as e:
-		frappe.logger().error(f"Error reading n8n cache for {node_name}: {str(e)[:200]}")
+		frappe.logger().error(f"Error caching n8n node catalog for {node_name}: {str(e)[:200]}")
+
+
+def get_cache_ttl(cache_key: str) -> Optional[float]:
+	"""
+	Get the seconds left before a cached entry goes stale
+
+	Returns:
+		Remaining freshness (negative once stale), or None if not cached
+	"""
+	try:
+		return node_cache.get_ttl(cache_key)
+	except Exception as e:
+		frappe.logger().error(f"Error reading n8n cache TTL for {cache_key}: {str(e)[:200]}")
 		return None
 
 
-def set_cached_node_definition(node_name: str, node_def: Dict):
+def load_single_flight(cache_key: str, fetch) -> Optional[Dict]:
 	"""
-	Cache node definition in database with 24hr expiry
+	Get a cached value, calling `fetch` on a miss with single-flight semantics
+
+	Concurrent misses for the same key are coalesced: within a process,
+	followers wait on the leader's fetch; across processes, a Redis lock
+	lets a single worker fetch while the rest poll the cache.
+
+	Args:
+		cache_key: Key in the node cache (e.g., 'node_catalog_<node type>')
+		fetch: Callable returning the value to cache, or None to skip caching
+
+	Returns:
+		Cached or freshly fetched value (None if fetch returned None)
 	"""
+	value = _get(cache_key)
+	if value is not None:
+		_incr_loader_counter("hits")
+		return value
+
+	local_key = f"{getattr(frappe.local, 'site', '')}:{cache_key}"
+
+	with _inflight_lock:
+		event = _inflight.get(local_key)
+		is_leader = event is None
+		if is_leader:
+			event = _inflight[local_key] = threading.Event()
+
+	if not is_leader:
+		_incr_loader_counter("coalesced")
+		event.wait(LOAD_WAIT_SECONDS)
+		value = _get(cache_key)
+		if value is not None:
+			return value
+		# Leader failed or timed out - fetch ourselves
+		return _fetch_and_cache(cache_key, fetch)
+
 	try:
-		cache_key = f"node_def_{node_name}"
-		expires_at = datetime.now() + timedelta(hours=CACHE_DURATION_HOURS)
+		if _acquire_load_lock(cache_key):
+			try:
+				return _fetch_and_cache(cache_key, fetch)
+			finally:
+				_release_load_lock(cache_key)
 
-		try:
-			# Update existing cache
-			cache_doc = frappe.get_doc("n8n Cache", cache_key)
-			cache_doc.data = json.dumps(node_def)
-			cache_doc.expires_at = expires_at
-			cache_doc.save(ignore_permissions=True)
-		except frappe.DoesNotExistError:
-			# Create new cache entry
-			cache_doc = frappe.get_doc({
-				"doctype": "n8n Cache",
-				"name": cache_key,
-				"cache_key": cache_key,
-				"data": json.dumps(node_def),
-				"expires_at": expires_at
-			})
-			cache_doc.insert(ignore_permissions=True)
+		# Another process is fetching it
+		_incr_loader_counter("coalesced")
+		value = _wait_for_cache_key(cache_key)
+		return value if value is not None else _fetch_and_cache(cache_key, fetch)
+	finally:
+		with _inflight_lock:
+			_inflight.pop(local_key, None)
+		event.set()
 
-		frappe.db.commit()
-		frappe.logger().info(f"Cached n8n node definition for {node_name} until {expires_at}")
+
+def _fetch_and_cache(cache_key: str, fetch) -> Optional[Dict]:
+	"""Call the loader's fetch function and cache a non-empty result"""
+	value = fetch()
+	if value is None:
+		return None
+
+	_incr_loader_counter("misses")
+	try:
+		_set(cache_key, value)
 	except Exception as e:
-		frappe.logger().error(f"Error caching n8n node definition for {node_name}: {str(e)[:200]}")
+		frappe.logger().error(f"Error caching n8n {cache_key}: {str(e)[:200]}")
+	return value
+
+
+def _wait_for_cache_key(cache_key: str) -> Optional[Dict]:
+	"""Poll the cache while another process fetches a value"""
+	deadline = time.monotonic() + LOAD_WAIT_SECONDS
+	while time.monotonic() < deadline:
+		time.sleep(LOAD_POLL_INTERVAL)
+		value = _get(cache_key)
+		if value is not None:
+			return value
+	return None
+
+
+def _acquire_load_lock(cache_key: str) -> bool:
+	"""Try to become the one process fetching a value"""
+	cache = frappe.cache()
+	try:
+		return bool(cache.set(cache.make_key(f"n8n_cache_loading:{cache_key}"), 1, nx=True, ex=LOAD_LOCK_SECONDS))
+	except Exception:
+		# Redis unavailable - don't block the request on coalescing
+		return True
+
+
+def _release_load_lock(cache_key: str):
+	"""Release the cross-process fetch lock"""
+	cache = frappe.cache()
+	try:
+		cache.delete(cache.make_key(f"n8n_cache_loading:{cache_key}"))
+	except Exception:
+		pass
+
+
+def _incr_loader_counter(counter: str):
+	"""Increment a site-wide loader counter in Redis"""
+	cache = frappe.cache()
+	try:
+		cache.incr(cache.make_key(f"n8n_cache_loader:{counter}"))
+	except Exception:
+		pass
+
+
+def get_loader_stats() -> Dict:
+	"""Get site-wide hit, miss and coalesced counts for single-flight loading"""
+	cache = frappe.cache()
+	stats = {}
+	for counter in LOADER_COUNTERS:
+		try:
+			stats[counter] = int(cache.get(cache.make_key(f"n8n_cache_loader:{counter}")) or 0)
+		except Exception:
+			stats[counter] = 0
+	return stats
+
+
+def revalidate(key: str):
+	"""
+	Background job: refresh a stale cache entry from n8n
+
+	Args:
+		key: Cache key ('node_types', 'node_def_<node type>' or 'node_catalog_<node type>')
+	"""
+	from lodgeick.services.n8n_client import get_n8n_client
+
+	n8n = get_n8n_client()
+	if not n8n.is_enabled():
+		return
+
+	if key == "node_types":
+		from lodgeick.api.resources import extract_apps_from_nodes
+		set_cached_node_types(extract_apps_from_nodes(n8n.get_node_types()))
+	elif key.startswith("node_def_"):
+		node_name = key[len("node_def_"):]
+		set_cached_node_definition(node_name, n8n.get_node_type(node_name))
+	elif key.startswith("node_catalog_"):
+		from lodgeick.services.n8n_catalog import compile_node_catalog
+		node_name = key[len("node_catalog_"):]
+		set_cached_node_catalog(node_name, compile_node_catalog(n8n.get_node_type(node_name)))
 
 
 def clear_cache():
 	"""Clear all n8n cache entries"""
 	try:
-		frappe.db.delete("n8n Cache")
-		frappe.db.commit()
+		node_cache.invalidate()
+
+		if frappe.db.count("n8n Cache"):
+			frappe.db.delete("n8n Cache")
+			frappe.db.commit()
+
 		frappe.logger().info("Cleared all n8n cache")
 	except Exception as e:
 		frappe.logger().error(f"Error clearing n8n cache: {str(e)[:200]}")
@@ -138,16 +299,65 @@ def clear_cache():
 
 def get_cache_stats() -> Dict:
 	"""Get cache statistics"""
+	stats = {"tiers": node_cache.stats(), "loader": get_loader_stats()}
+
 	try:
 		total = frappe.db.count("n8n Cache")
 		expired = frappe.db.count("n8n Cache", {"expires_at": ["<", datetime.now()]})
 		valid = total - expired
 
-		return {
+		stats.update({
 			"total": total,
 			"valid": valid,
 			"expired": expired
-		}
+		})
 	except Exception as e:
 		frappe.logger().error(f"Error getting cache stats: {str(e)[:200]}")
-		return {"total": 0, "valid": 0, "expired": 0}
+		stats.update({"total": 0, "valid": 0, "expired": 0})
+
+	return stats
+
+
+# ==================== Cold Store (n8n Cache doctype) ====================
+
+def _get_cold(cache_key: str):
+	"""Read an unexpired entry from the n8n Cache doctype"""
+	try:
+		row = frappe.db.get_value("n8n Cache", cache_key, ["data", "expires_at"], as_dict=True)
+
+		if not row or not row.data:
+			return None
+
+		# Check if cache is expired
+		if row.expires_at and row.expires_at < datetime.now():
+			frappe.logger().info(f"n8n cold cache expired for {cache_key}")
+			return None
+
+		return json.loads(row.data)
+	except Exception as e:
+		frappe.logger().error(f"Error reading n8n cold cache for {cache_key}: {str(e)[:200]}")
+		return None
+
+
+def _set_cold(cache_key: str, value):
+	"""Persist an entry to the n8n Cache doctype"""
+	try:
+		expires_at = datetime.now() + timedelta(hours=CACHE_DURATION_HOURS)
+
+		if frappe.db.exists("n8n Cache", cache_key):
+			frappe.db.set_value("n8n Cache", cache_key, {
+				"data": json.dumps(value),
+				"expires_at": expires_at
+			})
+		else:
+			frappe.get_doc({
+				"doctype": "n8n Cache",
+				"name": cache_key,
+				"cache_key": cache_key,
+				"data": json.dumps(value),
+				"expires_at": expires_at
+			}).insert(ignore_permissions=True)
+
+		frappe.db.commit()
+	except Exception as e:
+		frappe.logger().error(f"Error writing n8n cold cache for {cache_key}: {str(e)[:200]}")
@@ -0,0 +1,180 @@
+"""
+n8n Node Catalog
+
+Compiles an n8n node definition into a compact index of resources,
+operations per resource and fields per operation. The compiled catalog is
+what gets cached, so resource and operation lookups are dictionary reads
+instead of scans over the definition's `properties` array.
+"""
+
+from typing import Dict, List, Optional
+from lodgeick.services.n8n_cache import load_single_flight
+
+
+CATALOG_VERSION = 1
+
+
+def compile_node_catalog(node_def: Dict) -> Dict:
+	"""
+	Index a node definition once
+
+	Mirrors the lookup rules of the original linear scans: the resource
+	list comes from the first `resource` parameter, and a resource's
+	operations come from the first `operation` parameter whose
+	displayOptions match it (an unfiltered one matches every resource).
+
+	Args:
+		node_def: n8n node type definition
+
+	Returns:
+		{
+			"node_type": str,
+			"resources": list or None,
+			"operations": {resource_id: list or None},
+			"default_operations": list or None,
+			"fields": {resource_id: {operation_id: list}}
+		}
+	"""
+	properties = node_def.get("properties", []) or []
+
+	resources = None
+	resource_found = False
+	operations = {}
+	default_operations = None
+	default_found = False
+	fields = {}
+
+	for prop in properties:
+		name = prop.get("name")
+		show = (prop.get("displayOptions") or {}).get("show", {}) or {}
+
+		if not resource_found and (name == "resource" or prop.get("displayName") == "Resource"):
+			resource_found = True
+			if "options" in prop:
+				resources = [_compile_resource(option) for option in prop.get("options", [])]
+			continue
+
+		if name == "operation":
+			compiled = None
+			if "options" in prop:
+				compiled = [_compile_operation(option) for option in prop.get("options", [])]
+
+			# Once an unfiltered operation param is seen, it matches every
+			# resource that hasn't matched yet, so later params never win
+			if default_found:
+				continue
+
+			if "resource" in show:
+				for resource_id in show["resource"]:
+					operations.setdefault(resource_id, compiled)
+			else:
+				default_operations = compiled
+				default_found = True
+			continue
+
+		if name == "resource":
+			continue
+
+		# Remaining params are fields, indexed by resource and operation
+		for resource_id in show.get("resource", ["*"]):
+			for operation_id in show.get("operation", ["*"]):
+				fields.setdefault(resource_id, {}).setdefault(operation_id, []).append(_compile_field(prop))
+
+	return {
+		"version": CATALOG_VERSION,
+		"node_type": node_def.get("name"),
+		"resources": resources,
+		"operations": operations,
+		"default_operations": default_operations,
+		"fields": fields
+	}
+
+
+def _compile_resource(option: Dict) -> Dict:
+	return {
+		"id": option.get("value", option.get("name", "")),
+		"name": option.get("name", option.get("value", "")),
+		"type": "resource",
+		"description": option.get("description", "")
+	}
+
+
+def _compile_operation(option: Dict) -> Dict:
+	return {
+		"id": option.get("value", option.get("name", "")),
+		"name": option.get("name", option.get("value", "")),
+		"description": option.get("description", ""),
+		"action": option.get("action", "")
+	}
+
+
+def _compile_field(prop: Dict) -> Dict:
+	return {
+		"id": prop.get("name"),
+		"name": prop.get("displayName", prop.get("name")),
+		"type": prop.get("type"),
+		"required": bool(prop.get("required")),
+		"description": prop.get("description", "")
+	}
+
+
+def get_catalog_resources(catalog: Dict) -> Optional[List[Dict]]:
+	"""
+	Get the resources of a compiled catalog
+
+	Returns:
+		Resource list, or None if the node has no resource parameter
+	"""
+	return catalog.get("resources")
+
+
+def get_catalog_operations(catalog: Dict, resource_id: str) -> Optional[List[Dict]]:
+	"""
+	Get the operations available for a resource
+
+	Returns:
+		Operation list, or None if no operation parameter matches
+	"""
+	operations = catalog.get("operations", {})
+	if resource_id in operations:
+		return operations[resource_id]
+	return catalog.get("default_operations")
+
+
+def get_catalog_fields(catalog: Dict, resource_id: str, operation_id: str) -> List[Dict]:
+	"""
+	Get the parameters shown for a resource/operation pair
+
+	Returns:
+		Field list (parameters without displayOptions are included for every pair)
+	"""
+	fields = catalog.get("fields", {})
+	result = []
+	for resource_key in (resource_id, "*"):
+		for operation_key in (operation_id, "*"):
+			result.extend(fields.get(resource_key, {}).get(operation_key, []))
+	return result
+
+
+def load_node_catalog(node_name: str) -> Optional[Dict]:
+	"""
+	Get the compiled catalog for a node type
+
+	Served from the node cache; on a miss the definition is fetched from
+	n8n once (single-flight) and compiled before caching.
+
+	Args:
+		node_name: Node type name (e.g., 'n8n-nodes-base.gmail')
+
+	Returns:
+		Compiled catalog, or None if n8n is not enabled
+	"""
+	def fetch():
+		from lodgeick.services.n8n_client import get_n8n_client
+
+		n8n = get_n8n_client()
+		if not n8n.is_enabled():
+			return None
+		return compile_node_catalog(n8n.get_node_type(node_name))
+
+	return load_single_flight(f"node_catalog_{node_name}", fetch)
@@ -6,8 +6,76 @@ Manages workflows and credentials in n8n automation platform
 import frappe
 import requests
 import json
-from typing import Dict, List, Optional, Any
+import threading
+import time
+from requests.adapters import HTTPAdapter
+from typing import Dict, Iterator, List, Optional, Any, Tuple
 from frappe import _
+from lodgeick.services.n8n_resilience import RetryPolicy, get_circuit_breaker
+
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 30
+DEFAULT_PAGE_SIZE = 100
+
+# Sessions are shared by every N8NClient in the worker process, keyed by
+# (base_url, pool_size), so keep-alive connections survive across requests
+_sessions: Dict[Tuple[str, int], requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_http_session(base_url: str, pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+	"""
+	Get the process-wide pooled HTTP session for an n8n instance
+
+	Args:
+		base_url: n8n base URL
+		pool_size: Maximum number of keep-alive connections to the host
+
+	Returns:
+		requests.Session with a pooled HTTPAdapter mounted
+	"""
+	key = (base_url, pool_size)
+	session = _sessions.get(key)
+	if session is not None:
+		return session
+
+	with _sessions_lock:
+		session = _sessions.get(key)
+		if session is None:
+			session = requests.Session()
+			# Retries are handled by the client, not urllib3
+			adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+			session.mount("http://", adapter)
+			session.mount("https://", adapter)
+			session.headers.update({"Connection": "keep-alive"})
+			_sessions[key] = session
+
+	return session
+
+
+def close_http_sessions():
+	"""Close all pooled n8n sessions in this process (e.g. on worker shutdown)"""
+	with _sessions_lock:
+		for session in _sessions.values():
+			session.close()
+		_sessions.clear()
+
+
+class N8NAPIError(Exception):
+	"""Raised when a request to the n8n API fails"""
+	pass
+
+
+class N8NCircuitOpenError(N8NAPIError):
+	"""Raised without contacting n8n while the circuit breaker is open"""
+	pass
+
+
+class N8NNotFoundError(N8NAPIError):
+	"""Raised when n8n responds 404 (e.g., a workflow or credential was deleted in n8n)"""
+	pass
 
 
 class N8NClient:
@@ -19,6 +87,17 @@ class N8NClient:
 		self.api_key = frappe.conf.get("n8n_api_key")
 		self.enabled = bool(self.api_key)
 
+		# Separate connect and read timeouts so a dead host fails fast
+		self.timeout = (
+			float(frappe.conf.get("n8n_connect_timeout") or DEFAULT_CONNECT_TIMEOUT),
+			float(frappe.conf.get("n8n_read_timeout") or DEFAULT_READ_TIMEOUT)
+		)
+		self.pool_size = int(frappe.conf.get("n8n_pool_size") or DEFAULT_POOL_SIZE)
+		self.session = get_http_session(self.base_url, self.pool_size)
+
+		self.retry_policy = RetryPolicy.from_conf()
+		self.circuit_breaker = get_circuit_breaker(self.base_url)
+
 		if not self.api_key:
 			frappe.logger().warning("n8n API key not configured - n8n integration disabled")
 
@@ -32,7 +111,7 @@ class N8NClient:
 		"""Check if n8n integration is enabled"""
 		return self.enabled
 
-	def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None) -> Dict:
+	def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, params: Optional[Dict] = None) -> Dict:
 		"""
 		Make HTTP request to n8n API
 
@@ -40,28 +119,90 @@ class N8NClient:
 			method: HTTP method (GET, POST, PUT, DELETE)
 			endpoint: API endpoint (e.g., '/workflows')
 			data: Request payload
+			params: Query string parameters (None values are dropped)
 
 		Returns:
 			Response data as dictionary
 
 		Raises:
-			Exception: If request fails
+			N8NCircuitOpenError: If n8n is known to be down
+			N8NAPIError: If request fails
+		"""
+		try:
+			return self._send(method, endpoint, data, params)
+		except N8NCircuitOpenError as e:
+			# Don't write an Error Log row per call while n8n is down
+			frappe.logger().warning(str(e))
+			raise
+		except N8NAPIError as e:
+			frappe.log_error(str(e), "N8N API Error")
+			raise
+
+	def _send(self, method: str, endpoint: str, data: Optional[Dict] = None, params: Optional[Dict] = None) -> Dict:
+		"""
+		Send a request to n8n without touching the database
+
+		Idempotent requests are retried on transient failures according to
+		self.retry_policy, and every attempt goes through the circuit breaker.
+		Safe to call from worker threads (see AsyncN8NClient); callers are
+		responsible for logging failures.
+
+		Raises:
+			N8NCircuitOpenError: If n8n is known to be down
+			N8NAPIError: If request fails
 		"""
 		url = f"{self.base_url}/api/v1{endpoint}"
 
-		try:
-			if method == "GET":
-				response = requests.get(url, headers=self.headers, timeout=30)
-			elif method == "POST":
-				response = requests.post(url, headers=self.headers, json=data, timeout=30)
-			elif method == "PUT":
-				response = requests.put(url, headers=self.headers, json=data, timeout=30)
-			elif method == "DELETE":
-				response = requests.delete(url, headers=self.headers, timeout=30)
+		if method not in ("GET", "POST", "PUT", "DELETE"):
+			raise ValueError(f"Unsupported HTTP method: {method}")
+
+		attempt = 0
+
+		while True:
+			if not self.circuit_breaker.allow_request():
+				raise N8NCircuitOpenError(f"n8n circuit breaker is open, skipping {method} {endpoint}")
+
+			try:
+				response = self.session.request(
+					method,
+					url,
+					headers=self.headers,
+					json=data if method in ("POST", "PUT") else None,
+					params={k: v for k, v in (params or {}).items() if v is not None},
+					timeout=self.timeout
+				)
+			except requests.exceptions.RequestException as e:
+				# Connection errors and timeouts
+				self.circuit_breaker.record_failure()
+				if self.retry_policy.should_retry(method, attempt):
+					time.sleep(self.retry_policy.get_delay(attempt))
+					attempt += 1
+					continue
+				raise N8NAPIError(f"n8n API request failed: {str(e)}")
+
+			if response.status_code >= 500:
+				self.circuit_breaker.record_failure()
 			else:
-				raise ValueError(f"Unsupported HTTP method: {method}")
-
-			response.raise_for_status()
+				self.circuit_breaker.record_success()
+
+			if self.retry_policy.should_retry(method, attempt, response.status_code):
+				time.sleep(self.retry_policy.get_delay(attempt, response.headers.get("Retry-After")))
+				attempt += 1
+				continue
+
+			try:
+				response.raise_for_status()
+			except requests.exceptions.RequestException as e:
+				error_msg = f"n8n API request failed: {str(e)}"
+				# Try to get response body for more details
+				try:
+					error_detail = response.json()
+					error_msg += f"\nResponse: {json.dumps(error_detail, indent=2)}"
+				except:
+					error_msg += f"\nResponse text: {response.text[:500]}"
+				if response.status_code == 404:
+					raise N8NNotFoundError(error_msg)
+				raise N8NAPIError(error_msg)
 
 			# n8n returns empty body for DELETE
 			if method == "DELETE":
@@ -69,17 +210,35 @@ class N8NClient:
 
 			return response.json()
 
-		except requests.exceptions.RequestException as e:
-			error_msg = f"n8n API request failed: {str(e)}"
-			# Try to get response body for more details
-			if hasattr(e, 'response') and e.response is not None:
-				try:
-					error_detail = e.response.json()
-					error_msg += f"\nResponse: {json.dumps(error_detail, indent=2)}"
-				except:
-					error_msg += f"\nResponse text: {e.response.text[:500]}"
-			frappe.log_error(error_msg, "N8N API Error")
-			raise Exception(error_msg)
+	def _paginate(self, endpoint: str, limit: int = DEFAULT_PAGE_SIZE, filters: Optional[Dict] = None) -> Iterator[Dict]:
+		"""
+		Lazily yield items from a cursor-paginated n8n list endpoint
+
+		Follows `nextCursor` until n8n reports no further pages, fetching
+		one page at a time.
+
+		Args:
+			endpoint: List endpoint (e.g., '/executions')
+			limit: Page size requested from n8n
+			filters: Server-side filters passed through as query parameters
+
+		Yields:
+			Items from each page's `data` array
+		"""
+		params = dict(filters or {})
+		params["limit"] = limit
+		cursor = None
+
+		while True:
+			params["cursor"] = cursor
+			response = self._make_request("GET", endpoint, params=params)
+
+			for item in response.get("data", []):
+				yield item
+
+			cursor = response.get("nextCursor")
+			if not cursor:
+				break
 
 	# ==================== Workflow Methods ====================
 
@@ -158,15 +317,30 @@ class N8NClient:
 		# Only send the active field to avoid "additional properties" error
 		return self.update_workflow(workflow_id, {"active": False})
 
-	def list_workflows(self) -> List[Dict]:
+	def iter_workflows(self, limit: int = DEFAULT_PAGE_SIZE, **filters) -> Iterator[Dict]:
+		"""
+		Iterate over all workflows, following pagination cursors
+
+		Args:
+			limit: Page size
+			**filters: Server-side filters (e.g., active, tags, name)
+
+		Yields:
+			Workflows
+		"""
+		return self._paginate("/workflows", limit, filters)
+
+	def list_workflows(self, **filters) -> List[Dict]:
 		"""
 		List all workflows
 
+		Args:
+			**filters: Server-side filters (e.g., active, tags, name)
+
 		Returns:
-			List of workflows
+			List of workflows across all pages
 		"""
-		response = self._make_request("GET", "/workflows")
-		return response.get("data", [])
+		return list(self.iter_workflows(**filters))
 
 	# ==================== Credential Methods ====================
 
@@ -219,15 +393,27 @@ class N8NClient:
 		"""
 		return self._make_request("DELETE", f"/credentials/{credential_id}")
 
-	def list_credentials(self) -> List[Dict]:
+	def iter_credentials(self, limit: int = DEFAULT_PAGE_SIZE, **filters) -> Iterator[Dict]:
+		"""
+		Iterate over all credentials, following pagination cursors
+
+		Args:
+			limit: Page size
+			**filters: Server-side filters
+
+		Yields:
+			Credentials
+		"""
+		return self._paginate("/credentials", limit, filters)
+
+	def list_credentials(self, **filters) -> List[Dict]:
 		"""
 		List all credentials
 
 		Returns:
-			List of credentials
+			List of credentials across all pages
 		"""
-		response = self._make_request("GET", "/credentials")
-		return response.get("data", [])
+		return list(self.iter_credentials(**filters))
 
 	# ==================== Execution Methods ====================
 
@@ -257,21 +443,43 @@ class N8NClient:
 		"""
 		return self._make_request("GET", f"/executions/{execution_id}")
 
-	def list_executions(self, workflow_id: Optional[str] = None) -> List[Dict]:
+	def iter_executions(
+		self,
+		workflow_id: Optional[str] = None,
+		status: Optional[str] = None,
+		limit: int = DEFAULT_PAGE_SIZE,
+		**filters
+	) -> Iterator[Dict]:
+		"""
+		Iterate over executions, newest first, following pagination cursors
+
+		Args:
+			workflow_id: Optional workflow ID to filter by
+			status: Optional status filter (success, error, waiting, ...)
+			limit: Page size
+			**filters: Additional server-side filters
+
+		Yields:
+			Executions
+		"""
+		filters.update({
+			"workflowId": workflow_id,
+			"status": status
+		})
+		return self._paginate("/executions", limit, filters)
+
+	def list_executions(self, workflow_id: Optional[str] = None, **filters) -> List[Dict]:
 		"""
 		List workflow executions
 
 		Args:
 			workflow_id: Optional workflow ID to filter by
+			**filters: Server-side filters accepted by iter_executions()
 
 		Returns:
-			List of executions
+			List of executions across all pages
 		"""
-		endpoint = "/executions"
-		if workflow_id:
-			endpoint += f"?workflowId={workflow_id}"
-		response = self._make_request("GET", endpoint)
-		return response.get("data", [])
+		return list(self.iter_executions(workflow_id, **filters))
 
 	# ==================== Node Resource Discovery ====================
 
@@ -328,6 +536,9 @@ def get_n8n_client() -> N8NClient:
 	"""
 	Get singleton instance of N8N client
 
+	The client itself is cheap and re-reads site config per request; the
+	underlying connection pool is shared process-wide via get_http_session().
+
 	Returns:
 		N8NClient instance
 	"""
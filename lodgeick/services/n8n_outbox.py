@@ -0,0 +1,261 @@
+"""
+N8N Sync Outbox
+User Integration hooks record pending n8n operations in the n8n Sync Outbox
+doctype, in the same transaction as the change itself. A background worker
+drains the outbox after commit, so API requests never wait on n8n and a slow
+n8n never holds a database transaction open.
+"""
+
+import frappe
+import time
+from datetime import timedelta
+from frappe.utils import now_datetime
+from lodgeick.services.n8n_client import N8NCircuitOpenError
+
+
+DRAIN_JOB_ID = "n8n_sync_outbox_drain"
+DRAIN_LOCK_KEY = "n8n_sync_outbox:drain_lock"
+DRAIN_LOCK_SECONDS = 600
+DRAIN_TIME_BUDGET = 240
+DRAIN_BATCH_SIZE = 200
+
+MAX_ATTEMPTS = 8
+RETRY_BACKOFF_BASE = 30
+RETRY_BACKOFF_MAX = 3600
+
+
+def enqueue_integration_sync(integration_doc, operation):
+	"""
+	Record a pending n8n operation and schedule a drain after commit
+
+	Args:
+		integration_doc: User Integration document
+		operation: "create", "update", "status" or "delete"
+	"""
+	frappe.get_doc({
+		"doctype": "n8n Sync Outbox",
+		"integration": integration_doc.name,
+		"operation": operation,
+		# Kept for deletes, when the integration row is gone by drain time
+		"workflow_id": integration_doc.workflow_id,
+		"status": "Pending",
+		"next_attempt_at": now_datetime()
+	}).insert(ignore_permissions=True)
+
+	schedule_drain(enqueue_after_commit=True)
+
+
+def schedule_drain(enqueue_after_commit=False):
+	"""Enqueue the outbox drain job unless one is already queued"""
+	frappe.enqueue(
+		"lodgeick.services.n8n_outbox.drain_outbox",
+		queue="short",
+		job_id=DRAIN_JOB_ID,
+		deduplicate=True,
+		enqueue_after_commit=enqueue_after_commit
+	)
+
+
+def drain_outbox():
+	"""
+	Background job: apply pending outbox operations to n8n
+
+	Operations are processed per integration in creation order and collapsed
+	first (a delete supersedes everything before it, a create covers later
+	updates). An integration with a failed operation waiting to be retried
+	is skipped, so its later operations never overtake it. One drainer runs
+	per site at a time.
+
+	Returns:
+		dict: Counts of applied, retried and failed operations
+	"""
+	cache = frappe.cache()
+	lock_key = cache.make_key(DRAIN_LOCK_KEY)
+	if not cache.set(lock_key, 1, nx=True, ex=DRAIN_LOCK_SECONDS):
+		return {"success": True, "skipped": "drain already running"}
+
+	from lodgeick.services.n8n_sync import get_n8n_sync_service
+
+	sync_service = get_n8n_sync_service()
+	summary = {"applied": 0, "retried": 0, "failed": 0}
+	deadline = time.monotonic() + DRAIN_TIME_BUDGET
+
+	try:
+		while time.monotonic() < deadline:
+			groups = _get_due_groups()
+			if not groups:
+				break
+
+			for integration, rows in groups.items():
+				try:
+					_apply(sync_service, integration, rows)
+					frappe.db.delete("n8n Sync Outbox", {"name": ["in", [row.name for row in rows]]})
+					summary["applied"] += len(rows)
+
+				except N8NCircuitOpenError:
+					# n8n is down: leave everything pending for the next drain
+					frappe.db.rollback()
+					frappe.logger().warning("n8n unavailable, pausing outbox drain")
+					return dict(summary, success=False, circuit_open=True)
+
+				except Exception as e:
+					frappe.db.rollback()
+					if _reschedule(rows, str(e)):
+						summary["retried"] += len(rows)
+					else:
+						summary["failed"] += len(rows)
+
+				frappe.db.commit()
+		else:
+			# Out of time with work left: hand over to a fresh job
+			schedule_drain()
+
+	finally:
+		cache.delete(lock_key)
+
+	if summary["applied"] or summary["retried"] or summary["failed"]:
+		frappe.logger().info(f"n8n sync outbox drained: {summary}")
+
+	return dict(summary, success=True)
+
+
+def _get_due_groups():
+	"""
+	Get due pending operations grouped by integration, oldest first
+
+	Returns:
+		dict: integration name -> outbox rows in creation order
+	"""
+	now = now_datetime()
+	rows = frappe.get_all(
+		"n8n Sync Outbox",
+		fields=["name", "integration", "operation", "workflow_id", "attempts"],
+		filters={"status": "Pending", "next_attempt_at": ["<=", now]},
+		order_by="creation asc",
+		limit_page_length=DRAIN_BATCH_SIZE
+	)
+
+	if not rows:
+		return {}
+
+	# Integrations with an operation still waiting out its backoff keep their order
+	blocked = set(frappe.get_all(
+		"n8n Sync Outbox",
+		filters={
+			"status": "Pending",
+			"next_attempt_at": [">", now],
+			"integration": ["in", list({row.integration for row in rows})]
+		},
+		pluck="integration"
+	))
+
+	groups = {}
+	for row in rows:
+		if row.integration not in blocked:
+			groups.setdefault(row.integration, []).append(row)
+	return groups
+
+
+def _apply(sync_service, integration, rows):
+	"""
+	Apply the collapsed operations of one integration to n8n
+
+	Raises:
+		Exception: If n8n rejected the operation (the rows are retried)
+	"""
+	operations = [row.operation for row in rows]
+
+	if "delete" in operations:
+		workflow_id = next((row.workflow_id for row in reversed(rows) if row.workflow_id), None)
+		stub = frappe._dict(name=integration, workflow_id=workflow_id)
+		if not sync_service.sync_integration_delete(stub):
+			raise Exception(f"Failed to delete n8n workflow {workflow_id}")
+		return
+
+	if not frappe.db.exists("User Integration", integration):
+		return
+
+	integration_doc = frappe.get_doc("User Integration", integration)
+
+	if not integration_doc.workflow_id and ("create" in operations or "update" in operations):
+		# The workflow is built from the current document, covering later updates.
+		# sync_integration_create pauses the integration instead of raising, so
+		# check its result for the retry to happen.
+		if not sync_service.sync_integration_create(integration_doc) and sync_service.client.is_enabled():
+			raise Exception(integration_doc.error_message or "n8n did not return workflow ID")
+		return
+
+	if "create" in operations or "update" in operations:
+		sync_service.sync_integration_update(integration_doc)
+
+	if "status" in operations:
+		sync_service.sync_integration_status(integration_doc, integration_doc.status)
+
+
+def _reschedule(rows, error):
+	"""
+	Back off failed rows, or mark them failed after MAX_ATTEMPTS
+
+	Runs after the drain rolled back, so the error is also written to the
+	integration here (error_message, and status Error once the rows fail).
+
+	Returns:
+		True if the rows will be retried
+	"""
+	attempts = max(row.attempts or 0 for row in rows) + 1
+	max_attempts = int(frappe.conf.get("n8n_outbox_max_attempts", MAX_ATTEMPTS))
+	delay = min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * (2 ** (attempts - 1)))
+
+	values = {
+		"attempts": attempts,
+		"last_error": error[:500],
+		"next_attempt_at": now_datetime() + timedelta(seconds=delay)
+	}
+	integration_values = {"error_message": f"n8n sync failed: {error}"[:500]}
+
+	if attempts >= max_attempts:
+		values["status"] = "Failed"
+		integration_values["status"] = "Error"
+		frappe.log_error(
+			f"n8n sync for integration {rows[0].integration} failed after {attempts} attempts: {error}",
+			"N8N Sync Outbox Error"
+		)
+
+	# Written directly: a document save would queue another sync
+	frappe.db.set_value("User Integration", rows[0].integration, integration_values, update_modified=False)
+
+	# Newer pending rows of the integration wait too, so none overtake these
+	frappe.db.set_value(
+		"n8n Sync Outbox",
+		{"integration": rows[0].integration, "status": "Pending"},
+		values,
+		update_modified=False
+	)
+
+	return attempts < max_attempts
+
+
+def retry_failed_operations(integration=None):
+	"""
+	Move failed outbox rows back to pending and drain them
+
+	Args:
+		integration: Only retry rows of this integration (optional)
+
+	Returns:
+		Number of rows requeued
+	"""
+	filters = {"status": "Failed"}
+	if integration:
+		filters["integration"] = integration
+
+	count = frappe.db.count("n8n Sync Outbox", filters)
+	if count:
+		frappe.db.set_value("n8n Sync Outbox", filters, {
+			"status": "Pending",
+			"attempts": 0,
+			"next_attempt_at": now_datetime()
+		}, update_modified=False)
+		schedule_drain(enqueue_after_commit=True)
+
+	return count
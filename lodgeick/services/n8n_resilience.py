@@ -0,0 +1,243 @@
+"""
+Retry policy and circuit breaker for the n8n API client
+
+Transient n8n failures (restarts, 502/503 from a proxy, 429 rate limiting)
+are retried with exponential backoff. While n8n is down, the circuit breaker
+fails calls fast instead of letting every caller wait out its timeout.
+"""
+
+import frappe
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+
+RETRYABLE_STATUS_CODES = (429, 502, 503, 504)
+IDEMPOTENT_METHODS = ("GET", "PUT", "DELETE")
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class RetryPolicy:
+	"""Exponential backoff with full jitter for idempotent n8n requests"""
+
+	def __init__(
+		self,
+		max_retries: int = 3,
+		backoff_base: float = 0.5,
+		backoff_max: float = 10.0,
+		retry_statuses=RETRYABLE_STATUS_CODES,
+		retry_methods=IDEMPOTENT_METHODS
+	):
+		"""
+		Initialize retry policy
+
+		Args:
+			max_retries: Retries after the first attempt (0 disables retrying)
+			backoff_base: Delay ceiling for the first retry, in seconds
+			backoff_max: Upper bound for any single delay, including Retry-After
+			retry_statuses: HTTP status codes worth retrying
+			retry_methods: HTTP methods that are safe to repeat
+		"""
+		self.max_retries = max_retries
+		self.backoff_base = backoff_base
+		self.backoff_max = backoff_max
+		self.retry_statuses = tuple(retry_statuses)
+		self.retry_methods = tuple(retry_methods)
+
+	@classmethod
+	def from_conf(cls) -> "RetryPolicy":
+		"""Build a policy from site config"""
+		return cls(
+			max_retries=int(frappe.conf.get("n8n_max_retries", 3)),
+			backoff_base=float(frappe.conf.get("n8n_retry_backoff", 0.5)),
+			backoff_max=float(frappe.conf.get("n8n_retry_backoff_max", 10))
+		)
+
+	def should_retry(self, method: str, attempt: int, status_code: Optional[int] = None) -> bool:
+		"""
+		Decide whether a failed attempt should be retried
+
+		Args:
+			method: HTTP method of the request
+			attempt: Zero-based number of the attempt that just failed
+			status_code: Response status, or None for connection errors/timeouts
+
+		Returns:
+			True if another attempt should be made
+		"""
+		if attempt >= self.max_retries or method not in self.retry_methods:
+			return False
+		return status_code is None or status_code in self.retry_statuses
+
+	def get_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+		"""
+		Get the delay before the next attempt
+
+		Args:
+			attempt: Zero-based number of the attempt that just failed
+			retry_after: Retry-After header value, if the server sent one
+
+		Returns:
+			Delay in seconds
+		"""
+		server_delay = parse_retry_after(retry_after)
+		if server_delay is not None:
+			return min(server_delay, self.backoff_max)
+
+		# Full jitter: spread retries from many workers across the window
+		ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+		return random.uniform(0, ceiling)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+	"""
+	Parse a Retry-After header (delta-seconds or HTTP-date)
+
+	Returns:
+		Delay in seconds, or None if absent or unparseable
+	"""
+	if not value:
+		return None
+
+	try:
+		return max(0.0, float(value))
+	except (TypeError, ValueError):
+		pass
+
+	try:
+		retry_at = parsedate_to_datetime(value)
+		if retry_at.tzinfo is None:
+			retry_at = retry_at.replace(tzinfo=timezone.utc)
+		return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+	except (TypeError, ValueError):
+		return None
+
+
+class CircuitBreaker:
+	"""
+	Per-process circuit breaker for an n8n instance
+
+	After `failure_threshold` consecutive failures the circuit opens and
+	requests fail fast. Once `reset_timeout` has elapsed a single trial
+	request is let through (half-open); success closes the circuit again.
+	"""
+
+	def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+		"""
+		Initialize circuit breaker
+
+		Args:
+			failure_threshold: Consecutive failures before the circuit opens
+			reset_timeout: Seconds to stay open before allowing a trial request
+		"""
+		self.failure_threshold = failure_threshold
+		self.reset_timeout = reset_timeout
+		self.state = STATE_CLOSED
+		self.failure_count = 0
+		self.opened_at = None
+		self.last_failure_at = None
+		self.rejected_count = 0
+		self._trial_in_flight = False
+		self._lock = threading.Lock()
+
+	def allow_request(self) -> bool:
+		"""Check whether a request may be sent now"""
+		with self._lock:
+			if self.state == STATE_CLOSED:
+				return True
+
+			if self.state == STATE_OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+				self.state = STATE_HALF_OPEN
+				self._trial_in_flight = False
+
+			if self.state == STATE_HALF_OPEN and not self._trial_in_flight:
+				self._trial_in_flight = True
+				return True
+
+			self.rejected_count += 1
+			return False
+
+	def record_success(self):
+		"""Record a request that reached a healthy n8n"""
+		with self._lock:
+			self.state = STATE_CLOSED
+			self.failure_count = 0
+			self.opened_at = None
+			self._trial_in_flight = False
+
+	def record_failure(self):
+		"""Record a request that failed because n8n is unreachable or erroring"""
+		with self._lock:
+			self.failure_count += 1
+			self.last_failure_at = time.time()
+			self._trial_in_flight = False
+
+			if self.state == STATE_HALF_OPEN or self.failure_count >= self.failure_threshold:
+				if self.state != STATE_OPEN:
+					frappe.logger().warning(f"n8n circuit breaker opened after {self.failure_count} failures")
+				self.state = STATE_OPEN
+				self.opened_at = time.monotonic()
+
+	def is_open(self) -> bool:
+		"""Check whether requests are currently being rejected"""
+		with self._lock:
+			if self.state == STATE_OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+				return False
+			return self.state != STATE_CLOSED
+
+	def reset(self):
+		"""Force the circuit closed"""
+		self.record_success()
+
+	def get_state(self) -> Dict:
+		"""Get breaker state for monitoring"""
+		with self._lock:
+			retry_in = None
+			if self.state == STATE_OPEN:
+				retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+			return {
+				"state": self.state,
+				"failure_count": self.failure_count,
+				"failure_threshold": self.failure_threshold,
+				"reset_timeout": self.reset_timeout,
+				"retry_in_seconds": retry_in,
+				"last_failure_at": self.last_failure_at,
+				"rejected_count": self.rejected_count
+			}
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(base_url: str) -> CircuitBreaker:
+	"""
+	Get the process-wide circuit breaker for an n8n instance
+
+	Args:
+		base_url: n8n base URL
+
+	Returns:
+		CircuitBreaker shared by every client in this process
+	"""
+	breaker = _breakers.get(base_url)
+	if breaker is not None:
+		return breaker
+
+	with _breakers_lock:
+		breaker = _breakers.get(base_url)
+		if breaker is None:
+			breaker = CircuitBreaker(
+				failure_threshold=int(frappe.conf.get("n8n_circuit_failure_threshold", 5)),
+				reset_timeout=float(frappe.conf.get("n8n_circuit_reset_timeout", 30))
+			)
+			_breakers[base_url] = breaker
+
+	return breaker
@@ -4,10 +4,29 @@ Synchronizes Lodgeick integrations with n8n workflows
 """
 
 import frappe
+import hashlib
 import json
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from frappe import _
-from lodgeick.services.n8n_client import get_n8n_client
+from lodgeick.services.n8n_client import N8NCircuitOpenError, N8NNotFoundError, get_n8n_client
+from lodgeick.services.token_manager import get_access_token
+
+
+def compute_workflow_hash(workflow_data: Dict) -> str:
+	"""
+	Get a canonical content hash of workflow JSON
+
+	`active` is excluded since status is synced separately (activate/deactivate).
+
+	Args:
+		workflow_data: n8n workflow configuration
+
+	Returns:
+		Hex SHA-256 of the workflow serialized with sorted keys
+	"""
+	content = {key: value for key, value in workflow_data.items() if key != "active"}
+	canonical = json.dumps(content, sort_keys=True, separators=(",", ":"), default=str)
+	return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
 
 
 class N8NIntegrationSync:
@@ -186,6 +205,33 @@ class N8NIntegrationSync:
 
 		return workflow_data
 
+	def build_workflow(self, integration_doc: Any) -> Tuple[Dict, str]:
+		"""
+		Build workflow JSON and its content hash
+
+		Works on documents and on plain rows that carry name, flow_name,
+		source_app, target_app, config and status.
+
+		Returns:
+			(workflow_data, workflow_hash)
+		"""
+		workflow_data = self._build_workflow_json(integration_doc)
+		return workflow_data, compute_workflow_hash(workflow_data)
+
+	def store_workflow_hash(self, integration_doc: Any, workflow_hash: str):
+		"""
+		Record the hash of the workflow last pushed to n8n
+
+		Written directly so hooks don't fire again and `modified` isn't bumped.
+		"""
+		integration_doc.workflow_hash = workflow_hash
+		frappe.db.set_value("User Integration", integration_doc.name, "workflow_hash", workflow_hash, update_modified=False)
+
+	def _save_integration(self, integration_doc: Any):
+		"""Save sync results on the integration without queueing another sync"""
+		integration_doc.flags.in_n8n_sync = True
+		integration_doc.save(ignore_permissions=True)
+
 	def _build_manual_trigger_node(self, integration_name: str) -> Dict:
 		"""Build manual trigger node"""
 		return {
@@ -301,52 +347,29 @@ class N8NIntegrationSync:
 		Args:
 			integration_doc: Frappe User Integration document
 
+		Does not commit; the caller (the outbox drain) owns the transaction.
+
 		Returns:
-			n8n workflow ID (or None if n8n not available)
+			n8n workflow ID, or None if n8n is not available or rejected the
+			workflow (the integration is then marked Paused)
 
 		Raises:
-			Exception: If workflow creation fails
+			N8NCircuitOpenError: If n8n is down
 		"""
 		# Check if n8n is enabled
 		if not self.client.is_enabled():
 			frappe.logger().info(f"n8n integration disabled - workflow {integration_doc.flow_name} created in Lodgeick only")
 			integration_doc.status = "Paused"
 			integration_doc.error_message = "n8n not configured - workflow saved locally only"
-			integration_doc.save(ignore_permissions=True)
-			frappe.db.commit()
+			self._save_integration(integration_doc)
 			return None
 
 		try:
-			# Build workflow configuration
-			workflow_data = self._build_workflow_json(integration_doc)
-
-			# Remove 'active' field - it's read-only on creation
-			should_activate = workflow_data.pop("active", False)
-
-			# Create workflow in n8n
-			response = self.client.create_workflow(workflow_data)
-
-			workflow_id = response.get("id")
-
-			if not workflow_id:
-				raise Exception("n8n did not return workflow ID")
+			return self.provision_workflow(integration_doc)["workflow_id"]
 
-			# Update integration with workflow ID
-			integration_doc.workflow_id = str(workflow_id)
-			integration_doc.save(ignore_permissions=True)
-			frappe.db.commit()
-
-			# Activate if needed
-			if should_activate:
-				try:
-					self.client.activate_workflow(workflow_id)
-				except Exception as activate_error:
-					# If activation fails, log but don't fail the whole creation
-					frappe.logger().warning(f"Created workflow {workflow_id} but failed to activate: {str(activate_error)}")
-
-			frappe.logger().info(f"Created n8n workflow {workflow_id} for integration {integration_doc.name}")
-
-			return workflow_id
+		except N8NCircuitOpenError:
+			# n8n is down, not misconfigured - leave the integration for a retry
+			raise
 
 		except Exception as e:
 			# Truncate error message to avoid CharacterLengthExceededError
@@ -363,16 +386,155 @@ class N8NIntegrationSync:
 			# Mark integration but don't fail - allow it to be created without n8n
 			integration_doc.status = "Paused"
 			integration_doc.error_message = f"n8n sync failed: {error_msg}"
-			integration_doc.save(ignore_permissions=True)
-			frappe.db.commit()
+			self._save_integration(integration_doc)
 
 			# Don't raise - allow integration to be created even if n8n fails
 			return None
 
+	def provision_workflow(self, integration: Any) -> Dict:
+		"""
+		Create and, if needed, activate a workflow, then write back once
+
+		n8n treats `active` as read-only on create, so activation is still a
+		second call; the workflow ID and hash are written back in a single
+		direct update after both, instead of a document save (with its
+		Version row) between them. Works on documents and on rows with the
+		SYNC_FIELDS, so callers don't need to load the document.
+
+		Args:
+			integration: User Integration document or row
+
+		Returns:
+			{"workflow_id": str, "activated": bool}
+
+		Raises:
+			Exception: If the workflow could not be created (nothing is written back)
+		"""
+		workflow_data, workflow_hash, should_activate = self._prepare_create(integration)
+
+		workflow_id = self._get_created_workflow_id(self.client.create_workflow(workflow_data))
+		activated = False
+
+		if should_activate:
+			try:
+				self.client.activate_workflow(workflow_id)
+				activated = True
+			except Exception as activate_error:
+				self._log_activation_failure(workflow_id, activate_error)
+
+		self.store_created_workflow(integration, workflow_id, workflow_hash)
+
+		return {"workflow_id": workflow_id, "activated": activated}
+
+	def _prepare_create(self, integration: Any) -> Tuple[Dict, str, bool]:
+		"""
+		Build a workflow for creation
+
+		Returns:
+			(workflow_data without the read-only `active`, workflow_hash, should_activate)
+		"""
+		workflow_data, workflow_hash = self.build_workflow(integration)
+		should_activate = workflow_data.pop("active", False)
+		return workflow_data, workflow_hash, should_activate
+
+	def _get_created_workflow_id(self, response: Dict) -> str:
+		"""Get the ID of a workflow n8n just created"""
+		workflow_id = (response or {}).get("id")
+		if not workflow_id:
+			raise Exception("n8n did not return workflow ID")
+		return str(workflow_id)
+
+	def _log_activation_failure(self, workflow_id: str, error: Exception):
+		# The workflow exists either way; it is recorded so it isn't created twice
+		frappe.logger().warning(f"Created workflow {workflow_id} but failed to activate: {str(error)}")
+
+	def store_created_workflow(self, integration: Any, workflow_id: str, workflow_hash: str):
+		"""Write a created workflow's ID and hash back in one direct update, clearing any error"""
+		values = {"workflow_id": workflow_id, "workflow_hash": workflow_hash, "error_message": None}
+		frappe.db.set_value("User Integration", integration.name, values, update_modified=False)
+		integration.update(values)
+
+		frappe.logger().info(f"Created n8n workflow {workflow_id} for integration {integration.name}")
+
+	def store_create_error(self, integration: Any, error: Exception) -> str:
+		"""
+		Record a failed workflow creation on the integration (it keeps no workflow_id)
+
+		Returns:
+			Truncated error message
+		"""
+		error_msg = str(error)[:500]
+		frappe.db.set_value("User Integration", integration.name, {
+			"error_message": f"n8n sync failed: {error_msg}"
+		}, update_modified=False)
+		return error_msg
+
+	def sync_integrations_create_bulk(self, integrations: List[Any]) -> Dict[str, Dict]:
+		"""
+		Create (and activate) workflows for many integrations in parallel
+
+		Workflows are built locally, then created through the async client with
+		its bounded concurrency. Workflow IDs and hashes are written back with
+		direct updates, so no document hooks fire and nothing is queued to the
+		sync outbox. Failures are recorded in error_message and the
+		integration is left without a workflow_id so it can be retried.
+
+		Args:
+			integrations: User Integration documents or rows with the SYNC_FIELDS
+
+		Returns:
+			{integration name: {"success": bool, "workflow_id" or "error": str}}
+		"""
+		from lodgeick.services.n8n_async_client import get_async_n8n_client, run_async
+
+		if not self.client.is_enabled():
+			return {
+				integration.name: {"success": False, "error": "n8n not configured"}
+				for integration in integrations
+			}
+
+		async_client = get_async_n8n_client()
+		prepared = [self._prepare_create(integration) for integration in integrations]
+
+		async def provision(workflow_data, should_activate):
+			workflow_id = self._get_created_workflow_id(await async_client.create_workflow(workflow_data))
+
+			if should_activate:
+				try:
+					await async_client.activate_workflow(workflow_id)
+				except Exception as activate_error:
+					self._log_activation_failure(workflow_id, activate_error)
+
+			return workflow_id
+
+		responses = run_async(async_client.gather([
+			provision(workflow_data, should_activate) for workflow_data, _, should_activate in prepared
+		]))
+
+		results = {}
+		for integration, (_, workflow_hash, _), response in zip(integrations, prepared, responses):
+			if isinstance(response, Exception):
+				error_msg = self.store_create_error(integration, response)
+				results[integration.name] = {"success": False, "error": error_msg}
+				if not isinstance(response, N8NCircuitOpenError):
+					frappe.log_error(f"Failed to create n8n workflow for {integration.name}: {error_msg}", "N8N Sync Error")
+				continue
+
+			self.store_created_workflow(integration, response, workflow_hash)
+			results[integration.name] = {"success": True, "workflow_id": response}
+
+		frappe.logger().info(
+			f"Bulk created {sum(result['success'] for result in results.values())} of {len(integrations)} n8n workflows"
+		)
+
+		return results
+
 	def sync_integration_update(self, integration_doc: Any) -> bool:
 		"""
 		Update workflow in n8n when integration is updated
 
+		Does not commit; the caller (the outbox drain) owns the transaction.
+
 		Args:
 			integration_doc: Frappe User Integration document
 
@@ -384,33 +546,42 @@ class N8NIntegrationSync:
 		"""
 		if not integration_doc.workflow_id:
 			# If no workflow exists, create one
-			self.sync_integration_create(integration_doc)
-			return True
+			return bool(self.sync_integration_create(integration_doc))
 
 		try:
 			# Build updated workflow configuration
-			workflow_data = self._build_workflow_json(integration_doc)
+			workflow_data, workflow_hash = self.build_workflow(integration_doc)
 
-			# Update workflow in n8n
-			self.client.update_workflow(integration_doc.workflow_id, workflow_data)
+			# Skip the PUT if n8n already has this exact workflow
+			if workflow_hash == integration_doc.workflow_hash:
+				frappe.logger().info(f"n8n workflow {integration_doc.workflow_id} unchanged, skipping update")
+			else:
+				# Status is pushed separately; `active` is read-only on update
+				self.client.update_workflow(
+					integration_doc.workflow_id,
+					{key: value for key, value in workflow_data.items() if key != "active"}
+				)
+				self.store_workflow_hash(integration_doc, workflow_hash)
 
 			# Clear error state if update successful
 			if integration_doc.error_message:
 				integration_doc.error_message = None
-				integration_doc.save(ignore_permissions=True)
-				frappe.db.commit()
+				self._save_integration(integration_doc)
 
 			frappe.logger().info(f"Updated n8n workflow {integration_doc.workflow_id} for integration {integration_doc.name}")
 
 			return True
 
+		except N8NCircuitOpenError:
+			# n8n is down, not misconfigured - keep the integration's status
+			raise
+
 		except Exception as e:
 			error_msg = f"Failed to update n8n workflow: {str(e)}"
 			frappe.log_error(error_msg, "N8N Sync Error")
 			integration_doc.status = "Error"
 			integration_doc.error_message = error_msg
-			integration_doc.save(ignore_permissions=True)
-			frappe.db.commit()
+			self._save_integration(integration_doc)
 			raise
 
 	def sync_integration_delete(self, integration_doc: Any) -> bool:
@@ -473,14 +644,15 @@ class N8NIntegrationSync:
 
 	# ==================== Credential Sync ====================
 
-	def sync_oauth_credentials(self, provider: str, user: str, token_data: Dict) -> str:
+	def sync_oauth_credentials(self, provider: str, user: str, token_data: Optional[Dict] = None) -> str:
 		"""
 		Create or update OAuth credentials in n8n
 
 		Args:
 			provider: OAuth provider (e.g., 'google', 'slack')
 			user: Frappe user
-			token_data: OAuth token data
+			token_data: OAuth token data; the access token is taken from the
+				token manager when it isn't included
 
 		Returns:
 			n8n credential ID
@@ -495,11 +667,14 @@ class N8NIntegrationSync:
 
 		credential_type = credential_type_map.get(provider, f"{provider}OAuth2Api")
 
+		token_data = token_data or {}
+		access_token = token_data.get("access_token") or get_access_token(user, provider)
+
 		credential_data = {
 			"name": f"Lodgeick {provider.title()} - {user}",
 			"type": credential_type,
 			"data": {
-				"accessToken": token_data.get("access_token"),
+				"accessToken": access_token,
 				"refreshToken": token_data.get("refresh_token"),
 				"tokenType": token_data.get("token_type", "Bearer"),
 				"expiresIn": token_data.get("expires_in")
@@ -507,33 +682,60 @@ class N8NIntegrationSync:
 		}
 
 		try:
-			# Check if credential already exists for this user/provider
-			existing_credentials = self.client.list_credentials()
-			existing_cred = None
-
-			for cred in existing_credentials:
-				if cred.get("name") == credential_data["name"]:
-					existing_cred = cred
-					break
-
-			if existing_cred:
-				# Update existing credential
-				response = self.client.update_credential(existing_cred["id"], credential_data)
-			else:
-				# Create new credential
-				response = self.client.create_credential(credential_data)
+			response = None
 
-			credential_id = response.get("id")
+			# Update the credential we created last time directly
+			credential_id = frappe.db.get_value(
+				"Integration Token", {"user": user, "provider": provider}, "n8n_credential_id"
+			)
+			if credential_id:
+				try:
+					response = self.client.update_credential(credential_id, credential_data)
+				except N8NNotFoundError:
+					# Deleted in n8n - fall back to a lookup by name
+					response = None
+
+			if response is None:
+				existing_cred = self._find_credential_by_name(credential_data["name"])
+				if existing_cred:
+					response = self.client.update_credential(existing_cred["id"], credential_data)
+				else:
+					response = self.client.create_credential(credential_data)
+
+			credential_id = str(response.get("id"))
+
+			# Remember the ID so the next sync skips the lookup
+			frappe.db.set_value(
+				"Integration Token",
+				{"user": user, "provider": provider},
+				"n8n_credential_id",
+				credential_id,
+				update_modified=False
+			)
 
 			frappe.logger().info(f"Synced {provider} credentials to n8n for user {user}")
 
-			return str(credential_id)
+			return credential_id
 
 		except Exception as e:
 			error_msg = f"Failed to sync credentials to n8n: {str(e)}"
 			frappe.log_error(error_msg, "N8N Credential Sync Error")
 			raise
 
+	def _find_credential_by_name(self, name: str) -> Optional[Dict]:
+		"""
+		Find an n8n credential by name, stopping at the first match
+
+		Only used when no credential ID is stored for the user and provider.
+
+		Returns:
+			Credential data, or None if no credential has this name
+		"""
+		for cred in self.client.iter_credentials():
+			if cred.get("name") == name:
+				return cred
+		return None
+
 
 def get_n8n_sync_service() -> N8NIntegrationSync:
 	"""
@@ -0,0 +1,257 @@
+"""
+N8N Webhook Queue
+Buffers n8n execution callbacks in a Redis list so the web request only
+validates and acknowledges. A background worker applies them in
+micro-batches: one integration lookup per batch, buffered Integration Log
+inserts, and one coalesced status update per integration.
+
+Enabled with the site config `n8n_webhook_async`; otherwise
+n8n_webhook_callback applies each callback synchronously.
+"""
+
+import frappe
+import json
+import time
+from frappe.utils import get_datetime, now_datetime
+from lodgeick.services.integration_log_buffer import discard_logs
+
+
+QUEUE_KEY = "n8n_webhook_queue"
+DEAD_LETTER_KEY = "n8n_webhook_queue:dead_letter"
+WORKER_JOB_ID = "n8n_webhook_queue_worker"
+WORKER_LOCK_KEY = "n8n_webhook_queue:worker_lock"
+WORKER_LOCK_SECONDS = 600
+WORKER_TIME_BUDGET = 240
+
+DEFAULT_BATCH_SIZE = 500
+
+# Callbacks are refused (HTTP 503, so n8n retries) beyond this backlog
+DEFAULT_MAX_QUEUE_LENGTH = 100000
+
+MAX_MESSAGE_LENGTH = 10000
+
+# Oldest dead-lettered callbacks are trimmed beyond this
+MAX_DEAD_LETTER_LENGTH = 10000
+
+
+def is_enabled():
+	"""Check if callbacks should be queued instead of applied synchronously"""
+	return bool(frappe.conf.get("n8n_webhook_async", False))
+
+
+def enqueue_callback(data):
+	"""
+	Validate a callback payload and push it onto the queue
+
+	Args:
+		data: Callback payload (workflow_id, status, message, execution_time)
+
+	Returns:
+		dict: Acknowledgement, or an error for invalid payloads or a full queue
+	"""
+	workflow_id = data.get("workflow_id")
+	status = data.get("status")
+
+	if not workflow_id or not status:
+		return {"success": False, "error": "workflow_id and status are required"}
+
+	try:
+		execution_time = float(data["execution_time"]) if data.get("execution_time") not in (None, "") else None
+	except (TypeError, ValueError):
+		return {"success": False, "error": "execution_time must be a number"}
+
+	cache = frappe.cache()
+	if cache.llen(QUEUE_KEY) >= int(frappe.conf.get("n8n_webhook_max_queue_length", DEFAULT_MAX_QUEUE_LENGTH)):
+		frappe.local.response.http_status_code = 503
+		return {"success": False, "error": "Webhook queue is full, retry later"}
+
+	length = cache.rpush(QUEUE_KEY, json.dumps({
+		"workflow_id": str(workflow_id),
+		"status": str(status),
+		"message": str(data.get("message") or "")[:MAX_MESSAGE_LENGTH],
+		"execution_time": execution_time,
+		"received_at": str(now_datetime())
+	}))
+
+	# The first item of an empty queue wakes a worker; the scheduler is the backstop
+	if length == 1:
+		schedule_worker()
+
+	return {"success": True, "message": "Callback queued"}
+
+
+def schedule_worker():
+	"""Enqueue the queue worker unless one is already queued"""
+	frappe.enqueue(
+		"lodgeick.services.n8n_webhook_queue.apply_queued_callbacks",
+		queue="short",
+		job_id=WORKER_JOB_ID,
+		deduplicate=True
+	)
+
+
+def apply_queued_callbacks():
+	"""
+	Background job: apply queued callbacks in batches until the queue is empty
+
+	If a batch fails, its callbacks are applied one at a time and those that
+	still fail are moved to the dead-letter list, so a bad payload cannot
+	block the queue.
+
+	Returns:
+		dict: Counts of applied, dropped and dead-lettered callbacks
+	"""
+	cache = frappe.cache()
+	lock_key = cache.make_key(WORKER_LOCK_KEY)
+	if not cache.set(lock_key, 1, nx=True, ex=WORKER_LOCK_SECONDS):
+		return {"success": True, "skipped": "worker already running"}
+
+	batch_size = int(frappe.conf.get("n8n_webhook_batch_size", DEFAULT_BATCH_SIZE))
+	deadline = time.monotonic() + WORKER_TIME_BUDGET
+	summary = {"applied": 0, "dropped": 0, "dead_lettered": 0}
+
+	try:
+		while time.monotonic() < deadline:
+			# Producers only append, so the single worker can read then trim the head
+			items = cache.lrange(QUEUE_KEY, 0, batch_size - 1)
+			if not items:
+				break
+
+			try:
+				applied, dropped = apply_callbacks([json.loads(item) for item in items])
+				frappe.db.commit()
+				dead_lettered = 0
+			except Exception:
+				frappe.db.rollback()
+				discard_logs()
+				applied, dropped, dead_lettered = _apply_individually(items)
+
+			cache.ltrim(QUEUE_KEY, len(items), -1)
+
+			summary["applied"] += applied
+			summary["dropped"] += dropped
+			summary["dead_lettered"] += dead_lettered
+		else:
+			# Out of time with work left: hand over to a fresh job
+			schedule_worker()
+
+	finally:
+		cache.delete(lock_key)
+
+	if summary["applied"] or summary["dropped"] or summary["dead_lettered"]:
+		frappe.logger().info(f"n8n webhook queue drained: {summary}")
+
+	return dict(summary, success=True)
+
+
+def _apply_individually(items):
+	"""
+	Apply the callbacks of a failed batch one at a time
+
+	Callbacks that fail on their own are pushed to the dead-letter list
+	(capped at MAX_DEAD_LETTER_LENGTH) and logged.
+
+	Args:
+		items: Raw queue items of the failed batch
+
+	Returns:
+		(applied, dropped, dead_lettered) counts
+	"""
+	cache = frappe.cache()
+	applied = dropped = dead_lettered = 0
+
+	for item in items:
+		try:
+			item_applied, item_dropped = apply_callbacks([json.loads(item)])
+			frappe.db.commit()
+		except Exception:
+			frappe.db.rollback()
+			discard_logs()
+			cache.rpush(DEAD_LETTER_KEY, item)
+			cache.ltrim(DEAD_LETTER_KEY, -MAX_DEAD_LETTER_LENGTH, -1)
+			frappe.log_error(
+				f"Moved n8n webhook callback to the dead-letter list: {frappe.safe_decode(item)[:500]}\n\n{frappe.get_traceback()}",
+				"N8N Webhook Queue Error"
+			)
+			frappe.db.commit()
+			dead_lettered += 1
+			continue
+
+		applied += item_applied
+		dropped += item_dropped
+
+	return applied, dropped, dead_lettered
+
+
+def apply_callbacks(payloads):
+	"""
+	Apply a batch of callbacks
+
+	Each integration ends up in the state of its last callback in the batch:
+	Completed (with last_run) after a success, Error (with the message)
+	after a failure. Every callback still gets its own Integration Log row
+	and counts towards the execution stats.
+
+	Args:
+		payloads: Queued callback payloads in arrival order
+
+	Returns:
+		(applied, dropped) counts; callbacks for unknown workflows are dropped
+	"""
+	integrations = {
+		row.workflow_id: row for row in frappe.get_all(
+			"User Integration",
+			fields=["name", "user", "workflow_id", "status"],
+			filters={"workflow_id": ["in", list({payload["workflow_id"] for payload in payloads})]}
+		)
+	}
+
+	from lodgeick.services.integration_log_buffer import buffer_log
+
+	logged = 0
+	executions = []
+	final_state = {}
+
+	for payload in payloads:
+		integration = integrations.get(payload["workflow_id"])
+		if not integration:
+			continue
+
+		success = payload["status"] == "success"
+		received_at = get_datetime(payload["received_at"])
+
+		buffer_log(
+			integration.name,
+			"Success" if success else "Error",
+			payload["message"],
+			payload["execution_time"],
+			timestamp=received_at
+		)
+		logged += 1
+		executions.append((integration.name, integration.user, success, received_at))
+
+		if success:
+			final_state[integration.name] = {"status": "Completed", "last_run": received_at, "error_message": None}
+		else:
+			final_state[integration.name] = {"status": "Error", "error_message": payload["message"]}
+
+	from lodgeick.services.execution_stats import record_executions
+	record_executions(executions)
+
+	rows = {row.name: row for row in integrations.values()}
+	for integration_name, values in final_state.items():
+		frappe.db.set_value("User Integration", integration_name, values)
+
+		# Same n8n status sync a document save would have queued
+		if values["status"] != rows[integration_name].status:
+			_queue_status_sync(rows[integration_name])
+
+	return logged, len(payloads) - logged
+
+
+def _queue_status_sync(integration):
+	if not frappe.conf.get("n8n_auto_sync", True):
+		return
+
+	from lodgeick.services.n8n_outbox import enqueue_integration_sync
+	enqueue_integration_sync(integration, "status")
@@ -0,0 +1,205 @@
+"""
+OAuth HTTP Client
+Shared client for calls to provider token endpoints (code exchange and
+token refresh).
+
+- One pooled requests.Session per provider host, reused across requests
+  in the worker process
+- Connect and read timeouts, so a slow provider cannot pin a worker
+- A per-provider semaphore bounding concurrent token requests from this
+  process, so refresh bursts stay under provider rate limits
+- Site-wide latency and outcome counters per provider in Redis
+"""
+
+import frappe
+import requests
+import threading
+import time
+from requests.adapters import HTTPAdapter
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 15
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_ACQUIRE_TIMEOUT = 10
+
+METRICS_KEY = "oauth_http_metrics:{provider}"
+METRICS_PROVIDERS_KEY = "oauth_http_metrics:providers"
+
+# Upper bounds (ms) of the latency histogram buckets
+LATENCY_BUCKETS = (100, 250, 500, 1000, 2500, 5000)
+
+_sessions: Dict[str, requests.Session] = {}
+_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_lock = threading.Lock()
+
+
+class OAuthProviderBusyError(Exception):
+	"""Raised when a provider's concurrency limit stays exhausted"""
+	pass
+
+
+def get_session(token_url: str) -> requests.Session:
+	"""
+	Get the process-wide pooled session for a token endpoint's host
+
+	Args:
+		token_url: Provider token endpoint
+
+	Returns:
+		requests.Session with a pooled HTTPAdapter mounted
+	"""
+	host = urlparse(token_url).netloc
+	session = _sessions.get(host)
+	if session is not None:
+		return session
+
+	with _lock:
+		session = _sessions.get(host)
+		if session is None:
+			pool_size = int(frappe.conf.get("oauth_pool_size") or DEFAULT_POOL_SIZE)
+			session = requests.Session()
+			adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+			session.mount("http://", adapter)
+			session.mount("https://", adapter)
+			_sessions[host] = session
+
+	return session
+
+
+def close_sessions():
+	"""Close all pooled OAuth sessions in this process"""
+	with _lock:
+		for session in _sessions.values():
+			session.close()
+		_sessions.clear()
+
+
+def _get_semaphore(provider: str) -> threading.BoundedSemaphore:
+	semaphore = _semaphores.get(provider)
+	if semaphore is not None:
+		return semaphore
+
+	with _lock:
+		semaphore = _semaphores.get(provider)
+		if semaphore is None:
+			limit = int(frappe.conf.get("oauth_max_concurrency") or DEFAULT_MAX_CONCURRENCY)
+			semaphore = _semaphores[provider] = threading.BoundedSemaphore(limit)
+
+	return semaphore
+
+
+def post_token_request(provider: Optional[str], token_url: str, data: Dict) -> requests.Response:
+	"""
+	POST a form to a provider's token endpoint
+
+	Args:
+		provider: Provider name (the endpoint host is used if unknown)
+		token_url: Provider token endpoint
+		data: Form fields
+
+	Returns:
+		requests.Response (the caller checks the status code)
+
+	Raises:
+		OAuthProviderBusyError: If no slot frees up within the acquire timeout
+		requests.RequestException: On connection errors and timeouts
+	"""
+	provider = provider or urlparse(token_url).netloc
+	semaphore = _get_semaphore(provider)
+
+	acquire_timeout = float(frappe.conf.get("oauth_acquire_timeout") or DEFAULT_ACQUIRE_TIMEOUT)
+	if not semaphore.acquire(timeout=acquire_timeout):
+		_record(provider, "busy", None)
+		raise OAuthProviderBusyError(f"Too many concurrent token requests to {provider}")
+
+	timeout = (
+		float(frappe.conf.get("oauth_connect_timeout") or DEFAULT_CONNECT_TIMEOUT),
+		float(frappe.conf.get("oauth_read_timeout") or DEFAULT_READ_TIMEOUT)
+	)
+
+	start = time.monotonic()
+	try:
+		response = get_session(token_url).post(
+			token_url, data=data, headers={"Accept": "application/json"}, timeout=timeout
+		)
+	except requests.Timeout:
+		_record(provider, "timeout", time.monotonic() - start)
+		raise
+	except requests.RequestException:
+		_record(provider, "error", time.monotonic() - start)
+		raise
+	finally:
+		semaphore.release()
+
+	_record(provider, "success" if response.status_code == 200 else "error", time.monotonic() - start)
+	return response
+
+
+def _record(provider: str, outcome: str, elapsed: Optional[float]):
+	"""Count one token request in the provider's site-wide metrics"""
+	try:
+		cache = frappe.cache()
+		key = _get_metrics_key(provider)
+		pipeline = cache.pipeline()
+		pipeline.hincrby(key, outcome, 1)
+		if elapsed is not None:
+			elapsed_ms = int(elapsed * 1000)
+			bucket = next((f"le_{bound}" for bound in LATENCY_BUCKETS if elapsed_ms <= bound), "le_inf")
+			pipeline.hincrby(key, "requests", 1)
+			pipeline.hincrby(key, "latency_ms_total", elapsed_ms)
+			pipeline.hincrby(key, bucket, 1)
+		pipeline.sadd(cache.make_key(METRICS_PROVIDERS_KEY), provider)
+		pipeline.execute()
+	except Exception:
+		# Metrics must never fail a token request
+		pass
+
+
+def get_metrics() -> Dict:
+	"""
+	Get site-wide token request metrics per provider
+
+	Returns:
+		dict: provider -> requests, success/error/timeout/busy counts,
+			average latency and latency histogram buckets
+	"""
+	providers = _get_metric_providers()
+
+	# Raw commands: RedisWrapper's hash helpers unpickle values
+	pipeline = frappe.cache().pipeline()
+	for provider in providers:
+		pipeline.hgetall(_get_metrics_key(provider))
+
+	metrics = {}
+	for provider, values in zip(providers, pipeline.execute()):
+		values = {_decode(field): int(value) for field, value in values.items()}
+		requests_made = values.get("requests", 0)
+		values["avg_latency_ms"] = round(values.get("latency_ms_total", 0) / requests_made, 1) if requests_made else None
+		metrics[provider] = values
+
+	return metrics
+
+
+def reset_metrics():
+	"""Clear all token request metrics"""
+	cache = frappe.cache()
+	keys = [_get_metrics_key(provider) for provider in _get_metric_providers()]
+	cache.delete(cache.make_key(METRICS_PROVIDERS_KEY), *keys)
+
+
+def _get_metric_providers():
+	pipeline = frappe.cache().pipeline()
+	pipeline.smembers(frappe.cache().make_key(METRICS_PROVIDERS_KEY))
+	return sorted(_decode(provider) for provider in pipeline.execute()[0])
+
+
+def _get_metrics_key(provider: str) -> str:
+	return frappe.cache().make_key(METRICS_KEY.format(provider=provider))
+
+
+def _decode(value):
+	return value.decode() if isinstance(value, bytes) else value
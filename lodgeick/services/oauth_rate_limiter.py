@@ -0,0 +1,235 @@
+"""
+OAuth Rate Limiter
+Sliding-window request limits for shared OAuth apps, kept in Redis.
+
+Each (user, provider, tier, api) has a per-minute and a per-day window.
+Checking and recording a request is one Lua script call, so concurrent
+requests can never both take the last slot, and no database row is
+written on the request path. The OAuth Usage Log doctype is refreshed
+from Redis by rollup_usage_logs for reporting only.
+
+Windows are sliding-window counters: the count of the current fixed
+window plus the previous window's count weighted by how much of it still
+overlaps the sliding window.
+"""
+
+import frappe
+import time
+from datetime import datetime, timezone
+from frappe.utils import convert_utc_to_system_timezone, now_datetime
+from redis.exceptions import RedisError
+
+
+KEY_PREFIX = "oauth_rate"
+DIRTY_KEY = "oauth_rate:dirty"
+
+MINUTE = 60
+DAY = 86400
+
+ROLLUP_BATCH_SIZE = 500
+
+# KEYS: minute current, minute previous, day current, day previous, last request, dirty set
+# ARGV: now, minute limit, day limit (-1 = unlimited), cost, identity
+# Returns: allowed (0/1), requests in the last minute, requests in the last day
+_SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local cost = tonumber(ARGV[4])
+
+local function count(current, previous, window)
+	local elapsed = (now % window) / window
+	return (tonumber(redis.call('GET', previous) or 0) * (1 - elapsed)) + tonumber(redis.call('GET', current) or 0)
+end
+
+local minute_count = count(KEYS[1], KEYS[2], 60)
+local day_count = count(KEYS[3], KEYS[4], 86400)
+
+local minute_limit = tonumber(ARGV[2])
+local day_limit = tonumber(ARGV[3])
+
+if cost > 0 then
+	if (minute_limit >= 0 and minute_count + cost > minute_limit) or (day_limit >= 0 and day_count + cost > day_limit) then
+		return {0, math.floor(minute_count), math.floor(day_count)}
+	end
+
+	redis.call('INCRBY', KEYS[1], cost)
+	redis.call('EXPIRE', KEYS[1], 120)
+	redis.call('INCRBY', KEYS[3], cost)
+	redis.call('EXPIRE', KEYS[3], 172800)
+	redis.call('SET', KEYS[5], ARGV[1], 'EX', 172800)
+	redis.call('SADD', KEYS[6], ARGV[5])
+
+	minute_count = minute_count + cost
+	day_count = day_count + cost
+end
+
+return {1, math.floor(minute_count), math.floor(day_count)}
+"""
+
+
+def acquire(user, provider, tier, api_name=None, minute_limit=None, day_limit=None, cost=1):
+	"""
+	Check the limits and, if allowed, record `cost` requests atomically
+
+	Args:
+		user: User email
+		provider: OAuth provider
+		tier: OAuth tier
+		api_name: Optional API name
+		minute_limit: Requests allowed per minute (None for unlimited)
+		day_limit: Requests allowed per day (None for unlimited)
+		cost: Requests to record; 0 only reads the counters
+
+	Returns:
+		dict: allowed, requests_this_minute, requests_today
+	"""
+	return _run(user, provider, tier, api_name, minute_limit, day_limit, cost)
+
+
+def record(user, provider, tier, api_name=None, cost=1):
+	"""Record requests without enforcing any limit"""
+	return acquire(user, provider, tier, api_name, cost=cost)
+
+
+def get_usage(user, provider, tier, api_name=None):
+	"""Get the current sliding-window counts without recording anything"""
+	return acquire(user, provider, tier, api_name, cost=0)
+
+
+def _run(user, provider, tier, api_name, minute_limit, day_limit, cost, pipeline=None):
+	cache = frappe.cache()
+	now = time.time()
+	prefix = f"{KEY_PREFIX}:{user}:{provider}:{tier}:{api_name or ''}"
+	minute_window = int(now // MINUTE)
+	day_window = int(now // DAY)
+
+	keys = [cache.make_key(key) for key in (
+		f"{prefix}:m:{minute_window}",
+		f"{prefix}:m:{minute_window - 1}",
+		f"{prefix}:d:{day_window}",
+		f"{prefix}:d:{day_window - 1}",
+		f"{prefix}:last",
+		DIRTY_KEY
+	)]
+	args = [
+		now,
+		-1 if minute_limit is None else minute_limit,
+		-1 if day_limit is None else day_limit,
+		cost,
+		_get_identity(user, provider, tier, api_name)
+	]
+
+	script = cache.register_script(_SLIDING_WINDOW_SCRIPT)
+	if pipeline is not None:
+		# The result arrives with pipeline.execute()
+		script(keys=keys, args=args, client=pipeline)
+		return None
+
+	allowed, minute_count, day_count = script(keys=keys, args=args)
+	return {
+		"allowed": bool(allowed),
+		"requests_this_minute": int(minute_count),
+		"requests_today": int(day_count)
+	}
+
+
+def rollup_usage_logs():
+	"""
+	Scheduled job: copy the Redis counters of recently used limiters into OAuth Usage Log
+
+	Only limiters that recorded a request since the last rollup are
+	written. The doctype is a report; limits are enforced from Redis.
+
+	Returns:
+		dict: Number of usage logs written
+	"""
+	cache = frappe.cache()
+	dirty_key = cache.make_key(DIRTY_KEY)
+	written = 0
+
+	try:
+		while True:
+			# RedisWrapper.spop prefixes the key again and pops one member; use the raw command
+			pipeline = cache.pipeline()
+			pipeline.spop(dirty_key, ROLLUP_BATCH_SIZE)
+			identities = pipeline.execute()[0]
+			if not identities:
+				break
+
+			written += _rollup_batch([_parse_identity(identity) for identity in identities])
+			frappe.db.commit()
+
+	except RedisError as e:
+		frappe.log_error(f"OAuth usage rollup failed: {str(e)}", "OAuth Rate Limiter Error")
+		return {"success": False, "error": str(e), "written": written}
+
+	return {"success": True, "written": written}
+
+
+def _rollup_batch(limiters):
+	from lodgeick.config.oauth_tiers import get_rate_limit
+	from lodgeick.lodgeick.doctype.oauth_usage_log.oauth_usage_log import get_usage_status
+
+	cache = frappe.cache()
+	pipeline = cache.pipeline()
+	for user, provider, tier, api_name in limiters:
+		_run(user, provider, tier, api_name, None, None, 0, pipeline=pipeline)
+		pipeline.get(cache.make_key(f"{KEY_PREFIX}:{user}:{provider}:{tier}:{api_name}:last"))
+	results = pipeline.execute()
+
+	existing = {
+		(row.user, row.provider, row.tier, row.api_name or ""): row.name
+		for row in frappe.get_all(
+			"OAuth Usage Log",
+			fields=["name", "user", "provider", "tier", "api_name"],
+			filters={"user": ["in", list({limiter[0] for limiter in limiters})]}
+		)
+	}
+
+	now = now_datetime()
+	for index, (user, provider, tier, api_name) in enumerate(limiters):
+		_, minute_count, day_count = results[index * 2]
+		last_request = results[index * 2 + 1]
+
+		rate_config = get_rate_limit(provider, tier, api_name or None) or {}
+		daily_limit = rate_config.get("requests_per_day")
+		minute_limit = rate_config.get("requests_per_minute")
+
+		values = {
+			"requests_today": int(day_count),
+			"requests_this_minute": int(minute_count),
+			"daily_limit": daily_limit,
+			"minute_limit": minute_limit,
+			"last_request_time": _to_system_datetime(last_request),
+			"last_reset_daily": now,
+			"last_reset_minute": now,
+			"status": get_usage_status(int(day_count), int(minute_count), daily_limit, minute_limit)
+		}
+
+		name = existing.get((user, provider, tier, api_name))
+		if name:
+			frappe.db.set_value("OAuth Usage Log", name, values, update_modified=False)
+		else:
+			frappe.get_doc(dict(
+				values, doctype="OAuth Usage Log", user=user, provider=provider, tier=tier, api_name=api_name
+			)).insert(ignore_permissions=True)
+
+	return len(limiters)
+
+
+def _to_system_datetime(timestamp):
+	"""Convert a Unix timestamp stored in Redis to a naive system-timezone datetime"""
+	if not timestamp:
+		return None
+	return convert_utc_to_system_timezone(
+		datetime.fromtimestamp(float(timestamp), tz=timezone.utc)
+	).replace(tzinfo=None)
+
+
+def _get_identity(user, provider, tier, api_name):
+	return "\x1f".join((user, provider, tier, api_name or ""))
+
+
+def _parse_identity(identity):
+	if isinstance(identity, bytes):
+		identity = identity.decode()
+	return tuple(identity.split("\x1f"))
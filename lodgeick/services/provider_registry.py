@@ -0,0 +1,142 @@
+"""
+OAuth Provider Registry
+Compiled OAuth configuration of every provider, so get_provider_config is
+a dictionary lookup instead of loading the OAuth Credentials Settings
+singleton and scanning its credentials on every OAuth request.
+
+The registry is built once, stored in Redis under a version key, and
+kept per process. Saving OAuth Credentials Settings sets a new version;
+each process notices on its next request and reloads the registry from
+Redis (one process rebuilds it from the database).
+"""
+
+import frappe
+
+
+VERSION_KEY = "oauth_provider_registry:version"
+REGISTRY_KEY = "oauth_provider_registry:{version}"
+REGISTRY_TTL = 86400
+
+# Endpoints and default scopes; credentials come from OAuth Credentials Settings or site config
+PROVIDER_ENDPOINTS = {
+	"xero": {
+		"auth_url": "https://login.xero.com/identity/connect/authorize",
+		"token_url": "https://identity.xero.com/connect/token",
+		"scope": "accounting.transactions accounting.contacts offline_access"
+	},
+	"google": {
+		"auth_url": "https://accounts.google.com/o/oauth2/v2/auth",
+		"token_url": "https://oauth2.googleapis.com/token",
+		"scope": "https://www.googleapis.com/auth/gmail.readonly https://www.googleapis.com/auth/gmail.send https://www.googleapis.com/auth/spreadsheets https://www.googleapis.com/auth/drive.file"
+	},
+	"slack": {
+		"auth_url": "https://slack.com/oauth/v2/authorize",
+		"token_url": "https://slack.com/api/oauth.v2.access",
+		"scope": "channels:read channels:write chat:write"
+	},
+	"hubspot": {
+		"auth_url": "https://app.hubspot.com/oauth/authorize",
+		"token_url": "https://api.hubapi.com/oauth/v1/token",
+		"scope": "crm.objects.contacts.read crm.objects.contacts.write"
+	}
+}
+
+# Providers that can fall back to `{provider}_client_id` / `{provider}_client_secret` in site config
+CONF_PROVIDERS = ("xero", "google", "slack")
+
+_registries = {}
+
+
+def get_provider(provider):
+	"""
+	Get the OAuth configuration of a provider
+
+	Args:
+		provider: Provider name
+
+	Returns:
+		dict: A copy of the provider configuration, or None if not configured
+	"""
+	config = get_registry().get(provider)
+	return dict(config) if config is not None else None
+
+
+def get_registry():
+	"""Get the compiled registry of the current site, loading it if it changed"""
+	cache = frappe.cache()
+	version = _get_version(cache)
+
+	site = getattr(frappe.local, "site", None)
+	cached = _registries.get(site)
+	if cached and cached[0] == version:
+		return cached[1]
+
+	registry_key = REGISTRY_KEY.format(version=version)
+	registry = cache.get_value(registry_key)
+	if registry is None:
+		registry = build_registry()
+		cache.set_value(registry_key, registry, expires_in_sec=REGISTRY_TTL)
+
+	_registries[site] = (version, registry)
+	return registry
+
+
+def build_registry():
+	"""
+	Compile the configuration of every provider
+
+	Credentials in OAuth Credentials Settings take precedence; providers
+	without them fall back to the site config.
+
+	Returns:
+		dict: provider -> configuration
+	"""
+	registry = {}
+
+	try:
+		settings = frappe.get_single("OAuth Credentials Settings")
+		for cred in settings.oauth_credentials:
+			if cred.provider in registry or not cred.client_id or not cred.client_secret:
+				continue
+
+			config = dict(PROVIDER_ENDPOINTS.get(cred.provider, {}))
+			config["provider"] = cred.provider
+			config["client_id"] = cred.client_id
+			config["client_secret"] = cred.client_secret
+			registry[cred.provider] = config
+	except Exception as e:
+		frappe.log_error(f"Error getting provider config from settings: {str(e)}")
+
+	for provider in CONF_PROVIDERS:
+		if provider not in registry:
+			registry[provider] = dict(
+				PROVIDER_ENDPOINTS[provider],
+				provider=provider,
+				client_id=frappe.conf.get(f"{provider}_client_id"),
+				client_secret=frappe.conf.get(f"{provider}_client_secret")
+			)
+
+	return registry
+
+
+def invalidate_registry():
+	"""
+	Publish a new registry version; every process reloads on its next lookup
+
+	Call after the settings change is committed (see OAuthCredentialsSettings),
+	otherwise another process may rebuild from the old settings under the new version.
+	"""
+	cache = frappe.cache()
+	cache.set(cache.make_key(VERSION_KEY), frappe.generate_hash(length=10))
+	_registries.pop(getattr(frappe.local, "site", None), None)
+
+
+def _get_version(cache):
+	"""Get the registry version, creating it if missing"""
+	key = cache.make_key(VERSION_KEY)
+	version = cache.get(key)
+	if not version:
+		# SET NX and re-read, so concurrent first requests agree on one version
+		cache.set(key, frappe.generate_hash(length=10), nx=True)
+		version = cache.get(key)
+	return frappe.safe_decode(version)
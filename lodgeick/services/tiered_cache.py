@@ -0,0 +1,267 @@
+"""
+Tiered Cache Service
+
+Two-tier cache: a bounded in-process LRU in front of Redis (frappe.cache()).
+Entries carry their own TTL and an optional stale window during which the
+stale value is served while a background job revalidates it.
+"""
+
+import frappe
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+# How long a process trusts its copy of a namespace version before
+# re-reading it from Redis (bounds cross-process invalidation lag)
+VERSION_CHECK_INTERVAL = 5
+
+# Minimum gap between revalidation enqueues for the same key in one process
+REVALIDATE_THROTTLE = 30
+
+
+class LRUCache:
+	"""Thread-safe, size-bounded least-recently-used cache"""
+
+	def __init__(self, maxsize: int = 256):
+		"""
+		Initialize LRU cache
+
+		Args:
+			maxsize: Maximum number of entries kept in memory
+		"""
+		self.maxsize = maxsize
+		self._data = OrderedDict()
+		self._lock = threading.Lock()
+
+	def get(self, key: str) -> Optional[Any]:
+		"""Get an entry and mark it as recently used"""
+		with self._lock:
+			if key not in self._data:
+				return None
+			self._data.move_to_end(key)
+			return self._data[key]
+
+	def set(self, key: str, value: Any):
+		"""Set an entry, evicting the least recently used one if full"""
+		with self._lock:
+			self._data[key] = value
+			self._data.move_to_end(key)
+			while len(self._data) > self.maxsize:
+				self._data.popitem(last=False)
+
+	def delete(self, key: str):
+		"""Remove an entry"""
+		with self._lock:
+			self._data.pop(key, None)
+
+	def clear(self):
+		"""Remove all entries"""
+		with self._lock:
+			self._data.clear()
+
+	def __len__(self) -> int:
+		return len(self._data)
+
+
+class TieredCache:
+	"""
+	In-process LRU backed by Redis, scoped to a namespace
+
+	A read checks the local LRU, then Redis; neither touches the database.
+	invalidate() bumps a namespace version stored in Redis so every process
+	drops its entries for the namespace within VERSION_CHECK_INTERVAL.
+	"""
+
+	def __init__(
+		self,
+		namespace: str,
+		maxsize: int = 256,
+		ttl: int = 3600,
+		stale_ttl: int = 0,
+		revalidate: Optional[str] = None
+	):
+		"""
+		Initialize tiered cache
+
+		Args:
+			namespace: Key prefix shared by all entries of this cache
+			maxsize: Size bound of the in-process tier
+			ttl: Default freshness in seconds
+			stale_ttl: Default seconds a value may be served stale after ttl
+			revalidate: Dotted path of a method enqueued as revalidate(key=...)
+				when a stale value is served
+		"""
+		self.namespace = namespace
+		self.ttl = ttl
+		self.stale_ttl = stale_ttl
+		self.revalidate = revalidate
+		self.local = LRUCache(maxsize)
+		self.stats_counters = {"local_hits": 0, "redis_hits": 0, "stale_hits": 0, "misses": 0}
+		self._versions = {}
+		self._revalidating = {}
+
+	# ==================== Keys and Versions ====================
+
+	def _version_key(self) -> str:
+		return f"tiered_cache:{self.namespace}:version"
+
+	def _get_version(self) -> int:
+		"""Get the namespace version, re-reading Redis at most every few seconds"""
+		site = getattr(frappe.local, "site", None)
+		cached = self._versions.get(site)
+		now = time.monotonic()
+
+		if cached and now - cached[1] < VERSION_CHECK_INTERVAL:
+			return cached[0]
+
+		version = int(frappe.cache().get_value(self._version_key()) or 0)
+		self._versions[site] = (version, now)
+		return version
+
+	def _keys(self, key: str):
+		"""Get (local key, redis key) for a cache key"""
+		version = self._get_version()
+		redis_key = f"tiered_cache:{self.namespace}:v{version}:{key}"
+		# The local tier is shared by all sites served by this process
+		return f"{getattr(frappe.local, 'site', '')}:{redis_key}", redis_key
+
+	# ==================== Read / Write ====================
+
+	def get(self, key: str, default: Any = None) -> Any:
+		"""
+		Get a cached value
+
+		Fresh values are returned as-is. Values inside the stale window are
+		returned too, and a revalidation job is enqueued for them.
+
+		Args:
+			key: Cache key
+			default: Returned on a miss or when the entry is fully expired
+
+		Returns:
+			Cached value or default
+		"""
+		entry, counter = self._lookup(key)
+		now = time.time()
+
+		if entry is None or now >= entry["stale_until"]:
+			self.stats_counters["misses"] += 1
+			return default
+
+		if now >= entry["expires_at"]:
+			self.stats_counters["stale_hits"] += 1
+			self._schedule_revalidate(key)
+			return entry["value"]
+
+		self.stats_counters[counter] += 1
+		return entry["value"]
+
+	def get_ttl(self, key: str) -> Optional[float]:
+		"""
+		Get the seconds left before an entry goes stale
+
+		Args:
+			key: Cache key
+
+		Returns:
+			Remaining freshness (negative once stale), or None if not cached
+		"""
+		entry, _ = self._lookup(key)
+
+		if entry is None or time.time() >= entry["stale_until"]:
+			return None
+		return entry["expires_at"] - time.time()
+
+	def _lookup(self, key: str):
+		"""
+		Get the entry for a key and the tier that served it
+
+		A fresh local entry is used as-is. A missing, stale or expired local
+		entry falls through to Redis, where another process or a
+		revalidation job may have stored a newer one.
+
+		Returns:
+			(entry or None, "local_hits" or "redis_hits")
+		"""
+		local_key, redis_key = self._keys(key)
+		entry = self.local.get(local_key)
+		if entry is not None and time.time() < entry["expires_at"]:
+			return entry, "local_hits"
+
+		remote = frappe.cache().get_value(redis_key)
+		if remote is None:
+			# Deleted or expired in Redis; the local copy is no longer authoritative
+			if entry is not None:
+				self.local.delete(local_key)
+			return None, "redis_hits"
+
+		if entry is None or remote["expires_at"] > entry["expires_at"]:
+			self.local.set(local_key, remote)
+			return remote, "redis_hits"
+
+		return entry, "local_hits"
+
+	def set(self, key: str, value: Any, ttl: Optional[int] = None, stale_ttl: Optional[int] = None):
+		"""
+		Set a cached value in both tiers
+
+		Args:
+			key: Cache key
+			value: Picklable value
+			ttl: Freshness in seconds (defaults to self.ttl)
+			stale_ttl: Stale window in seconds (defaults to self.stale_ttl)
+		"""
+		ttl = self.ttl if ttl is None else ttl
+		stale_ttl = self.stale_ttl if stale_ttl is None else stale_ttl
+		now = time.time()
+
+		entry = {
+			"value": value,
+			"expires_at": now + ttl,
+			"stale_until": now + ttl + stale_ttl
+		}
+
+		local_key, redis_key = self._keys(key)
+		self.local.set(local_key, entry)
+		frappe.cache().set_value(redis_key, entry, expires_in_sec=ttl + stale_ttl)
+		self._revalidating.pop(local_key, None)
+
+	def delete(self, key: str):
+		"""Delete a cached value from both tiers"""
+		local_key, redis_key = self._keys(key)
+		self.local.delete(local_key)
+		frappe.cache().delete_value(redis_key)
+
+	def invalidate(self):
+		"""Invalidate every entry in the namespace, across all processes"""
+		frappe.cache().set_value(self._version_key(), self._get_version() + 1)
+		self._versions.pop(getattr(frappe.local, "site", None), None)
+		self.local.clear()
+
+	def _schedule_revalidate(self, key: str):
+		"""Enqueue a background refresh for a stale key, at most once per throttle window"""
+		if not self.revalidate:
+			return
+
+		local_key, _ = self._keys(key)
+		now = time.monotonic()
+		if now - self._revalidating.get(local_key, -REVALIDATE_THROTTLE) < REVALIDATE_THROTTLE:
+			return
+
+		self._revalidating[local_key] = now
+		try:
+			frappe.enqueue(
+				self.revalidate,
+				queue="short",
+				job_id=f"revalidate:{self.namespace}:{key}",
+				deduplicate=True,
+				key=key
+			)
+		except Exception as e:
+			frappe.logger().warning(f"Failed to enqueue cache revalidation for {key}: {str(e)[:200]}")
+
+	def stats(self) -> Dict:
+		"""Get per-process hit/miss counters"""
+		return dict(self.stats_counters, local_size=len(self.local), local_maxsize=self.local.maxsize)
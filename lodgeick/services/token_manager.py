@@ -0,0 +1,283 @@
+"""
+Token Manager
+Serves decrypted OAuth access tokens from a per-process cache and keeps
+Integration Tokens fresh in the background, so workflow runs and API calls
+do not wait on a provider's token endpoint.
+
+- get_access_token caches the decrypted access token in process memory
+  until shortly before it expires (at most CACHE_TTL seconds). Each token
+  has a version in Redis; invalidate() bumps it so every process drops its
+  copy on the next read.
+- get_connection_status checks that a usable token exists without
+  decrypting or refreshing it, for read-only endpoints.
+- refresh_expiring_tokens (scheduled) refreshes tokens that expire within
+  REFRESH_AHEAD seconds, one background job per provider.
+- Refreshes of the same (user, provider) are serialized with a Redis lock;
+  a caller that finds a refresh in progress waits for its result instead
+  of starting another.
+"""
+
+import frappe
+import time
+from datetime import timedelta
+from frappe.utils import get_datetime, now_datetime
+from frappe.utils.password import get_decrypted_password
+
+
+CACHE_TTL = 300
+
+# Tokens this close to expiry are never served from the cache
+EXPIRY_MARGIN = 60
+
+# Tokens expiring within this window are refreshed by the scheduler
+REFRESH_AHEAD = 900
+
+# Tokens that expired longer ago than this are left alone (refresh token likely revoked)
+REFRESH_GIVE_UP = 86400
+
+REFRESH_LOCK_SECONDS = 60
+REFRESH_WAIT_SECONDS = 10
+
+VERSION_KEY = "token_version:{user}:{provider}"
+VERSION_TTL = 86400
+
+_token_cache = {}
+
+
+def get_access_token(user, provider):
+	"""
+	Get a user's decrypted access token for a provider
+
+	Tokens about to expire are refreshed in the background; only a token
+	that has already (nearly) expired is refreshed (and committed) before
+	returning.
+
+	Args:
+		user: Frappe user
+		provider: OAuth provider
+
+	Returns:
+		str: Access token, or None if the user has not connected the provider
+			or the token could not be refreshed (the user has to reconnect)
+	"""
+	key = _get_cache_key(user, provider)
+	version = _get_version(user, provider)
+	cached = _token_cache.get(key)
+	if cached and cached[1] > time.monotonic() and cached[2] == version:
+		return cached[0]
+
+	token = frappe.db.get_value(
+		"Integration Token", {"user": user, "provider": provider}, ["name", "expires_at"], as_dict=True
+	)
+	if not token:
+		return None
+
+	seconds_left = _get_seconds_left(token.expires_at)
+	if seconds_left is not None and seconds_left <= EXPIRY_MARGIN:
+		# The scheduler should have refreshed this already; do it now as a last resort
+		try:
+			refresh_user_token(user, provider)
+		except Exception as e:
+			frappe.log_error(f"Failed to refresh {provider} token for {user}: {str(e)}", "Token Refresh Error")
+			return None
+		token.expires_at = frappe.db.get_value("Integration Token", token.name, "expires_at")
+		seconds_left = _get_seconds_left(token.expires_at)
+	elif seconds_left is not None and seconds_left <= REFRESH_AHEAD:
+		schedule_provider_refresh(provider)
+
+	access_token = get_decrypted_password("Integration Token", token.name, "access_token", raise_exception=False)
+
+	ttl = CACHE_TTL if seconds_left is None else min(CACHE_TTL, seconds_left - EXPIRY_MARGIN)
+	if access_token and ttl > 0:
+		_token_cache[key] = (access_token, time.monotonic() + ttl, version)
+
+	return access_token
+
+
+def get_connection_status(user, provider):
+	"""
+	Check whether a user's connection to a provider is usable, without refreshing it
+
+	An expired token that has a refresh token counts as connected; its
+	refresh is scheduled in the background.
+
+	Args:
+		user: Frappe user
+		provider: OAuth provider
+
+	Returns:
+		str: "connected", "expired" (the user has to reconnect) or None if not connected
+	"""
+	token = frappe.db.get_value(
+		"Integration Token", {"user": user, "provider": provider}, ["expires_at", "refresh_token"], as_dict=True
+	)
+	if not token:
+		return None
+
+	seconds_left = _get_seconds_left(token.expires_at)
+	if seconds_left is None or seconds_left > REFRESH_AHEAD:
+		return "connected"
+
+	if not token.refresh_token or seconds_left < -REFRESH_GIVE_UP:
+		return "connected" if seconds_left > 0 else "expired"
+
+	schedule_provider_refresh(provider)
+	return "connected"
+
+
+def invalidate(user, provider):
+	"""Drop a cached access token in every process"""
+	_token_cache.pop(_get_cache_key(user, provider), None)
+
+	cache = frappe.cache()
+	version_key = cache.make_key(VERSION_KEY.format(user=user, provider=provider))
+	pipeline = cache.pipeline()
+	pipeline.incr(version_key)
+	pipeline.expire(version_key, VERSION_TTL)
+	pipeline.execute()
+
+
+def refresh_user_token(user, provider, provider_config=None):
+	"""
+	Refresh a user's token, collapsing concurrent refreshes into one
+
+	If another process is already refreshing the token, waits for it to
+	finish and reports whether it moved the token's expiry forward.
+
+	Args:
+		user: Frappe user
+		provider: OAuth provider
+		provider_config: Provider config (loaded if omitted)
+
+	Returns:
+		bool: True if the token was refreshed, by this call or the one it waited for
+	"""
+	from lodgeick.api.oauth import refresh_token_doc
+
+	cache = frappe.cache()
+	lock_key = cache.make_key(f"token_refresh:{user}:{provider}")
+	expires_before = _get_expires_at(user, provider)
+
+	if not cache.set(lock_key, 1, nx=True, ex=REFRESH_LOCK_SECONDS):
+		deadline = time.monotonic() + REFRESH_WAIT_SECONDS
+		while cache.get(lock_key) and time.monotonic() < deadline:
+			time.sleep(0.2)
+		invalidate(user, provider)
+
+		# A locking read sees the other process's commit despite this transaction's snapshot
+		expires_after = _get_expires_at(user, provider, for_update=True)
+		if not expires_after:
+			return False
+		return not expires_before or get_datetime(expires_after) > get_datetime(expires_before)
+
+	try:
+		token_doc = frappe.get_doc("Integration Token", {"user": user, "provider": provider})
+		refresh_token_doc(token_doc, provider_config)
+		frappe.db.commit()
+	finally:
+		cache.delete(lock_key)
+
+	invalidate(user, provider)
+	return True
+
+
+def schedule_provider_refresh(provider):
+	"""Enqueue the refresh of a provider's expiring tokens unless already queued"""
+	frappe.enqueue(
+		"lodgeick.services.token_manager.refresh_provider_tokens",
+		queue="long",
+		job_id=f"token_refresh:{provider}",
+		deduplicate=True,
+		provider=provider
+	)
+
+
+def refresh_expiring_tokens():
+	"""
+	Scheduled job: enqueue a refresh job for each provider with expiring tokens
+
+	Returns:
+		dict: Number of expiring tokens per provider
+	"""
+	providers = {}
+	for row in frappe.get_all(
+		"Integration Token",
+		filters=_get_expiring_filters(),
+		fields=["provider", "count(name) as tokens"],
+		group_by="provider"
+	):
+		providers[row.provider] = row.tokens
+		schedule_provider_refresh(row.provider)
+
+	return {"success": True, "providers": providers}
+
+
+def refresh_provider_tokens(provider):
+	"""
+	Background job: refresh all expiring tokens of one provider
+
+	The provider config is loaded once for the whole batch. A token that
+	fails to refresh is logged and skipped.
+
+	Returns:
+		dict: Counts of refreshed, skipped and failed tokens
+	"""
+	from lodgeick.api.oauth import get_provider_config
+
+	provider_config = get_provider_config(provider)
+	if not provider_config:
+		return {"success": False, "error": f"Provider {provider} not configured"}
+
+	users = frappe.get_all(
+		"Integration Token",
+		filters=dict(_get_expiring_filters(), provider=provider),
+		pluck="user",
+		order_by="expires_at asc"
+	)
+
+	summary = {"refreshed": 0, "skipped": 0, "failed": 0}
+	for user in users:
+		try:
+			if refresh_user_token(user, provider, provider_config):
+				summary["refreshed"] += 1
+			else:
+				# Another process was refreshing it and did not finish in time
+				summary["skipped"] += 1
+		except Exception as e:
+			frappe.db.rollback()
+			summary["failed"] += 1
+			frappe.log_error(f"Failed to refresh {provider} token for {user}: {str(e)}", "Token Refresh Error")
+
+	if summary["refreshed"] or summary["failed"]:
+		frappe.logger().info(f"Refreshed {provider} tokens: {summary}")
+
+	return dict(summary, success=True)
+
+
+def _get_expiring_filters():
+	now = now_datetime()
+	return {
+		"expires_at": ["between", [now - timedelta(seconds=REFRESH_GIVE_UP), now + timedelta(seconds=REFRESH_AHEAD)]],
+		"refresh_token": ["is", "set"]
+	}
+
+
+def _get_expires_at(user, provider, for_update=False):
+	return frappe.db.get_value(
+		"Integration Token", {"user": user, "provider": provider}, "expires_at", for_update=for_update
+	)
+
+
+def _get_seconds_left(expires_at):
+	if not expires_at:
+		return None
+	return (get_datetime(expires_at) - now_datetime()).total_seconds()
+
+
+def _get_version(user, provider):
+	cache = frappe.cache()
+	return int(cache.get(cache.make_key(VERSION_KEY.format(user=user, provider=provider))) or 0)
+
+
+def _get_cache_key(user, provider):
+	return (getattr(frappe.local, "site", None), user, provider)
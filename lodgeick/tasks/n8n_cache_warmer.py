@@ -0,0 +1,94 @@
+"""
+n8n Node Cache Warmer
+Refreshes cached node types, the app list and per-app node catalogs before
+they expire, so user requests never have to fetch them from n8n
+"""
+
+import frappe
+from lodgeick.services.n8n_client import N8NCircuitOpenError, get_n8n_client
+from lodgeick.services.n8n_async_client import get_async_n8n_client, run_async
+from lodgeick.services.n8n_cache import get_cache_ttl, set_cached_node_types, set_cached_node_catalog
+from lodgeick.services.n8n_catalog import compile_node_catalog
+
+
+# Entries with less freshness than this left are refreshed. Must exceed the
+# scheduler interval (hourly) so entries never lapse between runs.
+WARM_AHEAD_HOURS = 3
+
+
+def warm_node_cache(force=False):
+	"""
+	Scheduled job to refresh n8n node metadata ahead of expiry
+
+	Args:
+		force: Refresh every entry regardless of remaining freshness
+
+	Returns:
+		dict: Summary of refreshed, skipped and failed entries
+	"""
+	n8n = get_n8n_client()
+
+	if not n8n.is_enabled():
+		frappe.logger().info("n8n is not enabled, skipping cache warm-up")
+		return {"success": False, "error": "n8n is not enabled"}
+
+	from lodgeick.api.resources import APP_NODE_TYPES, extract_apps_from_nodes
+
+	refreshed = []
+	skipped = 0
+	errors = []
+
+	try:
+		# Node types and the app list derived from them
+		if force or _needs_refresh("node_types"):
+			set_cached_node_types(extract_apps_from_nodes(n8n.get_node_types()))
+			refreshed.append("node_types")
+		else:
+			skipped += 1
+
+		# Catalogs of every app with a known node type, fetched in parallel
+		due = []
+		for node_type in sorted(set(APP_NODE_TYPES.values())):
+			if force or _needs_refresh(f"node_catalog_{node_type}"):
+				due.append(node_type)
+			else:
+				skipped += 1
+
+		if due:
+			async_client = get_async_n8n_client()
+			results = run_async(async_client.gather([async_client.get_node_type(node_type) for node_type in due]))
+
+			for node_type, result in zip(due, results):
+				if isinstance(result, Exception):
+					errors.append(f"{node_type}: {str(result)[:200]}")
+					continue
+				set_cached_node_catalog(node_type, compile_node_catalog(result))
+				refreshed.append(node_type)
+
+	except N8NCircuitOpenError as e:
+		frappe.logger().warning(f"n8n cache warm-up stopped, circuit open: {str(e)[:200]}")
+		return {"success": False, "error": str(e), "circuit_open": True, "refreshed": len(refreshed)}
+
+	except Exception as e:
+		frappe.log_error(f"n8n cache warm-up failed: {str(e)}", "n8n Cache Warmer Error")
+		return {"success": False, "error": str(e), "refreshed": len(refreshed)}
+
+	if errors:
+		frappe.log_error("\n".join(errors), "n8n Cache Warmer Error")
+
+	summary = {
+		"success": not errors,
+		"refreshed": len(refreshed),
+		"skipped": skipped,
+		"errors": len(errors)
+	}
+
+	frappe.logger().info(f"n8n cache warm-up completed: {summary}")
+
+	return summary
+
+
+def _needs_refresh(cache_key):
+	"""Check if an entry is missing or close to expiry"""
+	ttl = get_cache_ttl(cache_key)
+	return ttl is None or ttl < WARM_AHEAD_HOURS * 3600
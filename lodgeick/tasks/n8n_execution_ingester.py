@@ -0,0 +1,286 @@
+"""
+N8N Execution Ingester
+Streams new n8n executions into the Integration Execution doctype, so
+execution history, stats and alerting read a local table instead of
+listing executions from n8n.
+
+n8n execution IDs increase monotonically, so a single site-wide high-water
+mark is enough: each run pages newest first and stops at the mark. n8n
+does not list executions that are still running, so the mark never passes
+an ID missing from the listing; later runs re-read from there until the
+execution shows up or MISSING_EXECUTION_WAIT has passed.
+"""
+
+import frappe
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from frappe.utils import add_days, get_system_timezone, now_datetime
+from lodgeick.services.n8n_client import N8NCircuitOpenError, get_n8n_client
+from lodgeick.services.n8n_async_client import get_async_n8n_client, run_async
+
+
+EXECUTION_DOCTYPE = "Integration Execution"
+MARK_KEY = "n8n_execution_mark"
+
+SCAN_PAGE_SIZE = 250
+INSERT_BATCH_SIZE = 500
+
+# Without a mark (first run), only this much history is backfilled
+BACKFILL_DAYS = 7
+
+# Executions ingested before they finished are re-read until they do
+UNFINISHED_STATUSES = ("new", "running", "waiting")
+UNFINISHED_RECHECK_LIMIT = 200
+UNFINISHED_RECHECK_DAYS = 1
+
+# How long the mark waits for an execution missing from the listing (still
+# running, or deleted), measured from the start of the next listed execution
+MISSING_EXECUTION_WAIT = timedelta(days=1)
+
+DEFAULT_RETENTION_DAYS = 90
+
+_INSERT_FIELDS = (
+	"name", "creation", "modified", "owner", "modified_by",
+	"execution_id", "integration", "user", "workflow_id", "status", "mode", "started_at", "stopped_at"
+)
+
+
+def ingest_executions():
+	"""
+	Scheduled job: copy executions newer than the high-water mark
+
+	Executions are inserted in batches as they stream in, ignoring ones
+	already stored, and the mark only advances once the whole gap has been
+	read, so an interrupted run is simply repeated. It stops below the
+	oldest execution ID not listed yet (see _get_new_mark). Afterwards the
+	daily execution stats are refreshed from the table.
+
+	Returns:
+		dict: Executions read, inserted and refreshed, and the new mark
+	"""
+	client = get_n8n_client()
+	if not client.is_enabled():
+		return
+
+	system_tz = ZoneInfo(get_system_timezone())
+	mark = int(frappe.db.get_global(MARK_KEY) or 0)
+	new_mark = mark
+	seen = {}
+
+	# n8n's execution list has no start-time filter, so the backfill stops client-side
+	cutoff = None if mark else datetime.now(timezone.utc) - timedelta(days=BACKFILL_DAYS)
+
+	read = inserted = refreshed = 0
+	batch = []
+
+	try:
+		for execution in client.iter_executions(limit=SCAN_PAGE_SIZE):
+			execution_id = int(execution.get("id"))
+			if execution_id <= mark:
+				# Newest first: everything after this was ingested before
+				break
+
+			if cutoff:
+				started_at = parse_timestamp(execution.get("startedAt"))
+				if started_at and started_at < cutoff:
+					break
+
+			seen[execution_id] = parse_timestamp(execution.get("startedAt"))
+			batch.append(execution)
+			read += 1
+
+			if len(batch) >= INSERT_BATCH_SIZE:
+				inserted += _insert_executions(batch, system_tz)
+				batch = []
+
+		inserted += _insert_executions(batch, system_tz)
+		refreshed = _refresh_unfinished(system_tz)
+		new_mark = _get_new_mark(mark, seen)
+
+	except N8NCircuitOpenError as e:
+		# Keep the mark; the next run re-reads the gap and skips what was stored
+		frappe.logger().warning(f"Execution ingest paused after {read} executions, n8n unavailable: {str(e)}")
+		return {"success": False, "error": str(e), "circuit_open": True, "read": read, "inserted": inserted}
+
+	if new_mark != mark:
+		frappe.db.set_global(MARK_KEY, new_mark)
+	frappe.db.commit()
+
+	from lodgeick.tasks.n8n_execution_stats import refresh_execution_stats
+	refresh_execution_stats()
+
+	frappe.logger().info(
+		f"Ingested n8n executions: {read} read, {inserted} stored, {refreshed} refreshed, mark {new_mark}"
+	)
+
+	return {"success": True, "read": read, "inserted": inserted, "refreshed": refreshed, "mark": new_mark}
+
+
+def _get_new_mark(mark, seen):
+	"""
+	Get the highest ID below which every execution has been ingested
+
+	IDs between the mark and the newest execution that were not listed
+	belong to executions still running; the mark stays below the oldest of
+	them so the next run reads it once it finishes. A missing ID is given up
+	on once the execution listed after it started MISSING_EXECUTION_WAIT ago.
+
+	Args:
+		mark: Current mark (0 on the first run)
+		seen: Execution ID -> startedAt of every execution read above the mark
+
+	Returns:
+		int: New mark
+	"""
+	if not seen:
+		return mark
+
+	give_up_before = datetime.now(timezone.utc) - MISSING_EXECUTION_WAIT
+	# The backfill has no lower bound, so gaps below its oldest execution don't count
+	expected = mark + 1 if mark else min(seen)
+
+	for execution_id in sorted(seen):
+		if execution_id > expected:
+			started_at = seen[execution_id]
+			if started_at is None or started_at >= give_up_before:
+				return expected - 1
+		expected = execution_id + 1
+
+	return max(seen)
+
+
+def _insert_executions(executions, system_tz):
+	"""
+	Bulk insert executions of Lodgeick workflows and commit
+
+	Returns:
+		Number of executions belonging to an integration
+	"""
+	if not executions:
+		return 0
+
+	integrations = get_integrations_by_workflow({str(execution.get("workflowId")) for execution in executions})
+	now = now_datetime()
+
+	values = []
+	for execution in executions:
+		integration = integrations.get(str(execution.get("workflowId")))
+		if not integration:
+			continue
+
+		execution_id = str(execution.get("id"))
+		values.append((
+			execution_id, now, now, "Administrator", "Administrator",
+			execution_id,
+			integration.name,
+			integration.user,
+			str(execution.get("workflowId")),
+			get_execution_status(execution),
+			execution.get("mode"),
+			to_system_datetime(execution.get("startedAt"), system_tz),
+			to_system_datetime(execution.get("stoppedAt"), system_tz)
+		))
+
+	if values:
+		frappe.db.bulk_insert(EXECUTION_DOCTYPE, _INSERT_FIELDS, values, ignore_duplicates=True)
+		frappe.db.commit()
+
+	return len(values)
+
+
+def _refresh_unfinished(system_tz):
+	"""
+	Re-read recent executions that were stored before they finished
+
+	Returns:
+		Number of executions updated
+	"""
+	unfinished = frappe.get_all(
+		EXECUTION_DOCTYPE,
+		filters={
+			"status": ["in", UNFINISHED_STATUSES],
+			"started_at": [">=", add_days(now_datetime(), -UNFINISHED_RECHECK_DAYS)]
+		},
+		pluck="name",
+		order_by="started_at asc",
+		limit_page_length=UNFINISHED_RECHECK_LIMIT
+	)
+	if not unfinished:
+		return 0
+
+	async_client = get_async_n8n_client()
+	results = run_async(async_client.gather([
+		async_client.get_execution(execution_id) for execution_id in unfinished
+	]))
+
+	updated = 0
+	for execution_id, execution in zip(unfinished, results):
+		if isinstance(execution, N8NCircuitOpenError):
+			raise execution
+		if isinstance(execution, Exception):
+			continue
+
+		status = get_execution_status(execution)
+		if status in UNFINISHED_STATUSES:
+			continue
+
+		frappe.db.set_value(EXECUTION_DOCTYPE, execution_id, {
+			"status": status,
+			"stopped_at": to_system_datetime(execution.get("stoppedAt"), system_tz)
+		}, update_modified=False)
+		updated += 1
+
+	frappe.db.commit()
+	return updated
+
+
+def purge_old_executions():
+	"""Scheduled job: delete executions older than the retention period"""
+	retention_days = int(frappe.conf.get("n8n_execution_retention_days", DEFAULT_RETENTION_DAYS))
+	frappe.db.delete(EXECUTION_DOCTYPE, {"started_at": ["<", add_days(now_datetime(), -retention_days)]})
+	frappe.db.commit()
+
+
+def get_execution_status(execution):
+	"""Get an execution's status, deriving it on n8n versions without `status`"""
+	status = execution.get("status")
+	if status:
+		return status
+	if execution.get("finished"):
+		return "success"
+	return "error" if execution.get("stoppedAt") else "running"
+
+
+def get_integrations_by_workflow(workflow_ids):
+	"""Map workflow IDs to (name, user) rows of their integrations"""
+	workflow_ids = list(workflow_ids)
+	integrations = {}
+	for start in range(0, len(workflow_ids), 500):
+		for row in frappe.get_all(
+			"User Integration",
+			fields=["name", "user", "workflow_id"],
+			filters={"workflow_id": ["in", workflow_ids[start:start + 500]]}
+		):
+			integrations[row.workflow_id] = row
+	return integrations
+
+
+def parse_timestamp(timestamp):
+	"""Parse an n8n ISO timestamp into an aware datetime (UTC if unqualified)"""
+	if not timestamp:
+		return None
+	try:
+		parsed = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+	except ValueError:
+		return None
+	if parsed.tzinfo is None:
+		parsed = parsed.replace(tzinfo=timezone.utc)
+	return parsed
+
+
+def to_system_datetime(timestamp, system_tz):
+	"""Convert an n8n ISO timestamp (UTC) to a naive system-timezone datetime"""
+	parsed = parse_timestamp(timestamp)
+	if parsed is None:
+		return None
+	return parsed.astimezone(system_tz).replace(tzinfo=None)
@@ -0,0 +1,48 @@
+"""
+N8N Execution Stats Refresh
+Recomputes the recent daily execution counters of every integration from
+the local Integration Execution table, so the dashboard never has to query
+n8n itself.
+"""
+
+import frappe
+from frappe.utils import add_days, getdate
+from lodgeick.services.execution_stats import set_daily_stats
+
+
+# Days recomputed on every run (today and yesterday, so executions that
+# finished around midnight or were ingested late still land correctly)
+REFRESH_DAYS = 2
+
+FAILED_STATUSES = ("error", "crashed", "canceled")
+
+
+def refresh_execution_stats():
+	"""
+	Rebuild recent Integration Execution Stats with one aggregate query
+
+	Called by the execution ingester after each run.
+
+	Returns:
+		dict: Number of stats rows written
+	"""
+	since = add_days(getdate(), -(REFRESH_DAYS - 1))
+
+	rows = frappe.db.sql("""
+		SELECT
+			integration,
+			user,
+			DATE(started_at) AS date,
+			COUNT(*) AS executions,
+			SUM(status = 'success') AS successes,
+			SUM(status IN %(failed)s) AS failures,
+			MAX(started_at) AS last_execution_at
+		FROM `tabIntegration Execution`
+		WHERE started_at >= %(since)s
+		GROUP BY integration, user, DATE(started_at)
+	""", {"since": since, "failed": FAILED_STATUSES}, as_dict=True)
+
+	set_daily_stats(rows)
+	frappe.db.commit()
+
+	return {"success": True, "rows": len(rows)}
@@ -4,14 +4,37 @@ Validates and syncs integrations between Lodgeick and n8n
 """
 
 import frappe
-from lodgeick.services.n8n_client import get_n8n_client
+import time
+from datetime import timedelta
+from frappe.utils import get_datetime, now_datetime
+from lodgeick.services.n8n_client import N8NCircuitOpenError, get_n8n_client
+from lodgeick.services.n8n_async_client import get_async_n8n_client, run_async
 from lodgeick.services.n8n_sync import get_n8n_sync_service
 
 
+# Row fields needed to diff an integration and rebuild its workflow
+SYNC_FIELDS = ["name", "workflow_id", "workflow_hash", "status", "flow_name", "source_app", "target_app", "config"]
+
+WATERMARK_KEY = "n8n_sync_watermark"
+
+# Re-check changes this far before the watermark, so rows committed late by
+# long transactions (with an earlier `modified`) are not missed
+WATERMARK_OVERLAP_SECONDS = 120
+
+# Largest page size accepted by the n8n public API
+SCAN_PAGE_SIZE = 250
+
+
 def sync_all_integrations():
 	"""
-	Periodic job to validate and sync all integrations with n8n
+	Validate and sync all integrations with n8n in a single job
 	Fixes any mismatches between Lodgeick and n8n
+
+	The scheduled reconciliation runs sharded (see n8n_sync_shards); this
+	single-job variant is kept for small sites and manual runs.
+
+	The diff against n8n is computed from bulk-fetched rows; full documents
+	are only loaded for integrations whose workflow has to be recreated.
 	"""
 	if not frappe.conf.get("n8n_auto_sync", True):
 		frappe.logger().info("N8N auto-sync is disabled, skipping sync job")
@@ -19,8 +42,13 @@ def sync_all_integrations():
 
 	frappe.logger().info("Starting n8n sync job...")
 
+	started_at = now_datetime()
+	timings = {}
+	end_phase = phase_timer(timings)
+
 	try:
 		client = get_n8n_client()
+		async_client = get_async_n8n_client()
 		sync_service = get_n8n_sync_service()
 
 		# Get all n8n workflows
@@ -30,81 +58,48 @@ def sync_all_integrations():
 		# Get all Lodgeick integrations
 		integrations = frappe.get_all(
 			"User Integration",
-			fields=["name", "workflow_id", "status", "flow_name"],
+			fields=SYNC_FIELDS,
 			filters={"workflow_id": ["!=", ""]}
 		)
+		end_phase("fetch")
+
+		missing, status_changes = diff_integrations(integrations, n8n_workflow_ids)
+		drifted = find_content_drift(integrations, missing, sync_service)
+		end_phase("diff")
 
-		synced_count = 0
-		created_count = 0
-		deleted_count = 0
-		error_count = 0
-
-		# Sync Lodgeick integrations to n8n
-		for integration in integrations:
-			try:
-				integration_doc = frappe.get_doc("User Integration", integration.name)
-
-				if integration.workflow_id:
-					# Check if workflow exists in n8n
-					if integration.workflow_id in n8n_workflow_ids:
-						# Workflow exists, verify it's in sync
-						n8n_workflow = n8n_workflow_ids[integration.workflow_id]
-
-						# Check if status matches
-						n8n_active = n8n_workflow.get("active", False)
-						lodgeick_active = integration.status == "Active"
-
-						if n8n_active != lodgeick_active:
-							# Sync status
-							sync_service.sync_integration_status(integration_doc, integration.status)
-							synced_count += 1
-							frappe.logger().info(f"Synced status for integration {integration.name}")
-
-						# Remove from dict so we know it's accounted for
-						del n8n_workflow_ids[integration.workflow_id]
-					else:
-						# Workflow doesn't exist in n8n, recreate it
-						frappe.logger().warning(f"Workflow {integration.workflow_id} missing in n8n, recreating...")
-						sync_service.sync_integration_create(integration_doc)
-						created_count += 1
-				else:
-					# Integration has no workflow, create one
-					sync_service.sync_integration_create(integration_doc)
-					created_count += 1
-
-			except Exception as e:
-				error_count += 1
-				frappe.log_error(
-					f"Failed to sync integration {integration.name}: {str(e)}",
-					"N8N Sync Job Error"
-				)
-
-		# Check for orphaned workflows in n8n (workflows that don't have corresponding integrations)
-		if n8n_workflow_ids:
-			for workflow_id, workflow in n8n_workflow_ids.items():
-				workflow_name = workflow.get("name", "")
-
-				# Only delete workflows created by Lodgeick
-				if workflow_name.startswith("Lodgeick:"):
-					try:
-						frappe.logger().warning(f"Found orphaned n8n workflow {workflow_id}, deleting...")
-						client.delete_workflow(workflow_id)
-						deleted_count += 1
-					except Exception as e:
-						frappe.log_error(
-							f"Failed to delete orphaned workflow {workflow_id}: {str(e)}",
-							"N8N Sync Job Error"
-						)
-
-		summary = f"N8N sync job completed: {synced_count} synced, {created_count} created, {deleted_count} deleted, {error_count} errors"
+		counts = new_sync_counts()
+
+		# Recreate missing workflows, loading each document only now
+		create_missing_workflows(missing, client, sync_service, counts)
+		end_phase("create")
+
+		# Push workflows whose content no longer matches the last push
+		push_content_updates(drifted, async_client, sync_service, counts)
+		end_phase("update")
+
+		# Push status changes to n8n in parallel (rows carry everything needed)
+		push_status_changes(status_changes, async_client, counts)
+		end_phase("status")
+
+		# Whatever is left in n8n_workflow_ids has no corresponding integration
+		delete_orphaned_workflows(n8n_workflow_ids, async_client, counts)
+		end_phase("orphans")
+
+		if not counts["errors"] and not counts["skipped"]:
+			set_sync_watermark(started_at, max((wf.get("updatedAt") or "" for wf in n8n_workflows), default=""))
+
+		summary = f"N8N sync job completed: {counts['synced']} synced, {counts['created']} created, {counts['updated']} updated, {counts['deleted']} deleted, {counts['errors']} errors, {counts['skipped']} skipped ({timings})"
 		frappe.logger().info(summary)
 
+		return dict(counts, success=True, timings=timings)
+
+	except N8NCircuitOpenError as e:
+		frappe.logger().warning(f"N8N sync job skipped, n8n unavailable: {str(e)}")
 		return {
-			"success": True,
-			"synced": synced_count,
-			"created": created_count,
-			"deleted": deleted_count,
-			"errors": error_count
+			"success": False,
+			"error": str(e),
+			"circuit_open": True,
+			"timings": timings
 		}
 
 	except Exception as e:
@@ -112,25 +107,393 @@ def sync_all_integrations():
 		frappe.log_error(error_msg, "N8N Sync Job Error")
 		return {
 			"success": False,
-			"error": str(e)
+			"error": str(e),
+			"timings": timings
+		}
+
+
+def sync_changed_integrations():
+	"""
+	Periodic job to reconcile only what changed since the last successful sync
+
+	Integrations modified after the watermark and n8n workflows updated after
+	it are diffed; everything else is assumed to be in sync. Orphaned
+	workflows are left to the full sweep (start_sync_run), which runs on a
+	slower cadence. Without a watermark a full sweep is started instead.
+
+	Returns:
+		dict: Summary with counts and per-phase timings
+	"""
+	if not frappe.conf.get("n8n_auto_sync", True):
+		frappe.logger().info("N8N auto-sync is disabled, skipping sync job")
+		return
+
+	watermark = get_sync_watermark()
+	if not watermark:
+		frappe.logger().info("No n8n sync watermark yet, starting a full sweep")
+		from lodgeick.tasks.n8n_sync_shards import start_sync_run
+		return start_sync_run()
+
+	# Restart shards of a full sweep that stopped while n8n was unavailable
+	from lodgeick.tasks.n8n_sync_shards import resume_active_runs
+	resume_active_runs()
+
+	started_at = now_datetime()
+	timings = {}
+	end_phase = phase_timer(timings)
+
+	try:
+		client = get_n8n_client()
+		async_client = get_async_n8n_client()
+		sync_service = get_n8n_sync_service()
+
+		# n8n has no updatedAt filter, so scan the (slimmed) list and keep what changed
+		n8n_workflow_ids = {}
+		changed_workflow_ids = []
+		updated_at = watermark.get("updated_at") or ""
+		max_updated_at = updated_at
+
+		for wf in client.iter_workflows(limit=SCAN_PAGE_SIZE, excludePinnedData="true"):
+			n8n_workflow_ids[wf.get("id")] = wf
+			wf_updated_at = wf.get("updatedAt") or ""
+			if wf_updated_at > updated_at:
+				changed_workflow_ids.append(wf.get("id"))
+			max_updated_at = max(max_updated_at, wf_updated_at)
+		end_phase("scan_n8n")
+
+		since = get_datetime(watermark["modified"]) - timedelta(seconds=WATERMARK_OVERLAP_SECONDS)
+
+		integrations = {
+			row.name: row for row in frappe.get_all(
+				"User Integration",
+				fields=SYNC_FIELDS,
+				filters={"workflow_id": ["!=", ""], "modified": [">", since]}
+			)
+		}
+		for start in range(0, len(changed_workflow_ids), 500):
+			for row in frappe.get_all(
+				"User Integration",
+				fields=SYNC_FIELDS,
+				filters={"workflow_id": ["in", changed_workflow_ids[start:start + 500]]}
+			):
+				integrations.setdefault(row.name, row)
+		end_phase("fetch")
+
+		rows = list(integrations.values())
+		missing, status_changes = diff_integrations(rows, n8n_workflow_ids)
+		drifted = find_content_drift(rows, missing, sync_service)
+		end_phase("diff")
+
+		counts = new_sync_counts()
+
+		create_missing_workflows(missing, client, sync_service, counts)
+		end_phase("create")
+
+		push_content_updates(drifted, async_client, sync_service, counts)
+		end_phase("update")
+
+		push_status_changes(status_changes, async_client, counts)
+		end_phase("status")
+
+		# Only advance the watermark when nothing needs another look
+		if not counts["errors"] and not counts["skipped"]:
+			set_sync_watermark(started_at, max_updated_at)
+
+		frappe.logger().info(
+			f"N8N incremental sync completed: {len(integrations)} changed integrations, "
+			f"{len(changed_workflow_ids)} changed workflows, {counts} ({timings})"
+		)
+
+		return dict(
+			counts,
+			success=True,
+			changed_integrations=len(integrations),
+			changed_workflows=len(changed_workflow_ids),
+			timings=timings
+		)
+
+	except N8NCircuitOpenError as e:
+		frappe.logger().warning(f"N8N incremental sync skipped, n8n unavailable: {str(e)}")
+		return {
+			"success": False,
+			"error": str(e),
+			"circuit_open": True,
+			"timings": timings
+		}
+
+	except Exception as e:
+		frappe.log_error(f"N8N incremental sync failed: {str(e)}", "N8N Sync Job Error")
+		return {
+			"success": False,
+			"error": str(e),
+			"timings": timings
 		}
 
 
+def get_sync_watermark():
+	"""
+	Get the point up to which everything is known to be in sync
+
+	Returns:
+		dict: {"modified": Frappe datetime string, "updated_at": n8n ISO timestamp}, or None
+	"""
+	value = frappe.db.get_global(WATERMARK_KEY)
+	return frappe.parse_json(value) if value else None
+
+
+def set_sync_watermark(modified, updated_at):
+	"""
+	Record a successful sync
+
+	Args:
+		modified: When the sync started (integrations modified after it are re-checked)
+		updated_at: Latest n8n workflow updatedAt seen by the sync
+	"""
+	frappe.db.set_global(WATERMARK_KEY, frappe.as_json({
+		"modified": str(modified),
+		"updated_at": updated_at or ""
+	}))
+	frappe.db.commit()
+
+
+def phase_timer(timings):
+	"""
+	Get a callable that records the time since the previous phase ended
+
+	Args:
+		timings: Dict that phase durations (seconds) are written into
+	"""
+	phase_started = time.monotonic()
+
+	def end_phase(phase):
+		nonlocal phase_started
+		now = time.monotonic()
+		timings[phase] = round(now - phase_started, 3)
+		phase_started = now
+
+	return end_phase
+
+
 def enqueue_sync_job():
 	"""
-	Enqueue sync job to run in background
+	Enqueue a sharded sync run in background
 	"""
 	frappe.enqueue(
-		"lodgeick.tasks.n8n_sync_job.sync_all_integrations",
+		"lodgeick.tasks.n8n_sync_shards.start_sync_run",
 		queue="default",
 		timeout=600,
 		is_async=True
 	)
 
 
-# Scheduler hooks (add to hooks.py)
-# scheduler_events = {
-#     "hourly": [
-#         "lodgeick.tasks.n8n_sync_job.sync_all_integrations"
-#     ]
-# }
+def new_sync_counts():
+	"""Get zeroed reconciliation counters"""
+	return {
+		"synced": 0, "created": 0, "updated": 0, "deleted": 0, "errors": 0, "skipped": 0
+	}
+
+
+def create_missing_workflows(missing, client, sync_service, counts):
+	"""
+	Recreate n8n workflows for integration rows
+
+	Workflows are provisioned straight from the rows (create, activate and
+	a single write-back); documents are never loaded.
+
+	Args:
+		missing: User Integration rows (SYNC_FIELDS) whose workflow is missing in n8n
+		client: N8NClient (its circuit breaker stops the loop when n8n is down)
+		sync_service: N8NSyncService
+		counts: Counters updated in place
+	"""
+	for integration in missing:
+		# n8n went down mid-run: leave the rest for the next run instead of
+		# marking every remaining integration as failed
+		if client.circuit_breaker.is_open():
+			counts["skipped"] += 1
+			continue
+
+		try:
+			if integration.workflow_id:
+				frappe.logger().warning(f"Workflow {integration.workflow_id} missing in n8n, recreating...")
+
+			sync_service.provision_workflow(integration)
+			counts["created"] += 1
+
+		except N8NCircuitOpenError:
+			counts["skipped"] += 1
+
+		except Exception as e:
+			counts["errors"] += 1
+			frappe.log_error(
+				f"Failed to sync integration {integration.name}: {str(e)}",
+				"N8N Sync Job Error"
+			)
+			sync_service.store_create_error(integration, e)
+
+
+def find_content_drift(integrations, missing, sync_service):
+	"""
+	Find integrations whose workflow content changed since it was last pushed
+
+	The workflow is rebuilt from the row and its hash compared with the
+	stored one, so no workflow bodies are fetched from n8n.
+
+	Args:
+		integrations: User Integration rows with SYNC_FIELDS
+		missing: Rows whose workflow is being recreated anyway
+		sync_service: N8NIntegrationSync
+
+	Returns:
+		list: (row, workflow_data, workflow_hash) for every drifted integration
+	"""
+	missing_names = {row.name for row in missing}
+	drifted = []
+
+	for integration in integrations:
+		if integration.name in missing_names:
+			continue
+
+		try:
+			workflow_data, workflow_hash = sync_service.build_workflow(integration)
+		except Exception as e:
+			frappe.logger().error(f"Failed to build workflow for integration {integration.name}: {str(e)[:200]}")
+			continue
+
+		if workflow_hash != integration.workflow_hash:
+			drifted.append((integration, workflow_data, workflow_hash))
+
+	return drifted
+
+
+def push_content_updates(drifted, async_client, sync_service, counts):
+	"""
+	PUT drifted workflows to n8n in parallel and record their new hashes
+
+	Args:
+		drifted: Output of find_content_drift()
+		async_client: AsyncN8NClient
+		sync_service: N8NIntegrationSync
+		counts: Counters updated in place
+	"""
+	if not drifted:
+		return
+
+	# Status is pushed separately; `active` is read-only on update
+	results = run_async(async_client.gather([
+		async_client.update_workflow(
+			integration.workflow_id,
+			{key: value for key, value in workflow_data.items() if key != "active"}
+		)
+		for integration, workflow_data, _ in drifted
+	]))
+
+	for (integration, _, workflow_hash), result in zip(drifted, results):
+		if isinstance(result, N8NCircuitOpenError):
+			counts["skipped"] += 1
+		elif isinstance(result, Exception):
+			counts["errors"] += 1
+			frappe.log_error(
+				f"Failed to update workflow for integration {integration.name}: {str(result)}",
+				"N8N Sync Job Error"
+			)
+		else:
+			counts["updated"] += 1
+			sync_service.store_workflow_hash(integration, workflow_hash)
+
+
+def push_status_changes(status_changes, async_client, counts):
+	"""
+	Activate or deactivate n8n workflows in parallel to match integration rows
+
+	Args:
+		status_changes: User Integration rows (name, workflow_id, status)
+		async_client: AsyncN8NClient
+		counts: Counters updated in place
+	"""
+	if not status_changes:
+		return
+
+	results = run_async(async_client.gather([
+		async_client.activate_workflow(integration.workflow_id)
+		if integration.status == "Active"
+		else async_client.deactivate_workflow(integration.workflow_id)
+		for integration in status_changes
+	]))
+
+	for integration, result in zip(status_changes, results):
+		if isinstance(result, N8NCircuitOpenError):
+			counts["skipped"] += 1
+		elif isinstance(result, Exception):
+			counts["errors"] += 1
+			frappe.log_error(
+				f"Failed to sync integration {integration.name}: {str(result)}",
+				"N8N Sync Job Error"
+			)
+		else:
+			counts["synced"] += 1
+			frappe.logger().info(f"Synced status for integration {integration.name}")
+
+
+def delete_orphaned_workflows(workflows, async_client, counts):
+	"""
+	Delete n8n workflows that have no corresponding integration
+
+	Only workflows created by Lodgeick (name prefixed "Lodgeick:") are deleted.
+
+	Args:
+		workflows: Unmatched n8n workflows keyed by ID
+		async_client: AsyncN8NClient
+		counts: Counters updated in place
+	"""
+	orphaned_ids = [
+		workflow_id for workflow_id, workflow in workflows.items()
+		if workflow.get("name", "").startswith("Lodgeick:")
+	]
+
+	if not orphaned_ids:
+		return
+
+	frappe.logger().warning(f"Found {len(orphaned_ids)} orphaned n8n workflows, deleting...")
+	results = run_async(async_client.gather([
+		async_client.delete_workflow(workflow_id) for workflow_id in orphaned_ids
+	]))
+
+	for workflow_id, result in zip(orphaned_ids, results):
+		if isinstance(result, N8NCircuitOpenError):
+			counts["skipped"] += 1
+		elif isinstance(result, Exception):
+			frappe.log_error(
+				f"Failed to delete orphaned workflow {workflow_id}: {str(result)}",
+				"N8N Sync Job Error"
+			)
+		else:
+			counts["deleted"] += 1
+
+
+def diff_integrations(integrations, n8n_workflow_ids):
+	"""
+	Compare integration rows against n8n workflows without touching the database
+
+	Workflows that match an integration are removed from `n8n_workflow_ids`,
+	so whatever is left afterwards has no corresponding integration.
+
+	Args:
+		integrations: User Integration rows (name, workflow_id, status)
+		n8n_workflow_ids: n8n workflows keyed by ID
+
+	Returns:
+		tuple: (rows whose workflow must be created, rows whose status differs)
+	"""
+	missing = []
+	status_changes = []
+
+	for integration in integrations:
+		workflow = n8n_workflow_ids.pop(integration.workflow_id, None) if integration.workflow_id else None
+
+		if workflow is None:
+			missing.append(integration)
+		elif workflow.get("active", False) != (integration.status == "Active"):
+			status_changes.append(integration)
+
+	return missing, status_changes
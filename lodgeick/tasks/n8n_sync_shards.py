@@ -0,0 +1,386 @@
+"""
+Sharded N8N Sync
+Splits reconciliation into name-range shards processed by parallel background
+jobs. Each shard checkpoints after every batch so a retried shard resumes where
+it stopped, and results are aggregated into one n8n Sync Run document.
+"""
+
+import frappe
+from frappe.utils import now_datetime
+from lodgeick.services.n8n_client import N8NCircuitOpenError, get_n8n_client
+from lodgeick.services.n8n_async_client import get_async_n8n_client
+from lodgeick.services.n8n_sync import get_n8n_sync_service
+from lodgeick.tasks.n8n_sync_job import (
+	new_sync_counts,
+	diff_integrations,
+	create_missing_workflows,
+	find_content_drift,
+	push_content_updates,
+	push_status_changes,
+	delete_orphaned_workflows,
+	set_sync_watermark,
+	SCAN_PAGE_SIZE,
+	SYNC_FIELDS
+)
+
+
+DEFAULT_SHARD_COUNT = 8
+DEFAULT_MAX_PARALLEL_SHARDS = 4
+SHARD_BATCH_SIZE = 500
+SHARD_TIMEOUT = 900
+
+# Run state (workflow snapshot, checkpoints, seen workflows) is kept in Redis
+# this long. Unfinished runs are resumed hourly, so this only has to outlast
+# an n8n outage; a run whose state expired is marked failed and the next
+# daily run starts a new one.
+RUN_STATE_TTL = 48 * 3600
+
+
+def start_sync_run():
+	"""
+	Scheduled job: start a full sharded reconciliation run, or resume the active one
+
+	Between full runs, sync_changed_integrations reconciles incrementally.
+
+	Returns:
+		dict: Run name and shard count
+	"""
+	if not frappe.conf.get("n8n_auto_sync", True):
+		frappe.logger().info("N8N auto-sync is disabled, skipping sync run")
+		return
+
+	resumed = resume_active_runs()
+	if resumed:
+		return {"success": True, "run": resumed[0], "resumed": True}
+
+	try:
+		client = get_n8n_client()
+
+		# Snapshot n8n once; shards diff against it instead of listing n8n again
+		workflows = {}
+		max_updated_at = ""
+		for wf in client.iter_workflows(limit=SCAN_PAGE_SIZE, excludePinnedData="true"):
+			workflows[wf.get("id")] = {"active": wf.get("active", False), "name": wf.get("name", "")}
+			max_updated_at = max(max_updated_at, wf.get("updatedAt") or "")
+
+		names = frappe.get_all(
+			"User Integration",
+			filters={"workflow_id": ["!=", ""]},
+			order_by="name asc",
+			pluck="name"
+		)
+
+	except N8NCircuitOpenError as e:
+		frappe.logger().warning(f"N8N sync run skipped, n8n unavailable: {str(e)}")
+		return {"success": False, "error": str(e), "circuit_open": True}
+
+	except Exception as e:
+		frappe.log_error(f"N8N sync run failed to start: {str(e)}", "N8N Sync Job Error")
+		return {"success": False, "error": str(e)}
+
+	shard_count = int(frappe.conf.get("n8n_sync_shards", DEFAULT_SHARD_COUNT))
+	shards = _split_ranges(names, shard_count)
+
+	run = frappe.get_doc({
+		"doctype": "n8n Sync Run",
+		"status": "Running",
+		"started_at": now_datetime(),
+		"shard_count": len(shards),
+		"integrations_total": len(names),
+		"workflows_total": len(workflows)
+	}).insert(ignore_permissions=True)
+
+	frappe.cache().set_value(
+		_key(run.name, "state"),
+		{"shards": shards, "workflows": workflows, "max_updated_at": max_updated_at},
+		expires_in_sec=RUN_STATE_TTL
+	)
+	frappe.db.commit()
+
+	frappe.logger().info(f"Started n8n sync run {run.name}: {len(names)} integrations in {len(shards)} shards")
+
+	if not shards:
+		_finalize_run(run.name)
+	else:
+		for _ in range(int(frappe.conf.get("n8n_sync_max_parallel_shards", DEFAULT_MAX_PARALLEL_SHARDS))):
+			if not _enqueue_next_shard(run.name, len(shards)):
+				break
+
+	return {"success": True, "run": run.name, "shards": len(shards)}
+
+
+def resume_active_runs():
+	"""
+	Resume every Running sync run, failing those whose state expired
+
+	Called by the hourly incremental sync too, so shards that stopped on an
+	open circuit continue within the hour instead of at the next daily run.
+
+	Returns:
+		list: Names of the resumed runs
+	"""
+	resumed = []
+	for run_name in frappe.get_all("n8n Sync Run", filters={"status": "Running"}, pluck="name"):
+		if _get_state(run_name) is None:
+			_fail_run(run_name, "Run state expired before all shards completed")
+			continue
+
+		resume_sync_run(run_name)
+		resumed.append(run_name)
+
+	return resumed
+
+
+def resume_sync_run(run_name):
+	"""
+	Re-enqueue unfinished shards of a run
+
+	Shards that are still queued or running are deduplicated by job ID, so
+	only shards whose job died are actually started again (from their
+	checkpoint). A run whose shards are all done but that was never
+	finalized (e.g. the finalize job failed) is finalized here.
+
+	Args:
+		run_name: n8n Sync Run name
+	"""
+	state = _get_state(run_name)
+	if state is None:
+		return
+
+	shard_count = len(state["shards"])
+	cache = frappe.cache()
+	claimed = min(int(cache.get(cache.make_key(_key(run_name, "next_shard"))) or 0), shard_count)
+
+	done = {
+		shard for shard in range(shard_count)
+		if cache.get(cache.make_key(_key(run_name, f"done:{shard}")))
+	}
+	if len(done) == shard_count:
+		_finalize_run(run_name)
+		return
+
+	for shard in range(claimed):
+		if shard not in done:
+			_enqueue_shard(run_name, shard)
+
+
+def sync_shard(run_name, shard):
+	"""
+	Background job: reconcile one shard of integrations in batches
+
+	Args:
+		run_name: n8n Sync Run name
+		shard: Index into the run's shard ranges
+	"""
+	state = _get_state(run_name)
+	if state is None:
+		_fail_run(run_name, "Run state expired before all shards completed")
+		return
+
+	first, last = state["shards"][shard]
+	workflows = state["workflows"]
+
+	cache = frappe.cache()
+	checkpoint_key = _key(run_name, f"checkpoint:{shard}")
+	checkpoint = cache.get_value(checkpoint_key) or {"last_name": None, "counts": new_sync_counts()}
+	counts = dict(new_sync_counts(), **checkpoint["counts"])
+	after = checkpoint["last_name"]
+
+	client = get_n8n_client()
+	async_client = get_async_n8n_client()
+	sync_service = get_n8n_sync_service()
+
+	while True:
+		# Leave the shard unfinished; the hourly sync resumes it
+		if client.circuit_breaker.is_open():
+			frappe.logger().warning(f"n8n unavailable, pausing sync run {run_name} shard {shard} after {after}")
+			return
+
+		filters = [
+			["workflow_id", "!=", ""],
+			["name", ">=", first],
+			["name", "<=", last]
+		]
+		if after:
+			filters.append(["name", ">", after])
+
+		rows = frappe.get_all(
+			"User Integration",
+			fields=SYNC_FIELDS,
+			filters=filters,
+			order_by="name asc",
+			limit_page_length=SHARD_BATCH_SIZE
+		)
+
+		if not rows:
+			break
+
+		batch_workflows = {row.workflow_id: workflows[row.workflow_id] for row in rows if row.workflow_id in workflows}
+		if batch_workflows:
+			cache.sadd(_key(run_name, "seen"), *batch_workflows)
+			cache.expire(cache.make_key(_key(run_name, "seen")), RUN_STATE_TTL)
+
+		missing, status_changes = diff_integrations(rows, batch_workflows)
+		drifted = find_content_drift(rows, missing, sync_service)
+		create_missing_workflows(missing, client, sync_service, counts)
+		push_content_updates(drifted, async_client, sync_service, counts)
+		push_status_changes(status_changes, async_client, counts)
+		frappe.db.commit()
+
+		after = rows[-1].name
+		cache.set_value(checkpoint_key, {"last_name": after, "counts": counts}, expires_in_sec=RUN_STATE_TTL)
+
+		if len(rows) < SHARD_BATCH_SIZE:
+			break
+
+	if _complete_shard(run_name, shard, counts):
+		_finalize_run(run_name)
+	else:
+		_enqueue_next_shard(run_name, len(state["shards"]))
+
+
+def _split_ranges(names, shard_count):
+	"""
+	Split sorted names into contiguous [first, last] ranges
+
+	Args:
+		names: Integration names in database order
+		shard_count: Desired number of shards
+
+	Returns:
+		list: [first, last] name pairs, at most one per name
+	"""
+	if not names:
+		return []
+
+	shard_count = max(1, min(shard_count, len(names)))
+	size = -(-len(names) // shard_count)
+
+	return [
+		[names[start], names[min(start + size, len(names)) - 1]]
+		for start in range(0, len(names), size)
+	]
+
+
+def _enqueue_next_shard(run_name, shard_count):
+	"""
+	Claim and enqueue the next shard that hasn't been started
+
+	Returns:
+		True if a shard was enqueued, False if all have been claimed
+	"""
+	cache = frappe.cache()
+	next_key = cache.make_key(_key(run_name, "next_shard"))
+	shard = cache.incr(next_key) - 1
+	cache.expire(next_key, RUN_STATE_TTL)
+
+	if shard >= shard_count:
+		return False
+
+	_enqueue_shard(run_name, shard)
+	return True
+
+
+def _enqueue_shard(run_name, shard):
+	frappe.enqueue(
+		"lodgeick.tasks.n8n_sync_shards.sync_shard",
+		queue="long",
+		timeout=SHARD_TIMEOUT,
+		job_id=f"n8n_sync_shard:{run_name}:{shard}",
+		deduplicate=True,
+		run_name=run_name,
+		shard=shard
+	)
+
+
+def _complete_shard(run_name, shard, counts):
+	"""
+	Add a finished shard's counters to the run, exactly once
+
+	Returns:
+		True if this was the last shard of the run
+	"""
+	cache = frappe.cache()
+	if not cache.set(cache.make_key(_key(run_name, f"done:{shard}")), 1, nx=True, ex=RUN_STATE_TTL):
+		return False
+
+	# Increment in SQL; the row lock serialises shards finishing together
+	frappe.db.sql("""
+		UPDATE `tabn8n Sync Run`
+		SET synced = synced + %(synced)s,
+			created = created + %(created)s,
+			updated = updated + %(updated)s,
+			errors = errors + %(errors)s,
+			skipped = skipped + %(skipped)s,
+			shards_completed = shards_completed + 1
+		WHERE name = %(name)s
+	""", dict(counts, name=run_name))
+
+	completed, shard_count = frappe.db.get_value("n8n Sync Run", run_name, ["shards_completed", "shard_count"])
+	frappe.db.commit()
+
+	return completed >= shard_count
+
+
+def _finalize_run(run_name):
+	"""Delete orphaned workflows once every shard is done and close the run"""
+	state = _get_state(run_name) or {"workflows": {}, "shards": []}
+	cache = frappe.cache()
+
+	seen = {
+		member.decode() if isinstance(member, bytes) else member
+		for member in cache.smembers(_key(run_name, "seen"))
+	}
+	unmatched = {
+		workflow_id: workflow for workflow_id, workflow in state["workflows"].items()
+		if workflow_id not in seen
+	}
+
+	counts = new_sync_counts()
+	delete_orphaned_workflows(unmatched, get_async_n8n_client(), counts)
+
+	run = frappe.get_doc("n8n Sync Run", run_name)
+	run.deleted = counts["deleted"]
+	run.errors += counts["errors"]
+	run.skipped += counts["skipped"]
+	run.status = "Completed"
+	run.completed_at = now_datetime()
+	run.save(ignore_permissions=True)
+
+	# A clean full sweep lets incremental syncs start from here
+	if not run.errors and not run.skipped:
+		set_sync_watermark(run.started_at, state.get("max_updated_at"))
+
+	frappe.db.commit()
+
+	_clear_state(run_name, len(state["shards"]))
+
+	frappe.logger().info(
+		f"n8n sync run {run_name} completed: {run.synced} synced, {run.created} created, {run.updated} updated, "
+		f"{run.deleted} deleted, {run.errors} errors, {run.skipped} skipped"
+	)
+
+
+def _fail_run(run_name, message):
+	"""Mark a run as failed"""
+	frappe.db.set_value("n8n Sync Run", run_name, {
+		"status": "Failed",
+		"completed_at": now_datetime(),
+		"error_message": message
+	})
+	frappe.db.commit()
+	frappe.logger().warning(f"n8n sync run {run_name} failed: {message}")
+
+
+def _get_state(run_name):
+	return frappe.cache().get_value(_key(run_name, "state"))
+
+
+def _clear_state(run_name, shard_count):
+	cache = frappe.cache()
+	cache.delete_value([_key(run_name, "state"), _key(run_name, "seen")])
+	cache.delete_value([_key(run_name, f"checkpoint:{shard}") for shard in range(shard_count)])
+
+
+def _key(run_name, suffix):
+	return f"n8n_sync_run:{run_name}:{suffix}"
@@ -30,7 +30,7 @@ class TestOAuthFlowIntegration(FrappeTestCase):
         # Clean up any test data
         frappe.db.rollback()
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     @patch('lodgeick.api.oauth.get_provider_config')
     def test_complete_oauth_flow(self, mock_get_config, mock_post):
         """Test complete OAuth flow: initiate -> callback -> token stored"""
@@ -98,7 +98,7 @@ class TestOAuthFlowIntegration(FrappeTestCase):
                 provider=self.provider
             )
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     @patch('lodgeick.api.oauth.get_provider_config')
     def test_oauth_flow_with_invalid_code(self, mock_get_config, mock_post):
         """Test OAuth flow with invalid authorization code"""
@@ -198,7 +198,7 @@ class TestOAuthFlowWithIntegrationSettings(FrappeTestCase):
         frappe.db.rollback()
 
     @patch('frappe.db.get_value')
-    @patch('requests.post')
+    @patch('requests.Session.post')
     @patch('lodgeick.api.oauth.get_provider_config')
     def test_oauth_creates_integration_settings(self, mock_get_config, mock_post, mock_db_get_value):
         """Test OAuth callback creates User Integration Settings"""
@@ -240,7 +240,7 @@ class TestOAuthFlowErrorRecovery(FrappeTestCase):
         frappe.set_user("Administrator")
         frappe.db.rollback()
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     @patch('lodgeick.api.oauth.get_provider_config')
     def test_oauth_flow_retry_after_failure(self, mock_get_config, mock_post):
         """Test user can retry OAuth flow after failure"""
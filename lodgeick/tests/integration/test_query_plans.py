@@ -0,0 +1,125 @@
+"""
+Query plan regression tests for the hot lookup paths
+Seeds large tables and asserts EXPLAIN picks the composite/unique indexes
+
+Tables are seeded with MariaDB's sequence engine; set
+LODGEICK_QUERY_PLAN_ROWS to use fewer rows than the default 1M locally.
+"""
+
+import os
+import unittest
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+
+ROWS = int(os.environ.get("LODGEICK_QUERY_PLAN_ROWS", 1000000))
+
+DOCTYPES = ("User Integration", "Integration Token", "Integration Log", "OAuth Usage Log")
+
+
+class TestHotPathQueryPlans(FrappeTestCase):
+    """Test lookups on large tables are served from an index"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        for module in ("user_integration", "integration_token", "integration_log", "oauth_usage_log"):
+            frappe.get_module(f"lodgeick.lodgeick.doctype.{module}.{module}").on_doctype_update()
+
+        base = "CONCAT('qp-', seq), NOW(), NOW(), 'Administrator', 'Administrator'"
+        columns = "name, creation, modified, owner, modified_by"
+
+        frappe.db.sql(f"""
+            INSERT INTO `tabUser Integration` ({columns}, user, flow_name, workflow_id, status)
+            SELECT {base}, CONCAT('qp', seq % 50000, '@example.com'), 'Flow', CONCAT('wf-', seq),
+                ELT(1 + seq % 4, 'Active', 'Paused', 'Error', 'Completed')
+            FROM seq_1_to_{ROWS}
+        """)
+        frappe.db.sql(f"""
+            INSERT INTO `tabIntegration Token` ({columns}, user, provider)
+            SELECT {base}, CONCAT('qp', seq, '@example.com'), ELT(1 + seq % 4, 'google', 'xero', 'slack', 'hubspot')
+            FROM seq_1_to_{ROWS}
+        """)
+        frappe.db.sql(f"""
+            INSERT INTO `tabIntegration Log` ({columns}, integration, status, timestamp)
+            SELECT {base}, CONCAT('qp-', seq % 50000), 'Success', NOW() - INTERVAL seq SECOND
+            FROM seq_1_to_{ROWS}
+        """)
+        frappe.db.sql(f"""
+            INSERT INTO `tabOAuth Usage Log` ({columns}, user, provider, tier, api_name)
+            SELECT {base}, CONCAT('qp', seq % 100000, '@example.com'), ELT(1 + seq % 4, 'google', 'xero', 'slack', 'hubspot'),
+                ELT(1 + seq % 2, 'Lodgeick Shared', 'Custom'), ELT(1 + seq % 3, '', 'sheets', 'drive')
+            FROM seq_1_to_{ROWS}
+        """)
+
+        # ANALYZE commits implicitly, so the seeded rows are removed in tearDownClass
+        for doctype in DOCTYPES:
+            frappe.db.sql(f"ANALYZE TABLE `tab{doctype}`")
+
+    @classmethod
+    def tearDownClass(cls):
+        for doctype in DOCTYPES:
+            frappe.db.sql(f"DELETE FROM `tab{doctype}` WHERE name LIKE 'qp-%%'")
+        frappe.db.commit()
+        super().tearDownClass()
+
+    def _index_on(self, doctype, columns):
+        """Get the name of the index whose leading columns are `columns`"""
+        indexes = {}
+        for row in frappe.db.sql(f"SHOW INDEX FROM `tab{doctype}`", as_dict=True):
+            indexes.setdefault(row.Key_name, []).append((row.Seq_in_index, row.Column_name))
+
+        for name, parts in indexes.items():
+            if [column for _, column in sorted(parts)][:len(columns)] == list(columns):
+                return name
+
+        self.fail(f"No index on {doctype} ({', '.join(columns)})")
+
+    def assertUsesIndex(self, doctype, columns, query, values):
+        plan = frappe.db.sql(f"EXPLAIN {query}", values, as_dict=True)[0]
+        self.assertEqual(plan.key, self._index_on(doctype, columns), f"Query plan: {plan}")
+
+    def test_integration_by_workflow_id(self):
+        """Test the webhook callback / sync job lookup by workflow ID"""
+        self.assertUsesIndex(
+            "User Integration", ["workflow_id"],
+            "SELECT name, user FROM `tabUser Integration` WHERE workflow_id = %s",
+            ("wf-500",)
+        )
+
+    def test_integrations_by_user_and_status(self):
+        """Test listing a user's integrations in one status"""
+        self.assertUsesIndex(
+            "User Integration", ["user", "status"],
+            "SELECT name FROM `tabUser Integration` WHERE user = %s AND status = %s",
+            ("qp7@example.com", "Active")
+        )
+
+    def test_token_by_user_and_provider(self):
+        """Test the token lookup of every resources endpoint"""
+        self.assertUsesIndex(
+            "Integration Token", ["user", "provider"],
+            "SELECT name FROM `tabIntegration Token` WHERE user = %s AND provider = %s",
+            ("qp9@example.com", "google")
+        )
+
+    def test_log_by_integration_newest_first(self):
+        """Test an integration's log is read newest first from the index"""
+        self.assertUsesIndex(
+            "Integration Log", ["integration", "timestamp"],
+            "SELECT name FROM `tabIntegration Log` WHERE integration = %s ORDER BY timestamp DESC LIMIT 20",
+            ("qp-42",)
+        )
+
+    def test_usage_log_by_user_provider_tier_api(self):
+        """Test the rate limit lookup of OAuth Usage Log"""
+        self.assertUsesIndex(
+            "OAuth Usage Log", ["user", "provider", "tier", "api_name"],
+            "SELECT name FROM `tabOAuth Usage Log` WHERE user = %s AND provider = %s AND tier = %s AND api_name = %s",
+            ("qp11@example.com", "google", "Lodgeick Shared", "sheets")
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,203 @@
+"""
+Unit tests for the local execution store
+Tests execution ingestion, the stats refresh and the dashboard summary
+"""
+
+import unittest
+from unittest.mock import Mock, patch
+from datetime import datetime, timedelta, timezone
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from lodgeick.tasks.n8n_execution_ingester import ingest_executions, get_execution_status, to_system_datetime
+from lodgeick.tasks.n8n_execution_stats import refresh_execution_stats
+
+
+class TestIngestExecutions(FrappeTestCase):
+    """Test ingest_executions"""
+
+    def _client(self, executions):
+        client = Mock()
+        client.is_enabled.return_value = True
+        client.iter_executions.return_value = iter(executions)
+        return client
+
+    @patch('lodgeick.tasks.n8n_execution_stats.refresh_execution_stats')
+    @patch('lodgeick.tasks.n8n_execution_ingester._refresh_unfinished', return_value=0)
+    @patch('lodgeick.tasks.n8n_execution_ingester.get_system_timezone', return_value="UTC")
+    @patch('lodgeick.tasks.n8n_execution_ingester.get_n8n_client')
+    @patch('frappe.db.bulk_insert')
+    @patch('frappe.db.set_global')
+    @patch('frappe.db.get_global', return_value="100")
+    @patch('frappe.get_all')
+    def test_streams_executions_above_mark(self, mock_get_all, mock_get_global, mock_set_global, mock_bulk_insert,
+                                          mock_get_client, mock_get_timezone, mock_refresh_unfinished,
+                                          mock_refresh_stats):
+        """Test only executions newer than the mark are stored and the mark advances"""
+        mock_get_client.return_value = self._client([
+            {"id": "103", "workflowId": "wf_1", "status": "success", "mode": "trigger",
+             "startedAt": "2025-01-10T09:00:00.000Z", "stoppedAt": "2025-01-10T09:00:02.000Z"},
+            {"id": "102", "workflowId": "wf_9", "status": "success", "startedAt": "2025-01-10T08:30:00.000Z"},
+            {"id": "101", "workflowId": "wf_1", "finished": False, "startedAt": "2025-01-10T08:00:00.000Z"},
+            {"id": "100", "workflowId": "wf_1", "status": "success", "startedAt": "2025-01-10T07:00:00.000Z"}
+        ])
+        mock_get_all.return_value = [frappe._dict(name="INT-1", user="a@example.com", workflow_id="wf_1")]
+
+        result = ingest_executions()
+
+        self.assertEqual(result["read"], 3)
+        # wf_9 has no integration
+        self.assertEqual(result["inserted"], 2)
+        self.assertEqual(result["mark"], 103)
+
+        values = mock_bulk_insert.call_args[0][2]
+        self.assertEqual([row[0] for row in values], ["103", "101"])
+        self.assertEqual(values[0][-2], datetime(2025, 1, 10, 9, 0))
+        self.assertEqual(values[1][9], "running")
+        self.assertTrue(mock_bulk_insert.call_args.kwargs["ignore_duplicates"])
+
+        mock_set_global.assert_called_once_with("n8n_execution_mark", 103)
+        mock_refresh_stats.assert_called_once()
+
+    @patch('lodgeick.tasks.n8n_execution_stats.refresh_execution_stats')
+    @patch('lodgeick.tasks.n8n_execution_ingester._refresh_unfinished', return_value=0)
+    @patch('lodgeick.tasks.n8n_execution_ingester.get_system_timezone', return_value="UTC")
+    @patch('lodgeick.tasks.n8n_execution_ingester.get_n8n_client')
+    @patch('frappe.db.bulk_insert')
+    @patch('frappe.db.set_global')
+    @patch('frappe.db.get_global', return_value=None)
+    @patch('frappe.get_all')
+    def test_backfill_stops_at_cutoff(self, mock_get_all, mock_get_global, mock_set_global, mock_bulk_insert,
+                                      mock_get_client, mock_get_timezone, mock_refresh_unfinished,
+                                      mock_refresh_stats):
+        """Test the first run stops reading at executions older than the backfill window"""
+        now = datetime.now(timezone.utc)
+        client = self._client([
+            {"id": "52", "workflowId": "wf_1", "status": "success", "startedAt": now.isoformat()},
+            {"id": "51", "workflowId": "wf_1", "status": "success", "startedAt": (now - timedelta(days=30)).isoformat()},
+            {"id": "50", "workflowId": "wf_1", "status": "success", "startedAt": (now - timedelta(days=31)).isoformat()}
+        ])
+        mock_get_client.return_value = client
+        mock_get_all.return_value = [frappe._dict(name="INT-1", user="a@example.com", workflow_id="wf_1")]
+
+        result = ingest_executions()
+
+        self.assertEqual(result["read"], 1)
+        self.assertEqual(result["mark"], 52)
+        self.assertNotIn("started_after", client.iter_executions.call_args.kwargs)
+
+    @patch('lodgeick.tasks.n8n_execution_stats.refresh_execution_stats')
+    @patch('lodgeick.tasks.n8n_execution_ingester._refresh_unfinished', return_value=0)
+    @patch('lodgeick.tasks.n8n_execution_ingester.get_system_timezone', return_value="UTC")
+    @patch('lodgeick.tasks.n8n_execution_ingester.get_n8n_client')
+    @patch('frappe.db.bulk_insert')
+    @patch('frappe.db.set_global')
+    @patch('frappe.db.get_global')
+    @patch('frappe.get_all')
+    def test_running_execution_ingested_on_later_run(self, mock_get_all, mock_get_global, mock_set_global,
+                                                     mock_bulk_insert, mock_get_client, mock_get_timezone,
+                                                     mock_refresh_unfinished, mock_refresh_stats):
+        """Test an execution missing from the listing while running is read once it finishes"""
+        now = datetime.now(timezone.utc)
+
+        def execution(execution_id, minutes_ago):
+            return {"id": str(execution_id), "workflowId": "wf_1", "status": "success",
+                    "startedAt": (now - timedelta(minutes=minutes_ago)).isoformat()}
+
+        mock_get_all.return_value = [frappe._dict(name="INT-1", user="a@example.com", workflow_id="wf_1")]
+
+        # 102 is still running and not listed
+        mock_get_global.return_value = "100"
+        mock_get_client.return_value = self._client([execution(103, 1), execution(101, 20)])
+        first = ingest_executions()
+
+        self.assertEqual(first["mark"], 101)
+
+        # 102 finished; the listing is re-read from the mark
+        mock_get_global.return_value = "101"
+        mock_get_client.return_value = self._client([execution(104, 0), execution(103, 1), execution(102, 30)])
+        second = ingest_executions()
+
+        self.assertEqual(second["mark"], 104)
+        self.assertIn("102", [row[0] for row in mock_bulk_insert.call_args[0][2]])
+        self.assertTrue(mock_bulk_insert.call_args.kwargs["ignore_duplicates"])
+
+    @patch('lodgeick.tasks.n8n_execution_ingester.get_n8n_client')
+    @patch('frappe.db.set_global')
+    @patch('frappe.db.get_global', return_value="100")
+    def test_mark_kept_when_n8n_unavailable(self, mock_get_global, mock_set_global, mock_get_client):
+        """Test an interrupted run doesn't advance the mark"""
+        from lodgeick.services.n8n_client import N8NCircuitOpenError
+
+        client = self._client([])
+        client.iter_executions.side_effect = N8NCircuitOpenError("open")
+        mock_get_client.return_value = client
+
+        result = ingest_executions()
+
+        self.assertTrue(result["circuit_open"])
+        mock_set_global.assert_not_called()
+
+
+class TestRefreshExecutionStats(FrappeTestCase):
+    """Test refresh_execution_stats"""
+
+    @patch('lodgeick.tasks.n8n_execution_stats.set_daily_stats')
+    @patch('frappe.db.sql')
+    def test_writes_aggregated_rows(self, mock_sql, mock_set_daily_stats):
+        """Test aggregated rows are written as daily stats"""
+        rows = [frappe._dict(integration="INT-1", user="a@example.com", executions=2)]
+        mock_sql.return_value = rows
+
+        result = refresh_execution_stats()
+
+        self.assertEqual(result["rows"], 1)
+        mock_set_daily_stats.assert_called_once_with(rows)
+
+
+class TestExecutionHelpers(unittest.TestCase):
+    """Test status and timestamp helpers"""
+
+    def test_status_fallbacks(self):
+        """Test status is derived on n8n versions that don't report it"""
+        self.assertEqual(get_execution_status({"status": "crashed"}), "crashed")
+        self.assertEqual(get_execution_status({"finished": True}), "success")
+        self.assertEqual(get_execution_status({"finished": False, "stoppedAt": "2025-01-10T09:00:00Z"}), "error")
+        self.assertEqual(get_execution_status({"finished": False}), "running")
+
+    def test_converts_utc_to_system_timezone(self):
+        """Test n8n timestamps are shifted into the system timezone"""
+        from zoneinfo import ZoneInfo
+
+        self.assertEqual(
+            to_system_datetime("2025-01-10T23:30:00.000Z", ZoneInfo("Pacific/Auckland")),
+            datetime(2025, 1, 11, 12, 30)
+        )
+
+    def test_invalid_timestamp(self):
+        """Test missing or malformed timestamps are ignored"""
+        self.assertIsNone(to_system_datetime(None, None))
+        self.assertIsNone(to_system_datetime("yesterday", None))
+
+
+class TestDashboardStats(FrappeTestCase):
+    """Test get_dashboard_stats reads the local stats store"""
+
+    @patch('lodgeick.services.execution_stats.get_user_execution_summary')
+    @patch('frappe.db.count', return_value=2)
+    @patch('frappe.db.sql', return_value=[[3]])
+    def test_uses_execution_summary(self, mock_sql, mock_count, mock_summary):
+        """Test syncedToday and lastSync come from the stats summary"""
+        from lodgeick.api.integrations import get_dashboard_stats
+
+        mock_summary.return_value = {"executions": 42, "last_execution_at": datetime(2025, 1, 10, 9, 0)}
+
+        result = get_dashboard_stats()
+
+        self.assertEqual(result["stats"]["syncedToday"], 42)
+        self.assertEqual(result["stats"]["lastSync"], datetime(2025, 1, 10, 9, 0))
+        self.assertEqual(result["stats"]["connectedApps"], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Unit tests for lodgeick.services.integration_log_buffer module
+Tests buffering, threshold flushes and the synchronous escape hatch
+"""
+
+import unittest
+from unittest.mock import patch
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from lodgeick.services import integration_log_buffer
+from lodgeick.services.integration_log_buffer import buffer_log, flush_logs
+from lodgeick.lodgeick.doctype.integration_log.integration_log import IntegrationLog
+
+
+class TestIntegrationLogBuffer(FrappeTestCase):
+    """Test the buffered Integration Log writer"""
+
+    def setUp(self):
+        frappe.local.integration_log_buffer = None
+
+    def tearDown(self):
+        frappe.local.integration_log_buffer = None
+
+    @patch('frappe.db.bulk_insert')
+    def test_entries_flushed_in_one_insert(self, mock_bulk_insert):
+        """Test buffered entries are written with a single multi-row insert"""
+        for i in range(3):
+            buffer_log("INT-1", "Success", f"run {i}", 0.5)
+
+        mock_bulk_insert.assert_not_called()
+        self.assertEqual(flush_logs(), 3)
+
+        mock_bulk_insert.assert_called_once()
+        doctype, fields, values = mock_bulk_insert.call_args[0]
+        self.assertEqual(doctype, "Integration Log")
+        self.assertEqual(len(values), 3)
+        self.assertEqual(values[0][fields.index("message")], "run 0")
+
+        # Nothing left to write
+        self.assertEqual(flush_logs(), 0)
+
+    @patch('frappe.db.bulk_insert')
+    def test_size_threshold_flushes(self, mock_bulk_insert):
+        """Test the buffer is written once it reaches FLUSH_SIZE entries"""
+        with patch.object(integration_log_buffer, 'FLUSH_SIZE', 2):
+            buffer_log("INT-1", "Success", "first")
+            mock_bulk_insert.assert_not_called()
+            buffer_log("INT-1", "Success", "second")
+
+        mock_bulk_insert.assert_called_once()
+        self.assertEqual(len(mock_bulk_insert.call_args[0][2]), 2)
+
+    @patch('frappe.db.bulk_insert')
+    def test_entries_written_before_commit(self, mock_bulk_insert):
+        """Test a commit writes the buffer first"""
+        buffer_log("INT-1", "Warning", "paused")
+        frappe.db.commit()
+
+        mock_bulk_insert.assert_called_once()
+
+    @patch('lodgeick.services.integration_log_buffer.buffer_log')
+    def test_sync_flag_inserts_immediately(self, mock_buffer_log):
+        """Test create_log bypasses the buffer when integration_log_sync is set"""
+        with patch.dict(frappe.conf, {"integration_log_sync": 1}), \
+                patch('frappe.get_doc') as mock_get_doc, \
+                patch('frappe.db.commit') as mock_commit:
+            log = IntegrationLog.create_log("INT-1", "Success", "done")
+
+        mock_buffer_log.assert_not_called()
+        mock_get_doc.return_value.insert.assert_called_once()
+        mock_commit.assert_called_once()
+        self.assertEqual(log, mock_get_doc.return_value)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -307,23 +307,20 @@ class TestDeleteIntegration(FrappeTestCase):
 class TestGetUserToken(unittest.TestCase):
     """Test get_user_token helper function"""
 
-    @patch('frappe.get_doc')
-    def test_get_user_token_exists(self, mock_get_doc):
-        """Test retrieving existing user token"""
-        mock_token = Mock()
-        mock_token.provider = "google"
-        mock_token.access_token = "test_token"
-        mock_get_doc.return_value = mock_token
+    @patch('lodgeick.services.token_manager.get_access_token')
+    def test_get_user_token_exists(self, mock_get_access_token):
+        """Test retrieving existing user token through the token manager"""
+        mock_get_access_token.return_value = "test_token"
 
         token = get_user_token("test@example.com", "google")
 
-        self.assertIsNotNone(token)
-        self.assertEqual(token.provider, "google")
+        self.assertEqual(token, "test_token")
+        mock_get_access_token.assert_called_once_with("test@example.com", "google")
 
-    @patch('frappe.get_doc')
-    def test_get_user_token_not_exists(self, mock_get_doc):
+    @patch('lodgeick.services.token_manager.get_access_token')
+    def test_get_user_token_not_exists(self, mock_get_access_token):
         """Test retrieving non-existent token"""
-        mock_get_doc.side_effect = frappe.DoesNotExistError()
+        mock_get_access_token.return_value = None
 
         token = get_user_token("test@example.com", "invalid_provider")
 
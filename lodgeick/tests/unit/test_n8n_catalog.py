@@ -0,0 +1,118 @@
+"""
+Unit tests for lodgeick.services.n8n_catalog module
+Tests that compiled catalogs match the original node definition scans
+"""
+
+import unittest
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from lodgeick.services.n8n_catalog import (
+    compile_node_catalog,
+    get_catalog_resources,
+    get_catalog_operations,
+    get_catalog_fields
+)
+
+
+NODE_DEF = {
+    "name": "n8n-nodes-base.googleSheets",
+    "properties": [
+        {
+            "name": "resource",
+            "displayName": "Resource",
+            "options": [
+                {"name": "Sheet", "value": "sheet"},
+                {"name": "Document", "value": "document"}
+            ]
+        },
+        {
+            "name": "operation",
+            "displayOptions": {"show": {"resource": ["sheet"]}},
+            "options": [
+                {"name": "Append Row", "value": "append", "action": "Append row"},
+                {"name": "Update Row", "value": "update"}
+            ]
+        },
+        {
+            "name": "operation",
+            "displayOptions": {"show": {"resource": ["sheet"]}},
+            "options": [{"name": "Ignored", "value": "ignored"}]
+        },
+        {
+            "name": "operation",
+            "options": [{"name": "Create", "value": "create"}]
+        },
+        {
+            "name": "sheetName",
+            "displayName": "Sheet Name",
+            "type": "string",
+            "required": True,
+            "displayOptions": {"show": {"resource": ["sheet"], "operation": ["append"]}}
+        },
+        {
+            "name": "options",
+            "displayName": "Options",
+            "type": "collection"
+        }
+    ]
+}
+
+
+class TestNodeCatalog(FrappeTestCase):
+    """Test compile_node_catalog and catalog lookups"""
+
+    def test_resources(self):
+        """Test resources come from the resource parameter"""
+        catalog = compile_node_catalog(NODE_DEF)
+
+        resources = get_catalog_resources(catalog)
+        self.assertEqual([r["id"] for r in resources], ["sheet", "document"])
+        self.assertEqual(resources[0]["type"], "resource")
+
+    def test_first_matching_operation_param_wins(self):
+        """Test a resource gets the first operation parameter that matches it"""
+        catalog = compile_node_catalog(NODE_DEF)
+
+        operations = get_catalog_operations(catalog, "sheet")
+        self.assertEqual([o["id"] for o in operations], ["append", "update"])
+        self.assertEqual(operations[0]["action"], "Append row")
+
+    def test_unfiltered_operation_param_is_default(self):
+        """Test resources without a filtered match use the unfiltered parameter"""
+        catalog = compile_node_catalog(NODE_DEF)
+
+        operations = get_catalog_operations(catalog, "document")
+        self.assertEqual([o["id"] for o in operations], ["create"])
+
+    def test_no_operation_param(self):
+        """Test lookups return None when no operation parameter exists"""
+        catalog = compile_node_catalog({"properties": [NODE_DEF["properties"][0]]})
+
+        self.assertIsNone(get_catalog_operations(catalog, "sheet"))
+
+    def test_no_resource_param(self):
+        """Test nodes without a resource parameter have no resources"""
+        catalog = compile_node_catalog({"properties": []})
+
+        self.assertIsNone(get_catalog_resources(catalog))
+
+    def test_fields_by_operation(self):
+        """Test fields are indexed by resource and operation"""
+        catalog = compile_node_catalog(NODE_DEF)
+
+        append_fields = [f["id"] for f in get_catalog_fields(catalog, "sheet", "append")]
+        update_fields = [f["id"] for f in get_catalog_fields(catalog, "sheet", "update")]
+
+        self.assertEqual(append_fields, ["sheetName", "options"])
+        self.assertEqual(update_fields, ["options"])
+
+    def test_catalog_is_serializable(self):
+        """Test the catalog round-trips through JSON for Redis and the cold store"""
+        catalog = compile_node_catalog(NODE_DEF)
+
+        self.assertEqual(frappe.parse_json(frappe.as_json(catalog)), catalog)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+"""
+Unit tests for lodgeick.services.n8n_outbox module
+Tests operation collapsing and retry backoff of the n8n sync outbox
+"""
+
+import unittest
+from unittest.mock import Mock, patch
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from lodgeick.services.n8n_outbox import _apply, _reschedule, drain_outbox
+
+
+def _set_values(mock_set_value, doctype):
+    """Get the values passed to frappe.db.set_value for a doctype"""
+    return [call[0][2] for call in mock_set_value.call_args_list if call[0][0] == doctype]
+
+
+def _row(operation, workflow_id=None, attempts=0, name=None):
+    return frappe._dict(
+        name=name or f"OUT-{operation}",
+        integration="INT-0001",
+        operation=operation,
+        workflow_id=workflow_id,
+        attempts=attempts
+    )
+
+
+class TestApply(FrappeTestCase):
+    """Test _apply"""
+
+    def setUp(self):
+        self.service = Mock()
+        self.doc = frappe._dict(name="INT-0001", workflow_id="wf_1", status="Active")
+
+    def _apply(self, rows, exists=True):
+        with patch('lodgeick.services.n8n_outbox.frappe.db.exists', return_value=exists), \
+             patch('lodgeick.services.n8n_outbox.frappe.get_doc', return_value=self.doc):
+            _apply(self.service, "INT-0001", rows)
+
+    def test_delete_supersedes_earlier_operations(self):
+        """Test a delete is the only call made"""
+        self._apply([_row("create"), _row("update", "wf_1"), _row("delete", "wf_1")], exists=False)
+
+        self.service.sync_integration_delete.assert_called_once()
+        self.assertEqual(self.service.sync_integration_delete.call_args[0][0].workflow_id, "wf_1")
+        self.service.sync_integration_create.assert_not_called()
+        self.service.sync_integration_update.assert_not_called()
+
+    def test_failed_delete_raises(self):
+        """Test a rejected delete is retried"""
+        self.service.sync_integration_delete.return_value = False
+
+        with self.assertRaises(Exception):
+            self._apply([_row("delete", "wf_1")], exists=False)
+
+    def test_create_covers_later_updates(self):
+        """Test create and update collapse into one create"""
+        self.doc.workflow_id = None
+
+        self._apply([_row("create"), _row("update"), _row("status")])
+
+        self.service.sync_integration_create.assert_called_once_with(self.doc)
+        self.service.sync_integration_update.assert_not_called()
+        self.service.sync_integration_status.assert_not_called()
+
+    def test_failed_create_raises(self):
+        """Test a create that returned no workflow ID is retried"""
+        self.doc.workflow_id = None
+        self.doc.error_message = "n8n sync failed: 500"
+        self.service.sync_integration_create.return_value = None
+        self.service.client.is_enabled.return_value = True
+
+        with self.assertRaises(Exception):
+            self._apply([_row("create")])
+
+    def test_update_then_status(self):
+        """Test content is pushed before the status change"""
+        self._apply([_row("status", "wf_1"), _row("update", "wf_1")])
+
+        self.service.sync_integration_update.assert_called_once_with(self.doc)
+        self.service.sync_integration_status.assert_called_once_with(self.doc, "Active")
+
+    def test_deleted_integration_is_skipped(self):
+        """Test updates of an integration that no longer exists are dropped"""
+        self._apply([_row("update", "wf_1")], exists=False)
+
+        self.service.sync_integration_update.assert_not_called()
+
+
+class TestReschedule(FrappeTestCase):
+    """Test _reschedule"""
+
+    @patch('lodgeick.services.n8n_outbox.frappe.db.set_value')
+    def test_backs_off_and_retries(self, mock_set_value):
+        """Test a failure below the attempt limit is retried"""
+        self.assertTrue(_reschedule([_row("update", attempts=1)], "boom"))
+
+        values = _set_values(mock_set_value, "n8n Sync Outbox")[0]
+        self.assertEqual(values["attempts"], 2)
+        self.assertNotIn("status", values)
+
+        integration_values = _set_values(mock_set_value, "User Integration")[0]
+        self.assertIn("boom", integration_values["error_message"])
+        self.assertNotIn("status", integration_values)
+
+    @patch('lodgeick.services.n8n_outbox.frappe.log_error')
+    @patch('lodgeick.services.n8n_outbox.frappe.db.set_value')
+    def test_marks_failed_after_max_attempts(self, mock_set_value, mock_log_error):
+        """Test the last attempt marks the rows failed"""
+        with patch.dict(frappe.conf, {"n8n_outbox_max_attempts": 3}):
+            self.assertFalse(_reschedule([_row("update", attempts=2)], "boom"))
+
+        self.assertEqual(_set_values(mock_set_value, "n8n Sync Outbox")[0]["status"], "Failed")
+        self.assertEqual(_set_values(mock_set_value, "User Integration")[0]["status"], "Error")
+        mock_log_error.assert_called_once()
+
+
+class TestDrainOutbox(FrappeTestCase):
+    """Test drain_outbox"""
+
+    @patch('lodgeick.services.n8n_outbox.frappe.log_error')
+    @patch('lodgeick.services.n8n_outbox.frappe.db.commit')
+    @patch('lodgeick.services.n8n_outbox.frappe.db.rollback')
+    @patch('lodgeick.services.n8n_outbox.frappe.db.set_value')
+    @patch('lodgeick.services.n8n_outbox._apply', side_effect=Exception("n8n returned 500"))
+    @patch('lodgeick.services.n8n_outbox._get_due_groups')
+    @patch('lodgeick.services.n8n_sync.get_n8n_sync_service')
+    @patch('frappe.cache')
+    def test_failed_sync_is_recorded_on_integration(self, mock_cache, mock_get_service, mock_get_due_groups,
+                                                    mock_apply, mock_set_value, mock_rollback, mock_commit,
+                                                    mock_log_error):
+        """Test the integration keeps the error after the drain rolled back"""
+        mock_cache.return_value.set.return_value = True
+        mock_get_due_groups.side_effect = [{"INT-0001": [_row("create", attempts=7)]}, {}]
+
+        with patch.dict(frappe.conf, {"n8n_outbox_max_attempts": 8}):
+            result = drain_outbox()
+
+        self.assertEqual(result["failed"], 1)
+        mock_rollback.assert_called_once()
+        integration_values = _set_values(mock_set_value, "User Integration")[0]
+        self.assertEqual(integration_values["status"], "Error")
+        self.assertIn("n8n returned 500", integration_values["error_message"])
+
+
+if __name__ == '__main__':
+    unittest.main()
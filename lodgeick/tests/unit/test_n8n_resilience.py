@@ -0,0 +1,176 @@
+"""
+Unit tests for lodgeick.services.n8n_resilience module
+Tests retry policy, Retry-After handling and the circuit breaker
+"""
+
+import unittest
+from unittest.mock import Mock, patch
+import requests
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from lodgeick.services.n8n_resilience import (
+    RetryPolicy,
+    CircuitBreaker,
+    parse_retry_after,
+    STATE_CLOSED,
+    STATE_OPEN,
+    STATE_HALF_OPEN
+)
+from lodgeick.services.n8n_client import N8NClient, N8NAPIError, N8NCircuitOpenError
+
+
+class TestRetryPolicy(FrappeTestCase):
+    """Test RetryPolicy decisions and delays"""
+
+    def test_retries_idempotent_methods_on_transient_status(self):
+        """Test GET/PUT/DELETE are retried on 429/502/503/504"""
+        policy = RetryPolicy(max_retries=3)
+
+        for method in ("GET", "PUT", "DELETE"):
+            for status in (429, 502, 503, 504):
+                self.assertTrue(policy.should_retry(method, 0, status))
+
+    def test_does_not_retry_post(self):
+        """Test POST is never retried"""
+        policy = RetryPolicy(max_retries=3)
+
+        self.assertFalse(policy.should_retry("POST", 0, 503))
+        self.assertFalse(policy.should_retry("POST", 0))
+
+    def test_does_not_retry_client_errors(self):
+        """Test 4xx other than 429 are not retried"""
+        policy = RetryPolicy(max_retries=3)
+
+        self.assertFalse(policy.should_retry("GET", 0, 404))
+        self.assertFalse(policy.should_retry("GET", 0, 400))
+
+    def test_stops_after_max_retries(self):
+        """Test retries stop once max_retries is reached"""
+        policy = RetryPolicy(max_retries=2)
+
+        self.assertTrue(policy.should_retry("GET", 1, 503))
+        self.assertFalse(policy.should_retry("GET", 2, 503))
+
+    def test_delay_is_bounded(self):
+        """Test jittered delay stays within the exponential ceiling"""
+        policy = RetryPolicy(backoff_base=0.5, backoff_max=2)
+
+        for attempt in range(6):
+            delay = policy.get_delay(attempt)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(2, 0.5 * (2 ** attempt)))
+
+    def test_delay_honors_retry_after(self):
+        """Test Retry-After overrides backoff but is capped"""
+        policy = RetryPolicy(backoff_max=10)
+
+        self.assertEqual(policy.get_delay(0, "3"), 3)
+        self.assertEqual(policy.get_delay(0, "120"), 10)
+
+    def test_parse_retry_after_http_date(self):
+        """Test HTTP-date Retry-After values in the past parse to zero"""
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0)
+        self.assertIsNone(parse_retry_after("not a date"))
+        self.assertIsNone(parse_retry_after(None))
+
+
+class TestCircuitBreaker(FrappeTestCase):
+    """Test CircuitBreaker state transitions"""
+
+    def test_opens_after_threshold(self):
+        """Test circuit opens after consecutive failures"""
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+
+        for _ in range(3):
+            self.assertTrue(breaker.allow_request())
+            breaker.record_failure()
+
+        self.assertEqual(breaker.get_state()["state"], STATE_OPEN)
+        self.assertFalse(breaker.allow_request())
+
+    def test_success_resets_failures(self):
+        """Test a success clears the failure count"""
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+
+        self.assertEqual(breaker.get_state()["state"], STATE_CLOSED)
+
+    def test_half_open_allows_single_trial(self):
+        """Test only one trial request is let through after the reset timeout"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+
+        self.assertTrue(breaker.allow_request())
+        self.assertEqual(breaker.get_state()["state"], STATE_HALF_OPEN)
+        self.assertFalse(breaker.allow_request())
+
+        breaker.record_success()
+        self.assertEqual(breaker.get_state()["state"], STATE_CLOSED)
+
+
+class TestN8NClientRetries(FrappeTestCase):
+    """Test N8NClient._send retry and breaker integration"""
+
+    def _make_client(self, responses):
+        client = N8NClient()
+        client.session = Mock()
+        client.session.request.side_effect = responses
+        client.retry_policy = RetryPolicy(max_retries=2, backoff_base=0, backoff_max=0)
+        client.circuit_breaker = CircuitBreaker(failure_threshold=5, reset_timeout=60)
+        return client
+
+    def _response(self, status_code, body=None, headers=None):
+        response = Mock()
+        response.status_code = status_code
+        response.headers = headers or {}
+        response.json.return_value = body or {}
+        response.text = ""
+        if status_code >= 400:
+            response.raise_for_status.side_effect = requests.exceptions.HTTPError(f"{status_code} Error")
+        else:
+            response.raise_for_status.return_value = None
+        return response
+
+    @patch('time.sleep')
+    def test_get_retried_until_success(self, mock_sleep):
+        """Test a GET succeeds after transient 503s"""
+        client = self._make_client([
+            self._response(503),
+            self._response(503),
+            self._response(200, {"id": "wf_1"})
+        ])
+
+        result = client._send("GET", "/workflows/wf_1")
+
+        self.assertEqual(result, {"id": "wf_1"})
+        self.assertEqual(client.session.request.call_count, 3)
+
+    @patch('time.sleep')
+    def test_post_not_retried(self, mock_sleep):
+        """Test a POST fails on the first 503"""
+        client = self._make_client([self._response(503)])
+
+        with self.assertRaises(N8NAPIError):
+            client._send("POST", "/workflows", {})
+
+        self.assertEqual(client.session.request.call_count, 1)
+
+    def test_open_circuit_fails_fast(self):
+        """Test no request is sent while the circuit is open"""
+        client = self._make_client([])
+        client.circuit_breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        client.circuit_breaker.record_failure()
+
+        with self.assertRaises(N8NCircuitOpenError):
+            client._send("GET", "/workflows")
+
+        client.session.request.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
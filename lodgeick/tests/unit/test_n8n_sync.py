@@ -0,0 +1,212 @@
+"""
+Unit tests for lodgeick.services.n8n_sync module
+Tests workflow content hashing and no-op update skipping
+"""
+
+import unittest
+from unittest.mock import Mock, patch
+import json
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from lodgeick.services.n8n_async_client import AsyncN8NClient
+from lodgeick.services.n8n_client import N8NNotFoundError
+from lodgeick.services.n8n_sync import N8NIntegrationSync, compute_workflow_hash
+
+
+def _integration(**overrides):
+    integration = frappe._dict(
+        name="INT-0001",
+        flow_name="Invoice Sync",
+        source_app="xero",
+        target_app="google_sheets",
+        status="Active",
+        workflow_id="wf_1",
+        workflow_hash=None,
+        error_message=None,
+        config=json.dumps({"trigger": "schedule", "schedule": "daily"})
+    )
+    integration.update(overrides)
+    return integration
+
+
+class TestComputeWorkflowHash(FrappeTestCase):
+    """Test compute_workflow_hash"""
+
+    def test_key_order_does_not_matter(self):
+        """Test the hash is canonical"""
+        self.assertEqual(
+            compute_workflow_hash({"name": "a", "nodes": [1, 2]}),
+            compute_workflow_hash({"nodes": [1, 2], "name": "a"})
+        )
+
+    def test_active_is_ignored(self):
+        """Test status changes don't change the content hash"""
+        self.assertEqual(
+            compute_workflow_hash({"name": "a", "active": True}),
+            compute_workflow_hash({"name": "a", "active": False})
+        )
+
+    def test_content_changes_hash(self):
+        """Test different content hashes differently"""
+        self.assertNotEqual(compute_workflow_hash({"name": "a"}), compute_workflow_hash({"name": "b"}))
+
+
+class TestSyncIntegrationUpdate(FrappeTestCase):
+    """Test sync_integration_update"""
+
+    def _service(self):
+        with patch('lodgeick.services.n8n_sync.get_n8n_client'):
+            service = N8NIntegrationSync()
+        service.client = Mock()
+        return service
+
+    @patch('frappe.db.set_value')
+    def test_pushes_and_stores_hash(self, mock_set_value):
+        """Test a changed workflow is PUT and its hash recorded"""
+        service = self._service()
+        integration = _integration()
+
+        service.sync_integration_update(integration)
+
+        service.client.update_workflow.assert_called_once()
+        self.assertNotIn("active", service.client.update_workflow.call_args[0][1])
+        self.assertIsNotNone(integration.workflow_hash)
+        mock_set_value.assert_called_once_with(
+            "User Integration", "INT-0001", "workflow_hash", integration.workflow_hash, update_modified=False
+        )
+
+    @patch('frappe.db.set_value')
+    def test_skips_unchanged_workflow(self, mock_set_value):
+        """Test no PUT is sent when the hash matches the last push"""
+        service = self._service()
+        integration = _integration()
+        _, integration.workflow_hash = service.build_workflow(integration)
+
+        service.sync_integration_update(integration)
+
+        service.client.update_workflow.assert_not_called()
+        mock_set_value.assert_not_called()
+
+
+class TestSyncIntegrationsCreateBulk(FrappeTestCase):
+    """Test sync_integrations_create_bulk"""
+
+    def _service(self, send):
+        with patch('lodgeick.services.n8n_sync.get_n8n_client'):
+            service = N8NIntegrationSync()
+        service.client = Mock()
+        service.client._send.side_effect = send
+        self.async_client = AsyncN8NClient(service.client, concurrency=2)
+        return service
+
+    @patch('frappe.db.set_value')
+    def test_creates_activates_and_writes_back(self, mock_set_value):
+        """Test each workflow is created, activated and its ID stored"""
+        calls = []
+
+        def send(method, endpoint, data, params):
+            calls.append((method, endpoint))
+            if method == "POST" and endpoint == "/workflows":
+                self.assertNotIn("active", data)
+                return {"id": f"wf_{data['name'][-1]}"}
+            return {}
+
+        service = self._service(send)
+        integrations = [
+            _integration(name="INT-1", flow_name="Flow 1", workflow_id=None),
+            _integration(name="INT-2", flow_name="Flow 2", workflow_id=None, status="Paused")
+        ]
+
+        with patch('lodgeick.services.n8n_async_client.get_async_n8n_client', return_value=self.async_client):
+            results = service.sync_integrations_create_bulk(integrations)
+
+        self.assertEqual(results["INT-1"], {"success": True, "workflow_id": "wf_1"})
+        self.assertEqual(results["INT-2"], {"success": True, "workflow_id": "wf_2"})
+        # Only the active integration is activated
+        self.assertEqual(calls.count(("PUT", "/workflows/wf_1")), 1)
+        self.assertNotIn(("PUT", "/workflows/wf_2"), calls)
+        self.assertEqual(mock_set_value.call_count, 2)
+
+    @patch('frappe.log_error')
+    @patch('frappe.db.set_value')
+    def test_failure_is_reported_per_item(self, mock_set_value, mock_log_error):
+        """Test one failed create doesn't affect the others"""
+        def send(method, endpoint, data, params):
+            if data and data["name"].endswith("2"):
+                raise Exception("boom")
+            return {"id": "wf_1"}
+
+        service = self._service(send)
+        integrations = [
+            _integration(name="INT-1", flow_name="Flow 1", workflow_id=None, status="Paused"),
+            _integration(name="INT-2", flow_name="Flow 2", workflow_id=None, status="Paused")
+        ]
+
+        with patch('lodgeick.services.n8n_async_client.get_async_n8n_client', return_value=self.async_client):
+            results = service.sync_integrations_create_bulk(integrations)
+
+        self.assertTrue(results["INT-1"]["success"])
+        self.assertFalse(results["INT-2"]["success"])
+        self.assertIsNone(integrations[1].workflow_id)
+        mock_log_error.assert_called_once()
+
+
+class TestSyncOAuthCredentials(FrappeTestCase):
+    """Test sync_oauth_credentials"""
+
+    TOKEN = {"access_token": "access", "refresh_token": "refresh"}
+
+    def _service(self):
+        with patch('lodgeick.services.n8n_sync.get_n8n_client'):
+            service = N8NIntegrationSync()
+        service.client = Mock()
+        return service
+
+    @patch('frappe.db.set_value')
+    @patch('frappe.db.get_value', return_value="cred_1")
+    def test_updates_stored_credential_directly(self, mock_get_value, mock_set_value):
+        """Test a stored credential ID is updated without listing credentials"""
+        service = self._service()
+        service.client.update_credential.return_value = {"id": "cred_1"}
+
+        credential_id = service.sync_oauth_credentials("google", "user@example.com", self.TOKEN)
+
+        self.assertEqual(credential_id, "cred_1")
+        service.client.update_credential.assert_called_once()
+        service.client.iter_credentials.assert_not_called()
+
+    @patch('frappe.db.set_value')
+    @patch('frappe.db.get_value', return_value="cred_gone")
+    def test_stale_credential_falls_back_to_lookup(self, mock_get_value, mock_set_value):
+        """Test a credential deleted in n8n is found by name and the ID re-stored"""
+        service = self._service()
+        service.client.update_credential.side_effect = [N8NNotFoundError("404"), {"id": "cred_2"}]
+        service.client.iter_credentials.return_value = iter([
+            {"id": "cred_other", "name": "Lodgeick Google - other@example.com"},
+            {"id": "cred_2", "name": "Lodgeick Google - user@example.com"}
+        ])
+
+        credential_id = service.sync_oauth_credentials("google", "user@example.com", self.TOKEN)
+
+        self.assertEqual(credential_id, "cred_2")
+        self.assertEqual(service.client.update_credential.call_args[0][0], "cred_2")
+        self.assertEqual(mock_set_value.call_args[0][3], "cred_2")
+
+    @patch('frappe.db.set_value')
+    @patch('frappe.db.get_value', return_value=None)
+    def test_creates_and_stores_new_credential(self, mock_get_value, mock_set_value):
+        """Test a credential is created and its ID stored when none exists"""
+        service = self._service()
+        service.client.iter_credentials.return_value = iter([])
+        service.client.create_credential.return_value = {"id": 7}
+
+        credential_id = service.sync_oauth_credentials("slack", "user@example.com", self.TOKEN)
+
+        self.assertEqual(credential_id, "7")
+        service.client.update_credential.assert_not_called()
+        self.assertEqual(mock_set_value.call_args[0][3], "7")
+
+
+if __name__ == '__main__':
+    unittest.main()
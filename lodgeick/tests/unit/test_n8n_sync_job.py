@@ -0,0 +1,135 @@
+"""
+Unit tests for lodgeick.tasks.n8n_sync_job module
+Tests the bulk diff and lazy document loading of the periodic sync job
+"""
+
+import unittest
+from unittest.mock import Mock, patch
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from lodgeick.tasks.n8n_sync_job import (
+    sync_all_integrations, sync_changed_integrations, diff_integrations
+)
+
+
+def _row(name, workflow_id, status="Active"):
+    return frappe._dict(name=name, workflow_id=workflow_id, status=status, flow_name=name)
+
+
+class TestDiffIntegrations(FrappeTestCase):
+    """Test diff_integrations"""
+
+    def test_classifies_rows(self):
+        """Test rows are split into missing workflows and status mismatches"""
+        workflows = {
+            "wf_1": {"id": "wf_1", "active": True},
+            "wf_2": {"id": "wf_2", "active": True},
+            "wf_9": {"id": "wf_9", "name": "Lodgeick: Orphan"}
+        }
+        rows = [_row("INT-1", "wf_1"), _row("INT-2", "wf_2", "Paused"), _row("INT-3", "wf_3")]
+
+        missing, status_changes = diff_integrations(rows, workflows)
+
+        self.assertEqual([r.name for r in missing], ["INT-3"])
+        self.assertEqual([r.name for r in status_changes], ["INT-2"])
+        self.assertEqual(list(workflows), ["wf_9"])
+
+    def test_duplicate_workflow_id_is_recreated(self):
+        """Test a second integration sharing a workflow gets its own"""
+        workflows = {"wf_1": {"id": "wf_1", "active": True}}
+        rows = [_row("INT-1", "wf_1"), _row("INT-2", "wf_1")]
+
+        missing, status_changes = diff_integrations(rows, workflows)
+
+        self.assertEqual([r.name for r in missing], ["INT-2"])
+        self.assertEqual(status_changes, [])
+
+
+class TestSyncAllIntegrations(FrappeTestCase):
+    """Test sync_all_integrations"""
+
+    @patch('lodgeick.tasks.n8n_sync_job.set_sync_watermark')
+    @patch('lodgeick.tasks.n8n_sync_job.get_n8n_sync_service')
+    @patch('lodgeick.tasks.n8n_sync_job.run_async')
+    @patch('lodgeick.tasks.n8n_sync_job.get_async_n8n_client')
+    @patch('lodgeick.tasks.n8n_sync_job.get_n8n_client')
+    @patch('frappe.get_doc')
+    @patch('frappe.get_all')
+    def test_provisions_missing_workflows_from_rows(self, mock_get_all, mock_get_doc, mock_get_client,
+                                                    mock_get_async_client, mock_run_async, mock_get_service,
+                                                    mock_set_watermark, mock_resume):
+        """Test missing workflows are provisioned from rows without loading documents"""
+        client = Mock()
+        client.list_workflows.return_value = [{"id": "wf_1", "active": True}]
+        client.circuit_breaker.is_open.return_value = False
+        mock_get_client.return_value = client
+
+        rows = [_row("INT-1", "wf_1"), _row("INT-2", "wf_2")]
+        mock_get_all.return_value = rows
+        service = mock_get_service.return_value
+        service.build_workflow.return_value = ({}, None)
+
+        result = sync_all_integrations()
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['created'], 1)
+        service.provision_workflow.assert_called_once_with(rows[1])
+        mock_get_doc.assert_not_called()
+        mock_run_async.assert_not_called()
+        self.assertEqual(set(result['timings']), {"fetch", "diff", "create", "update", "status", "orphans"})
+
+
+class TestSyncChangedIntegrations(FrappeTestCase):
+    """Test sync_changed_integrations"""
+
+    @patch('lodgeick.tasks.n8n_sync_shards.resume_active_runs')
+    @patch('lodgeick.tasks.n8n_sync_job.set_sync_watermark')
+    @patch('lodgeick.tasks.n8n_sync_job.get_sync_watermark')
+    @patch('lodgeick.tasks.n8n_sync_job.get_n8n_sync_service')
+    @patch('lodgeick.tasks.n8n_sync_job.run_async')
+    @patch('lodgeick.tasks.n8n_sync_job.get_async_n8n_client')
+    @patch('lodgeick.tasks.n8n_sync_job.get_n8n_client')
+    @patch('frappe.get_all')
+    def test_only_changed_workflows_are_diffed(self, mock_get_all, mock_get_client, mock_get_async_client,
+                                               mock_run_async, mock_get_service, mock_get_watermark,
+                                               mock_set_watermark):
+        """Test rows are fetched by watermark and by changed workflow, then the watermark advances"""
+        mock_get_watermark.return_value = {
+            "modified": "2025-01-10 10:00:00",
+            "updated_at": "2025-01-10T10:00:00.000Z"
+        }
+
+        client = Mock()
+        client.iter_workflows.return_value = iter([
+            {"id": "wf_1", "active": True, "updatedAt": "2025-01-09T00:00:00.000Z"},
+            {"id": "wf_2", "active": True, "updatedAt": "2025-01-10T11:00:00.000Z"}
+        ])
+        client.circuit_breaker.is_open.return_value = False
+        mock_get_client.return_value = client
+
+        mock_get_all.side_effect = [[], [_row("INT-2", "wf_2")]]
+
+        result = sync_changed_integrations()
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['changed_workflows'], 1)
+        self.assertEqual(result['changed_integrations'], 1)
+        self.assertEqual(mock_get_all.call_args_list[1].kwargs["filters"], {"workflow_id": ["in", ["wf_2"]]})
+        mock_run_async.assert_not_called()
+        self.assertEqual(mock_set_watermark.call_args.args[1], "2025-01-10T11:00:00.000Z")
+        mock_resume.assert_called_once()
+
+    @patch('lodgeick.tasks.n8n_sync_shards.start_sync_run')
+    @patch('lodgeick.tasks.n8n_sync_job.get_sync_watermark', return_value=None)
+    def test_full_sweep_without_watermark(self, mock_get_watermark, mock_start_sync_run):
+        """Test the first run falls back to a full sweep"""
+        mock_start_sync_run.return_value = {"success": True, "run": "RUN-1"}
+
+        result = sync_changed_integrations()
+
+        self.assertEqual(result["run"], "RUN-1")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Unit tests for lodgeick.tasks.n8n_sync_shards module
+Tests shard splitting and checkpoint resumption
+"""
+
+import unittest
+from unittest.mock import Mock, patch
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from lodgeick.tasks.n8n_sync_shards import resume_active_runs, resume_sync_run, sync_shard, _split_ranges
+
+
+class TestSplitRanges(FrappeTestCase):
+    """Test _split_ranges"""
+
+    def test_contiguous_ranges(self):
+        """Test names are split into contiguous, non-overlapping ranges"""
+        names = [f"INT-{i:02d}" for i in range(10)]
+
+        ranges = _split_ranges(names, 3)
+
+        self.assertEqual(ranges, [["INT-00", "INT-03"], ["INT-04", "INT-07"], ["INT-08", "INT-09"]])
+
+    def test_fewer_names_than_shards(self):
+        """Test shard count is capped by the number of names"""
+        self.assertEqual(_split_ranges(["a", "b"], 8), [["a", "a"], ["b", "b"]])
+        self.assertEqual(_split_ranges([], 8), [])
+
+
+class TestSyncShard(FrappeTestCase):
+    """Test sync_shard"""
+
+    @patch('lodgeick.tasks.n8n_sync_shards._complete_shard', return_value=False)
+    @patch('lodgeick.tasks.n8n_sync_shards._enqueue_next_shard')
+    @patch('lodgeick.tasks.n8n_sync_shards.get_n8n_sync_service')
+    @patch('lodgeick.tasks.n8n_sync_shards.get_async_n8n_client')
+    @patch('lodgeick.tasks.n8n_sync_shards.get_n8n_client')
+    @patch('frappe.get_all')
+    @patch('frappe.cache')
+    def test_resumes_from_checkpoint(self, mock_cache, mock_get_all, mock_get_client, mock_get_async_client,
+                                     mock_get_service, mock_enqueue_next, mock_complete):
+        """Test a retried shard only reads integrations after its checkpoint"""
+        counts = {
+            "synced": 3, "created": 0, "updated": 0, "deleted": 0, "errors": 0, "skipped": 0
+        }
+        cache = Mock()
+        cache.get_value.side_effect = lambda key: {
+            "n8n_sync_run:RUN-1:state": {"shards": [["INT-00", "INT-99"]], "workflows": {}},
+            "n8n_sync_run:RUN-1:checkpoint:0": {"last_name": "INT-50", "counts": counts}
+        }.get(key)
+        mock_cache.return_value = cache
+
+        client = Mock()
+        client.circuit_breaker.is_open.return_value = False
+        mock_get_client.return_value = client
+        mock_get_all.return_value = []
+
+        sync_shard("RUN-1", 0)
+
+        filters = mock_get_all.call_args.kwargs["filters"]
+        self.assertIn(["name", ">", "INT-50"], filters)
+        mock_complete.assert_called_once_with("RUN-1", 0, counts)
+        mock_enqueue_next.assert_called_once_with("RUN-1", 1)
+
+
+
+class TestResumeActiveRuns(FrappeTestCase):
+    """Test resume_active_runs"""
+
+    @patch('lodgeick.tasks.n8n_sync_shards.resume_sync_run')
+    @patch('lodgeick.tasks.n8n_sync_shards._fail_run')
+    @patch('lodgeick.tasks.n8n_sync_shards._get_state')
+    @patch('frappe.get_all', return_value=["RUN-1", "RUN-2"])
+    def test_resumes_runs_with_state(self, mock_get_all, mock_get_state, mock_fail_run, mock_resume):
+        """Test runs with state are resumed and expired ones are failed"""
+        mock_get_state.side_effect = [None, {"shards": [["a", "z"]]}]
+
+        self.assertEqual(resume_active_runs(), ["RUN-2"])
+
+        mock_fail_run.assert_called_once()
+        self.assertEqual(mock_fail_run.call_args.args[0], "RUN-1")
+        mock_resume.assert_called_once_with("RUN-2")
+
+
+
+class TestResumeSyncRun(FrappeTestCase):
+    """Test resume_sync_run"""
+
+    @patch('lodgeick.tasks.n8n_sync_shards._enqueue_shard')
+    @patch('lodgeick.tasks.n8n_sync_shards._finalize_run')
+    @patch('lodgeick.tasks.n8n_sync_shards._get_state', return_value={"shards": [["a", "m"], ["n", "z"]]})
+    @patch('frappe.cache')
+    def test_finalizes_when_all_shards_done(self, mock_cache, mock_get_state, mock_finalize, mock_enqueue):
+        """Test a run left Running after its last shard is finalized instead of resumed"""
+        mock_cache.return_value.make_key.side_effect = lambda key: key
+        mock_cache.return_value.get.return_value = b"2"
+
+        resume_sync_run("RUN-1")
+
+        mock_finalize.assert_called_once_with("RUN-1")
+        mock_enqueue.assert_not_called()
+
+    @patch('lodgeick.tasks.n8n_sync_shards._enqueue_shard')
+    @patch('lodgeick.tasks.n8n_sync_shards._finalize_run')
+    @patch('lodgeick.tasks.n8n_sync_shards._get_state', return_value={"shards": [["a", "m"], ["n", "z"]]})
+    @patch('frappe.cache')
+    def test_requeues_unfinished_shards(self, mock_cache, mock_get_state, mock_finalize, mock_enqueue):
+        """Test only claimed shards that aren't done are enqueued again"""
+        values = {"n8n_sync_run:RUN-1:next_shard": b"2", "n8n_sync_run:RUN-1:done:0": b"1"}
+        mock_cache.return_value.make_key.side_effect = lambda key: key
+        mock_cache.return_value.get.side_effect = values.get
+
+        resume_sync_run("RUN-1")
+
+        mock_finalize.assert_not_called()
+        mock_enqueue.assert_called_once_with("RUN-1", 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
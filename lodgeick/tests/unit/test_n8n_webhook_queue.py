@@ -0,0 +1,143 @@
+"""
+Unit tests for lodgeick.services.n8n_webhook_queue module
+Tests callback validation, queueing and batched application
+"""
+
+import json
+import unittest
+from unittest.mock import Mock, patch
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from lodgeick.services.n8n_webhook_queue import (
+    DEAD_LETTER_KEY, enqueue_callback, apply_callbacks, apply_queued_callbacks
+)
+
+
+class TestEnqueueCallback(FrappeTestCase):
+    """Test enqueue_callback"""
+
+    @patch('lodgeick.services.n8n_webhook_queue.schedule_worker')
+    @patch('frappe.cache')
+    def test_first_item_wakes_worker(self, mock_cache, mock_schedule_worker):
+        """Test a callback is queued and only an empty queue schedules the worker"""
+        cache = Mock()
+        cache.llen.return_value = 0
+        cache.rpush.side_effect = [1, 2]
+        mock_cache.return_value = cache
+
+        payload = {"workflow_id": "wf_1", "status": "success", "execution_time": "1.5"}
+        self.assertTrue(enqueue_callback(payload)["success"])
+        self.assertTrue(enqueue_callback(payload)["success"])
+
+        mock_schedule_worker.assert_called_once()
+        self.assertEqual(cache.rpush.call_count, 2)
+
+    @patch('frappe.cache')
+    def test_rejects_invalid_payload(self, mock_cache):
+        """Test payloads without workflow_id/status or with a bad execution_time are refused"""
+        self.assertFalse(enqueue_callback({"status": "success"})["success"])
+        self.assertFalse(enqueue_callback({"workflow_id": "wf_1", "status": "success", "execution_time": "fast"})["success"])
+        mock_cache.return_value.rpush.assert_not_called()
+
+    @patch('lodgeick.services.n8n_webhook_queue.schedule_worker')
+    @patch('frappe.cache')
+    def test_non_string_message_is_coerced(self, mock_cache, mock_schedule_worker):
+        """Test a structured message is queued as text"""
+        mock_cache.return_value.llen.return_value = 0
+        mock_cache.return_value.rpush.return_value = 1
+
+        result = enqueue_callback({"workflow_id": "wf_1", "status": "error", "message": {"code": 500}})
+
+        self.assertTrue(result["success"])
+        queued = json.loads(mock_cache.return_value.rpush.call_args[0][1])
+        self.assertEqual(queued["message"], "{'code': 500}")
+
+    @patch('frappe.cache')
+    def test_full_queue_is_refused(self, mock_cache):
+        """Test backpressure once the queue reaches its limit"""
+        mock_cache.return_value.llen.return_value = 10
+
+        with patch.dict(frappe.conf, {"n8n_webhook_max_queue_length": 10}):
+            result = enqueue_callback({"workflow_id": "wf_1", "status": "success"})
+
+        self.assertFalse(result["success"])
+        mock_cache.return_value.rpush.assert_not_called()
+
+
+class TestApplyCallbacks(FrappeTestCase):
+    """Test apply_callbacks"""
+
+    def _payload(self, workflow_id, status, message=""):
+        return {
+            "workflow_id": workflow_id,
+            "status": status,
+            "message": message,
+            "execution_time": 1.0,
+            "received_at": "2025-01-10 09:00:00"
+        }
+
+    @patch('lodgeick.services.n8n_webhook_queue._queue_status_sync')
+    @patch('lodgeick.services.execution_stats.record_executions')
+    @patch('frappe.db.set_value')
+    @patch('lodgeick.services.integration_log_buffer.buffer_log')
+    @patch('frappe.get_all')
+    def test_coalesces_status_per_integration(self, mock_get_all, mock_buffer_log, mock_set_value,
+                                              mock_record_executions, mock_queue_status_sync):
+        """Test one log per callback but one status update per integration"""
+        mock_get_all.return_value = [
+            frappe._dict(name="INT-1", user="a@example.com", workflow_id="wf_1", status="Active"),
+            frappe._dict(name="INT-2", user="b@example.com", workflow_id="wf_2", status="Error")
+        ]
+
+        applied, dropped = apply_callbacks([
+            self._payload("wf_1", "error", "boom"),
+            self._payload("wf_1", "success"),
+            self._payload("wf_2", "error", "still failing"),
+            self._payload("wf_unknown", "success")
+        ])
+
+        self.assertEqual((applied, dropped), (3, 1))
+        self.assertEqual(mock_buffer_log.call_count, 3)
+        self.assertEqual(len(mock_record_executions.call_args[0][0]), 3)
+
+        updates = {call[0][1]: call[0][2] for call in mock_set_value.call_args_list}
+        self.assertEqual(set(updates), {"INT-1", "INT-2"})
+        self.assertEqual(updates["INT-1"]["status"], "Completed")
+        self.assertEqual(updates["INT-2"]["error_message"], "still failing")
+
+        # Only INT-1 changed status
+        mock_queue_status_sync.assert_called_once()
+        self.assertEqual(mock_queue_status_sync.call_args[0][0].name, "INT-1")
+
+
+
+class TestApplyQueuedCallbacks(FrappeTestCase):
+    """Test apply_queued_callbacks"""
+
+    @patch('frappe.log_error')
+    @patch('frappe.db.rollback')
+    @patch('frappe.db.commit')
+    @patch('lodgeick.services.n8n_webhook_queue.apply_callbacks')
+    @patch('frappe.cache')
+    def test_failing_payload_is_dead_lettered(self, mock_cache, mock_apply_callbacks, mock_commit,
+                                              mock_rollback, mock_log_error):
+        """Test a payload that keeps failing is moved aside and the rest still apply"""
+        good = json.dumps({"workflow_id": "wf_1"})
+        bad = json.dumps({"workflow_id": "wf_2"})
+        cache = Mock()
+        cache.set.return_value = True
+        cache.lrange.side_effect = [[good, bad], []]
+        mock_cache.return_value = cache
+        mock_apply_callbacks.side_effect = [Exception("batch failed"), (1, 0), Exception("bad payload")]
+
+        result = apply_queued_callbacks()
+
+        self.assertEqual((result["applied"], result["dead_lettered"]), (1, 1))
+        cache.rpush.assert_called_once_with(DEAD_LETTER_KEY, bad)
+        cache.ltrim.assert_any_call("n8n_webhook_queue", 2, -1)
+        mock_log_error.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -19,8 +19,10 @@ from lodgeick.api.oauth import (
     exchange_code_for_tokens,
     calculate_expiry,
     save_user_oauth_setup,
+    save_integration_token,
     refresh_token
 )
+from lodgeick.services.provider_registry import invalidate_registry
 from lodgeick.tests.fixtures.test_data import (
     MOCK_PROVIDER_CONFIGS,
     MOCK_OAUTH_TOKENS,
@@ -146,6 +148,12 @@ class TestOAuthCallback(FrappeTestCase):
 class TestGetProviderConfig(FrappeTestCase):
     """Test get_provider_config function"""
 
+    def setUp(self):
+        invalidate_registry()
+
+    def tearDown(self):
+        invalidate_registry()
+
     @patch('frappe.get_single')
     def test_get_provider_config_from_settings(self, mock_get_single):
         """Test retrieving provider config from OAuth Credentials Settings"""
@@ -185,6 +193,34 @@ class TestGetProviderConfig(FrappeTestCase):
         self.assertIsNotNone(config)
         self.assertEqual(config['client_id'], 'conf_client_id')
 
+    @patch('frappe.get_single')
+    def test_provider_config_is_cached(self, mock_get_single):
+        """Test the settings are loaded once for all lookups"""
+        mock_credential = Mock()
+        mock_credential.provider = 'google'
+        mock_credential.client_id = 'test_client_id'
+        mock_credential.client_secret = 'test_client_secret'
+        mock_get_single.return_value.oauth_credentials = [mock_credential]
+
+        get_provider_config('google')
+        get_provider_config('google')
+        get_provider_config('xero')
+
+        mock_get_single.assert_called_once()
+
+    def test_saving_credentials_reloads_registry(self):
+        """Test save_oauth_credentials makes lookups see the new credentials"""
+        get_provider_config('google')
+
+        save_oauth_credentials([{
+            "provider": "google",
+            "client_id": "rotated_client_id",
+            "client_secret": "rotated_client_secret"
+        }])
+
+        self.assertEqual(get_provider_config('google')['client_id'], 'rotated_client_id')
+        frappe.delete_doc("OAuth Credentials Settings", "OAuth Credentials Settings", force=True)
+
 
 class TestSaveOAuthCredentials(FrappeTestCase):
     """Test save_oauth_credentials function"""
@@ -264,7 +300,7 @@ class TestBuildAuthUrl(unittest.TestCase):
 class TestExchangeCodeForTokens(unittest.TestCase):
     """Test exchange_code_for_tokens function"""
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_exchange_code_success(self, mock_post):
         """Test successful token exchange"""
         mock_response = Mock()
@@ -282,7 +318,7 @@ class TestExchangeCodeForTokens(unittest.TestCase):
         self.assertEqual(tokens['refresh_token'], MOCK_OAUTH_TOKENS['refresh_token'])
         mock_post.assert_called_once()
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_exchange_code_failure(self, mock_post):
         """Test failed token exchange"""
         mock_response = Mock()
@@ -319,6 +355,43 @@ class TestCalculateExpiry(unittest.TestCase):
         self.assertIsNone(expiry)
 
 
+class TestSaveIntegrationToken(FrappeTestCase):
+    """Test save_integration_token function"""
+
+    def setUp(self):
+        self.test_user = "test@example.com"
+
+    def tearDown(self):
+        frappe.db.rollback()
+
+    def test_reconnect_updates_existing_token(self):
+        """Test a second authorization updates the token instead of adding one"""
+        first = save_integration_token(self.test_user, "google", MOCK_OAUTH_TOKENS)
+        second = save_integration_token(self.test_user, "google", {
+            "access_token": "new_access_token",
+            "expires_in": 3600
+        })
+
+        self.assertEqual(first.name, second.name)
+        self.assertEqual(
+            frappe.db.count("Integration Token", {"user": self.test_user, "provider": "google"}), 1
+        )
+        # The provider omitted the refresh token, so the old one is kept
+        self.assertEqual(second.get_password("refresh_token"), MOCK_OAUTH_TOKENS["refresh_token"])
+
+    def test_duplicate_token_rejected(self):
+        """Test the unique (user, provider) index rejects a second token row"""
+        save_integration_token(self.test_user, "google", MOCK_OAUTH_TOKENS)
+
+        with self.assertRaises(frappe.UniqueValidationError):
+            frappe.get_doc({
+                "doctype": "Integration Token",
+                "user": self.test_user,
+                "provider": "google",
+                "access_token": "duplicate"
+            }).insert(ignore_permissions=True)
+
+
 class TestSaveUserOAuthSetup(FrappeTestCase):
     """Test save_user_oauth_setup function"""
 
@@ -391,7 +464,7 @@ class TestRefreshToken(FrappeTestCase):
     def tearDown(self):
         frappe.set_user("Administrator")
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     @patch('lodgeick.api.oauth.get_provider_config')
     @patch('frappe.get_doc')
     def test_refresh_token_success(self, mock_get_doc, mock_get_config, mock_post):
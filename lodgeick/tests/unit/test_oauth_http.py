@@ -0,0 +1,80 @@
+"""
+Unit tests for lodgeick.services.oauth_http module
+Tests pooled sessions, timeouts, concurrency limits and metrics
+"""
+
+import unittest
+from unittest.mock import Mock, patch
+import requests
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from lodgeick.services import oauth_http
+from lodgeick.services.oauth_http import (
+    OAuthProviderBusyError,
+    get_metrics,
+    get_session,
+    post_token_request,
+    reset_metrics
+)
+
+
+TOKEN_URL = "https://oauth2.googleapis.com/token"
+
+
+class TestPostTokenRequest(FrappeTestCase):
+    """Test post_token_request"""
+
+    def setUp(self):
+        reset_metrics()
+        oauth_http._semaphores.clear()
+
+    def tearDown(self):
+        reset_metrics()
+        oauth_http._semaphores.clear()
+
+    def test_session_is_shared_per_host(self):
+        """Test requests to one host reuse one pooled session"""
+        self.assertIs(get_session(TOKEN_URL), get_session("https://oauth2.googleapis.com/revoke"))
+        self.assertIsNot(get_session(TOKEN_URL), get_session("https://slack.com/api/oauth.v2.access"))
+
+    @patch('requests.Session.post')
+    def test_request_has_timeouts_and_is_measured(self, mock_post):
+        """Test the request carries connect/read timeouts and is counted"""
+        mock_post.return_value = Mock(status_code=200)
+
+        post_token_request("google", TOKEN_URL, {"grant_type": "refresh_token"})
+
+        self.assertEqual(len(mock_post.call_args[1]["timeout"]), 2)
+        metrics = get_metrics()["google"]
+        self.assertEqual(metrics["requests"], 1)
+        self.assertEqual(metrics["success"], 1)
+
+    @patch('requests.Session.post')
+    def test_timeout_is_counted_and_raised(self, mock_post):
+        """Test a provider timeout propagates and is recorded"""
+        mock_post.side_effect = requests.Timeout("read timed out")
+
+        with self.assertRaises(requests.Timeout):
+            post_token_request("google", TOKEN_URL, {})
+
+        self.assertEqual(get_metrics()["google"]["timeout"], 1)
+
+    @patch('requests.Session.post')
+    def test_concurrency_limit(self, mock_post):
+        """Test requests beyond the provider's concurrency limit fail fast"""
+        with patch.dict(frappe.conf, {"oauth_max_concurrency": 1, "oauth_acquire_timeout": 0.01}):
+            semaphore = oauth_http._get_semaphore("google")
+            semaphore.acquire()
+            try:
+                with self.assertRaises(OAuthProviderBusyError):
+                    post_token_request("google", TOKEN_URL, {})
+            finally:
+                semaphore.release()
+
+        mock_post.assert_not_called()
+        self.assertEqual(get_metrics()["google"]["busy"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Unit tests for lodgeick.services.oauth_rate_limiter module
+Tests atomic check-and-record, sliding windows and the usage log rollup
+"""
+
+import unittest
+from unittest.mock import patch
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from lodgeick.services import oauth_rate_limiter
+from lodgeick.lodgeick.doctype.oauth_usage_log.oauth_usage_log import check_rate_limit, record_api_request
+
+
+class TestOAuthRateLimiter(FrappeTestCase):
+    """Test the Redis sliding-window limiter"""
+
+    def setUp(self):
+        self.user = f"rate-{frappe.generate_hash(length=8)}@example.com"
+        # Start of a minute window, so the previous window carries no weight
+        self.now = 1700000040.0
+
+    def tearDown(self):
+        frappe.db.rollback()
+
+    def _acquire(self, minute_limit=None, day_limit=None, cost=1, at=None):
+        with patch('lodgeick.services.oauth_rate_limiter.time.time', return_value=at or self.now):
+            return oauth_rate_limiter.acquire(
+                self.user, "google", "default", "sheets",
+                minute_limit=minute_limit, day_limit=day_limit, cost=cost
+            )
+
+    def test_minute_limit_is_enforced(self):
+        """Test requests beyond the minute limit are refused and not counted"""
+        results = [self._acquire(minute_limit=3, day_limit=100) for _ in range(5)]
+
+        self.assertEqual([r["allowed"] for r in results], [True, True, True, False, False])
+        self.assertEqual(results[-1]["requests_this_minute"], 3)
+        self.assertEqual(results[-1]["requests_today"], 3)
+
+    def test_previous_window_slides_out(self):
+        """Test the previous minute only counts for the part still in the window"""
+        for _ in range(4):
+            self._acquire()
+
+        # Halfway through the next minute, half of the previous 4 requests count
+        usage = self._acquire(cost=0, at=self.now + 90)
+        self.assertEqual(usage["requests_this_minute"], 2)
+        self.assertEqual(usage["requests_today"], 4)
+
+    def test_check_rate_limit_records_atomically(self):
+        """Test check_rate_limit(record=True) counts allowed requests only"""
+        with patch('lodgeick.lodgeick.doctype.oauth_usage_log.oauth_usage_log.get_rate_limit',
+                   return_value={"requests_per_day": 2, "requests_per_minute": 10}):
+            first = check_rate_limit(self.user, "google", "default", record=True)
+            second = check_rate_limit(self.user, "google", "default", record=True)
+            third = check_rate_limit(self.user, "google", "default", record=True)
+            peek = check_rate_limit(self.user, "google", "default")
+
+        self.assertTrue(first["allowed"])
+        self.assertEqual(second["remaining_today"], 0)
+        self.assertFalse(third["allowed"])
+        self.assertFalse(peek["allowed"])
+
+    @patch('frappe.db.commit')
+    @patch('lodgeick.config.oauth_tiers.get_rate_limit')
+    def test_rollup_writes_usage_log(self, mock_get_rate_limit, mock_commit):
+        """Test the rollup copies the counters into OAuth Usage Log"""
+        mock_get_rate_limit.return_value = {"requests_per_day": 100, "requests_per_minute": 5}
+
+        for _ in range(3):
+            record_api_request(self.user, "google", "default", "sheets")
+
+        oauth_rate_limiter.rollup_usage_logs()
+
+        usage_log = frappe.get_all(
+            "OAuth Usage Log",
+            filters={"user": self.user, "provider": "google", "tier": "default", "api_name": "sheets"},
+            fields=["requests_today", "daily_limit", "status"]
+        )
+        self.assertEqual(len(usage_log), 1)
+        self.assertEqual(usage_log[0].requests_today, 3)
+        self.assertEqual(usage_log[0].daily_limit, 100)
+        self.assertEqual(usage_log[0].status, "Active")
+
+
+if __name__ == '__main__':
+    unittest.main()
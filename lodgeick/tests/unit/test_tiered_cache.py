@@ -0,0 +1,108 @@
+"""
+Unit tests for lodgeick.services.tiered_cache module
+Tests LRU eviction, TTL/stale handling and namespace invalidation
+"""
+
+import unittest
+from unittest.mock import patch
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from lodgeick.services.tiered_cache import LRUCache, TieredCache
+
+
+class TestLRUCache(FrappeTestCase):
+    """Test LRUCache size bound"""
+
+    def test_evicts_least_recently_used(self):
+        """Test the oldest untouched entry is evicted first"""
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(len(cache), 2)
+
+
+class TestTieredCache(FrappeTestCase):
+    """Test TieredCache read/write behaviour"""
+
+    def setUp(self):
+        self.cache = TieredCache("test_tiered_cache", maxsize=8, ttl=60, stale_ttl=60)
+        self.cache.invalidate()
+
+    def test_roundtrip(self):
+        """Test a value can be read back from the local tier"""
+        self.cache.set("key", {"value": 1})
+
+        self.assertEqual(self.cache.get("key"), {"value": 1})
+        self.assertEqual(self.cache.stats()["local_hits"], 1)
+
+    def test_redis_tier_serves_other_processes(self):
+        """Test a cleared local tier falls back to Redis"""
+        self.cache.set("key", [1, 2, 3])
+        self.cache.local.clear()
+
+        self.assertEqual(self.cache.get("key"), [1, 2, 3])
+        self.assertEqual(self.cache.stats()["redis_hits"], 1)
+
+    def test_stale_value_served_and_revalidated(self):
+        """Test an expired value inside the stale window is served and refreshed"""
+        self.cache.revalidate = "lodgeick.services.n8n_cache.revalidate"
+        self.cache.set("key", "old", ttl=0, stale_ttl=60)
+
+        with patch("frappe.enqueue") as mock_enqueue:
+            self.assertEqual(self.cache.get("key"), "old")
+            self.assertEqual(self.cache.get("key"), "old")
+
+        # Throttled to a single enqueue
+        mock_enqueue.assert_called_once()
+
+    def test_fully_expired_is_miss(self):
+        """Test a value past its stale window is a miss"""
+        self.cache.set("key", "old", ttl=0, stale_ttl=0)
+
+        self.assertIsNone(self.cache.get("key"))
+
+    def test_stale_local_entry_replaced_from_redis(self):
+        """Test a stale local entry is replaced by a fresher one in Redis"""
+        self.cache.set("key", "old", ttl=0, stale_ttl=60)
+
+        # Another process (or the revalidation job) stores a fresh value
+        _, redis_key = self.cache._keys("key")
+        fresh = self.cache.local.get(f"{frappe.local.site}:{redis_key}").copy()
+        fresh.update(value="new", expires_at=fresh["expires_at"] + 60, stale_until=fresh["stale_until"] + 60)
+        frappe.cache().set_value(redis_key, fresh)
+
+        with patch("frappe.enqueue") as mock_enqueue:
+            self.assertEqual(self.cache.get("key"), "new")
+            self.assertGreater(self.cache.get_ttl("key"), 0)
+
+        mock_enqueue.assert_not_called()
+        self.assertEqual(self.cache.stats()["redis_hits"], 1)
+
+    def test_expired_local_entry_dropped_when_redis_empty(self):
+        """Test a stale local entry is dropped once Redis no longer has it"""
+        self.cache.set("key", "old", ttl=0, stale_ttl=60)
+        _, redis_key = self.cache._keys("key")
+        frappe.cache().delete_value(redis_key)
+
+        self.assertIsNone(self.cache.get("key"))
+        self.assertEqual(len(self.cache.local), 0)
+
+    def test_invalidate_drops_namespace(self):
+        """Test invalidate() hides every entry in the namespace"""
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.invalidate()
+
+        self.assertIsNone(self.cache.get("a"))
+        self.assertIsNone(self.cache.get("b"))
+
+
+if __name__ == '__main__':
+    unittest.main()
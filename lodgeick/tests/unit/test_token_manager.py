@@ -0,0 +1,182 @@
+"""
+Unit tests for lodgeick.services.token_manager module
+Tests access token caching, refresh scheduling and refresh de-duplication
+"""
+
+import unittest
+from unittest.mock import patch
+from datetime import timedelta
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import now_datetime
+
+from lodgeick.services import token_manager
+from lodgeick.services.token_manager import (
+    get_access_token, get_connection_status, invalidate, refresh_user_token, refresh_expiring_tokens
+)
+
+
+class TestGetAccessToken(FrappeTestCase):
+    """Test get_access_token"""
+
+    def setUp(self):
+        token_manager._token_cache.clear()
+
+    def tearDown(self):
+        token_manager._token_cache.clear()
+
+    def _token(self, seconds_left):
+        return frappe._dict(name="TOKEN-1", expires_at=now_datetime() + timedelta(seconds=seconds_left))
+
+    @patch('lodgeick.services.token_manager.get_decrypted_password')
+    @patch('frappe.db.get_value')
+    def test_cached_token_is_not_decrypted_again(self, mock_get_value, mock_decrypt):
+        """Test a second call is served from the process cache"""
+        mock_get_value.return_value = self._token(3600)
+        mock_decrypt.return_value = "access_1"
+
+        self.assertEqual(get_access_token("a@example.com", "google"), "access_1")
+        self.assertEqual(get_access_token("a@example.com", "google"), "access_1")
+
+        mock_decrypt.assert_called_once()
+
+    @patch('lodgeick.services.token_manager.get_decrypted_password')
+    @patch('frappe.db.get_value')
+    def test_invalidate_reaches_other_processes(self, mock_get_value, mock_decrypt):
+        """Test a version bump drops cached tokens even where invalidate() didn't run"""
+        mock_get_value.return_value = self._token(3600)
+        mock_decrypt.side_effect = ["access_1", "access_2"]
+
+        self.assertEqual(get_access_token("a@example.com", "google"), "access_1")
+
+        # Another process saved the token: only the shared version changes here
+        with patch.dict(token_manager._token_cache):
+            invalidate("a@example.com", "google")
+        self.assertEqual(get_access_token("a@example.com", "google"), "access_2")
+
+    @patch('lodgeick.services.token_manager.refresh_user_token', side_effect=frappe.ValidationError("No refresh token available"))
+    @patch('frappe.log_error')
+    @patch('frappe.db.get_value')
+    def test_failed_refresh_returns_none(self, mock_get_value, mock_log_error, mock_refresh):
+        """Test a token that cannot be refreshed is reported as missing instead of raising"""
+        mock_get_value.return_value = self._token(-10)
+
+        self.assertIsNone(get_access_token("a@example.com", "google"))
+        mock_log_error.assert_called_once()
+
+    @patch('lodgeick.services.token_manager.schedule_provider_refresh')
+    @patch('lodgeick.services.token_manager.refresh_user_token')
+    @patch('lodgeick.services.token_manager.get_decrypted_password')
+    @patch('frappe.db.get_value')
+    def test_expiring_token_refreshed_in_background(self, mock_get_value, mock_decrypt,
+                                                    mock_refresh, mock_schedule):
+        """Test a token expiring soon is returned and refreshed by a background job"""
+        mock_get_value.return_value = self._token(600)
+        mock_decrypt.return_value = "access_1"
+
+        self.assertEqual(get_access_token("a@example.com", "google"), "access_1")
+
+        mock_schedule.assert_called_once_with("google")
+        mock_refresh.assert_not_called()
+
+    @patch('lodgeick.services.token_manager.refresh_user_token')
+    @patch('lodgeick.services.token_manager.get_decrypted_password')
+    @patch('frappe.db.get_value')
+    def test_expired_token_refreshed_before_use(self, mock_get_value, mock_decrypt, mock_refresh):
+        """Test an expired token is refreshed before it is returned"""
+        mock_get_value.side_effect = [self._token(-10), now_datetime() + timedelta(hours=1)]
+        mock_decrypt.return_value = "access_2"
+
+        self.assertEqual(get_access_token("a@example.com", "google"), "access_2")
+        mock_refresh.assert_called_once_with("a@example.com", "google")
+
+
+class TestGetConnectionStatus(FrappeTestCase):
+    """Test get_connection_status"""
+
+    @patch('lodgeick.services.token_manager.schedule_provider_refresh')
+    @patch('lodgeick.services.token_manager.refresh_user_token')
+    @patch('frappe.db.get_value')
+    def test_expired_token_refreshed_in_background(self, mock_get_value, mock_refresh, mock_schedule):
+        """Test an expired token with a refresh token is connected and never refreshed inline"""
+        mock_get_value.return_value = frappe._dict(
+            expires_at=now_datetime() - timedelta(minutes=5), refresh_token="*****"
+        )
+
+        self.assertEqual(get_connection_status("a@example.com", "google"), "connected")
+        mock_schedule.assert_called_once_with("google")
+        mock_refresh.assert_not_called()
+
+    @patch('frappe.db.get_value')
+    def test_expired_token_without_refresh_token(self, mock_get_value):
+        """Test an expired token that cannot be refreshed needs a reconnect"""
+        mock_get_value.return_value = frappe._dict(
+            expires_at=now_datetime() - timedelta(minutes=5), refresh_token=None
+        )
+
+        self.assertEqual(get_connection_status("a@example.com", "google"), "expired")
+
+    @patch('frappe.db.get_value', return_value=None)
+    def test_not_connected(self, mock_get_value):
+        """Test a missing token is not connected"""
+        self.assertIsNone(get_connection_status("a@example.com", "google"))
+
+
+class TestRefreshUserToken(FrappeTestCase):
+    """Test refresh_user_token"""
+
+    @patch('lodgeick.api.oauth.refresh_token_doc')
+    @patch('frappe.get_doc')
+    def test_concurrent_refresh_is_skipped(self, mock_get_doc, mock_refresh_token_doc):
+        """Test a refresh already in progress is waited for, not repeated"""
+        cache = frappe.cache()
+        lock_key = cache.make_key("token_refresh:a@example.com:google")
+        cache.set(lock_key, 1, ex=1)
+
+        try:
+            self.assertFalse(refresh_user_token("a@example.com", "google"))
+        finally:
+            cache.delete(lock_key)
+
+        mock_refresh_token_doc.assert_not_called()
+
+    @patch('lodgeick.services.token_manager._get_expires_at')
+    @patch('lodgeick.api.oauth.refresh_token_doc')
+    def test_concurrent_refresh_result_is_reported(self, mock_refresh_token_doc, mock_get_expires_at):
+        """Test waiting on a successful concurrent refresh reports success"""
+        expires_at = now_datetime()
+        mock_get_expires_at.side_effect = [expires_at, expires_at + timedelta(hours=1)]
+
+        cache = frappe.cache()
+        lock_key = cache.make_key("token_refresh:a@example.com:google")
+        cache.set(lock_key, 1, ex=1)
+
+        try:
+            self.assertTrue(refresh_user_token("a@example.com", "google"))
+        finally:
+            cache.delete(lock_key)
+
+        mock_refresh_token_doc.assert_not_called()
+        self.assertTrue(mock_get_expires_at.call_args.kwargs["for_update"])
+
+
+class TestRefreshExpiringTokens(FrappeTestCase):
+    """Test refresh_expiring_tokens"""
+
+    @patch('lodgeick.services.token_manager.schedule_provider_refresh')
+    @patch('frappe.get_all')
+    def test_one_job_per_provider(self, mock_get_all, mock_schedule):
+        """Test expiring tokens are refreshed in one batch job per provider"""
+        mock_get_all.return_value = [
+            frappe._dict(provider="google", tokens=12),
+            frappe._dict(provider="xero", tokens=3)
+        ]
+
+        result = refresh_expiring_tokens()
+
+        self.assertEqual(result["providers"], {"google": 12, "xero": 3})
+        self.assertEqual([call[0][0] for call in mock_schedule.call_args_list], ["google", "xero"])
+
+
+if __name__ == '__main__':
+    unittest.main()